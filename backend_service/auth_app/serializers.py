@@ -11,6 +11,8 @@ class CustomUserSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ['id', 'email', 'phone', 'groups', 'password']
         read_only_fields = ['id']
+        prefetch_related = ['groups']
+        compiled_sources = {'groups': 'groups__name'}
 
     def get_groups(self, obj):
         return [group.name for group in obj.groups.all()]
@@ -11,6 +11,8 @@ from django.views.decorators.csrf import ensure_csrf_cookie
 from django.contrib.auth.models import Group
 from .models import CustomUser
 from .serializers import CustomUserSerializer, LoginSerializer
+from backend_service.prefetch import PrefetchPlanMixin
+from backend_service.streaming import StreamingListMixin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -61,7 +63,7 @@ class LogoutView(APIView):
             return Response({"error": "User is not authenticated"}, status=status.HTTP_401_UNAUTHORIZED)
 
 
-class CustomUserViewSet(ModelViewSet):
+class CustomUserViewSet(PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = []
@@ -0,0 +1,188 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from auth_app.models import CustomUser
+from bookings.inventory import rebuild_inventory
+from bookings.models import Booking
+from bookings.rollups import reconcile_stats
+from hotels.models import Hotel, HotelType, Image as HotelImage
+from hotels.search import rebuild_index
+from profiles.models import Profile
+from rooms.documents import rebuild_documents
+from rooms.models import Room, RoomType, Image as RoomImage
+import random
+import time
+
+
+def best_time(func, repeat):
+    """
+    Best wall time of `repeat` calls of `func`, in seconds.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def generate_catalog(hotels):
+    """
+    Bulk inserts `hotels` hotels with 5 rooms, 2 images per room and hotel and
+    one booking per room. Signals are skipped; callers run it in a transaction
+    they roll back.
+    """
+    owner = CustomUser.objects.create_user(email='benchmark-owner@example.com', password=None)
+    hotel_type = HotelType.objects.create(name='benchmark-hotel-type')
+    room_type = RoomType.objects.create(name='benchmark-room-type')
+    created = Hotel.objects.bulk_create([
+        Hotel(owner=owner, name=f"Hotel {i}", address=f"{i} Main street", city=f"City {i % 50}",
+              country=f"Country {i % 10}", description="Benchmark hotel", type=hotel_type)
+        for i in range(hotels)
+    ])
+    HotelImage.objects.bulk_create([
+        HotelImage(hotel=hotel, image=f"hotels/{hotel.id}-{n}.jpg") for hotel in created for n in range(2)
+    ])
+    rooms = Room.objects.bulk_create([
+        Room(hotel=hotel, type=room_type, name=f"Room {n}", price_per_night=Decimal(50 + 10 * n))
+        for hotel in created for n in range(5)
+    ])
+    RoomImage.objects.bulk_create([
+        RoomImage(room=room, image=f"rooms/{room.id}-{n}.jpg") for room in rooms for n in range(2)
+    ])
+    start = date.today()
+    Booking.objects.bulk_create([
+        Booking(user=owner, room=room, start_date=start + timedelta(days=i % 30),
+                end_date=start + timedelta(days=i % 30 + 2), status='confirmed')
+        for i, room in enumerate(rooms)
+    ])
+
+
+WORDS = (
+    "Grand", "Royal", "Sea", "Garden", "Park", "Plaza", "Harbour", "Central", "Old Town", "Palace",
+    "River", "Hill", "Bay", "Forest", "Lake", "Sunset", "Marina", "Alpine", "Riverside", "Boutique",
+)
+CITIES = 50
+COUNTRIES = 10
+ROOMS_PER_HOTEL = 5
+BOOKINGS_PER_HOTEL = 200
+BOOKINGS_PER_GUEST = 10
+HOTELS_PER_OWNER = 10
+
+
+def create_keyed(model, objs, key, batch_size):
+    """
+    bulk_create() that also sets primary keys where the backend does not return them
+    (MySQL), by reading them back through the unique `key` column.
+    """
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    if objs and objs[0].pk is None:
+        pks = {}
+        keys = [getattr(obj, key) for obj in objs]
+        for start in range(0, len(keys), batch_size):
+            pks.update(model.objects.filter(**{f"{key}__in": keys[start:start + batch_size]}).values_list(key, 'pk'))
+        for obj in objs:
+            obj.pk = pks[getattr(obj, key)]
+    return objs
+
+
+def dataset_scale(bookings):
+    hotels = max(1, bookings // BOOKINGS_PER_HOTEL)
+    return {
+        'hotels': hotels,
+        'rooms': hotels * ROOMS_PER_HOTEL,
+        'owners': max(1, hotels // HOTELS_PER_OWNER),
+        'guests': max(10, bookings // BOOKINGS_PER_GUEST),
+        'bookings': bookings,
+    }
+
+
+def generate_dataset(bookings, seed=0, tag='bench', start=date(2025, 1, 1), batch_size=5000):
+    """
+    Deterministically generates owners, guests, hotels with images, rooms with images and
+    `bookings` bookings (non-overlapping per room; 70% confirmed, 20% active, 10%
+    cancelled), then builds the derived tables. The same arguments give the same data.
+    Emails end with @<tag>.example and external ids start with <tag>-.
+    """
+    rng = random.Random(seed)
+    scale = dataset_scale(bookings)
+    password = make_password(tag)
+
+    hotel_types = [HotelType.objects.get_or_create(name=f"{tag} {word}")[0] for word in WORDS[:5]]
+    room_types = [RoomType.objects.get_or_create(name=f"{tag} {word} room")[0] for word in WORDS[5:10]]
+    users = create_keyed(CustomUser, [
+        CustomUser(email=f"owner{i}@{tag}.example", password=password) for i in range(scale['owners'])
+    ] + [
+        CustomUser(email=f"guest{i}@{tag}.example", password=password) for i in range(scale['guests'])
+    ], 'email', batch_size)
+    owners, guests = users[:scale['owners']], users[scale['owners']:]
+
+    hotels = create_keyed(Hotel, [
+        Hotel(
+            owner=owners[i % len(owners)],
+            name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} Hotel {i}",
+            address=f"{rng.randint(1, 300)} {rng.choice(WORDS)} street",
+            city=f"City {rng.randrange(CITIES)}",
+            country=f"Country {rng.randrange(COUNTRIES)}",
+            description=" ".join(rng.choice(WORDS) for _ in range(12)),
+            rating=rng.randint(1, 5),
+            type=rng.choice(hotel_types),
+            external_id=f"{tag}-H{i}",
+        )
+        for i in range(scale['hotels'])
+    ], 'external_id', batch_size)
+    HotelImage.objects.bulk_create([
+        HotelImage(hotel=hotel, image=f"pictures/hotels/{hotel.external_id}/images/{n}.jpg")
+        for hotel in hotels for n in range(2)
+    ], batch_size=batch_size)
+    rooms = create_keyed(Room, [
+        Room(
+            hotel=hotel,
+            type=rng.choice(room_types),
+            name=f"{rng.choice(WORDS)} room {n}",
+            price_per_night=Decimal(rng.randrange(4000, 40000)) / 100,
+            external_id=f"{hotel.external_id}-R{n}",
+        )
+        for hotel in hotels for n in range(ROOMS_PER_HOTEL)
+    ], 'external_id', batch_size)
+    RoomImage.objects.bulk_create([
+        RoomImage(room=room, image=f"pictures/rooms/{room.external_id}/images/{n}.jpg")
+        for room in rooms for n in range(2)
+    ], batch_size=batch_size)
+
+    per_guest = [0] * len(guests)
+    batch = []
+    for index, room in enumerate(rooms):
+        count = bookings // len(rooms) + (index < bookings % len(rooms))
+        day = start + timedelta(days=rng.randrange(14))
+        for _ in range(count):
+            nights = rng.randint(1, 7)
+            roll = rng.random()
+            guest = rng.randrange(len(guests))
+            per_guest[guest] += 1
+            batch.append(Booking(
+                user=guests[guest], room=room, start_date=day, end_date=day + timedelta(days=nights),
+                status='confirmed' if roll < 0.7 else 'active' if roll < 0.9 else 'cancelled',
+            ))
+            day += timedelta(days=nights + rng.randrange(5))
+        room.total_bookings = count
+        if len(batch) >= batch_size:
+            Booking.objects.bulk_create(batch)
+            batch = []
+    Booking.objects.bulk_create(batch)
+    Room.objects.bulk_update(rooms, ['total_bookings'], batch_size=batch_size)
+    totals = [0] * len(owners) + per_guest
+    Profile.objects.bulk_create([
+        Profile(user=user, username=user.email.split('@')[0], total_bookings=total)
+        for user, total in zip(users, totals)
+    ], batch_size=batch_size)
+
+    rebuild_inventory(batch_size=batch_size)
+    rebuild_documents()
+    rebuild_index()
+    reconcile_stats(batch_size=batch_size)
+    return scale
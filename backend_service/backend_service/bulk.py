@@ -0,0 +1,268 @@
+"""
+Bulk create/update endpoints.
+
+BulkWriteMixin adds `POST <list>/bulk/` (create a list of items) and `PATCH <list>/bulk/`
+(partially update a list of items carrying their "id") to a ModelViewSet. The batch is
+validated as a whole, with one query per related field for all items (see
+PreloadedRelatedMixin), and written with bulk INSERT/UPDATE statements in a single
+transaction: either every item is written, or the 400 response holds one error dict
+per item, empty for the valid ones.
+
+Model signals are not sent for bulk writes. Receivers of `bulk_saved` keep the derived
+data (search index, documents, caches, versions) up to date for the whole batch.
+"""
+from copy import copy
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, router, transaction
+from django.dispatch import Signal
+from django.http import QueryDict
+from django.utils.encoding import smart_str
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField, SlugRelatedField
+from rest_framework.response import Response
+
+MAX_ITEMS = 500
+
+# Sent after a bulk write with `instances` (the written objects), `created` and
+# `previous` ({pk: copy of the object before the update}, empty on create).
+bulk_saved = Signal()
+
+
+class PreloadedRelatedMixin:
+    """
+    Related field resolving values from `preloaded` when it is set (see preload())
+    instead of running one query per value.
+    """
+    preloaded = None
+
+    def lookup_key(self, data):
+        raise NotImplementedError
+
+    def preload(self, values):
+        keys = set()
+        for value in values:
+            try:
+                keys.add(self.lookup_key(value))
+            except (TypeError, ValueError, DjangoValidationError):
+                pass
+        objects = self.get_queryset().filter(**{f"{self.lookup_field}__in": keys})
+        self.preloaded = {self.lookup_key(getattr(obj, self.lookup_field)): obj for obj in objects}
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            key = self.lookup_key(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail_invalid(data)
+        if key not in self.preloaded:
+            self.fail_missing(data)
+        return self.preloaded[key]
+
+
+class PreloadedPrimaryKeyRelatedField(PreloadedRelatedMixin, PrimaryKeyRelatedField):
+    lookup_field = 'pk'
+
+    def lookup_key(self, data):
+        if isinstance(data, bool):
+            raise TypeError(data)
+        return self.get_queryset().model._meta.pk.to_python(data)
+
+    def fail_invalid(self, data):
+        self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def fail_missing(self, data):
+        self.fail('does_not_exist', pk_value=data)
+
+
+class PreloadedSlugRelatedField(PreloadedRelatedMixin, SlugRelatedField):
+    @property
+    def lookup_field(self):
+        return self.slug_field
+
+    def lookup_key(self, data):
+        if not isinstance(data, (str, int)) or isinstance(data, bool):
+            raise TypeError(data)
+        return str(data)
+
+    def fail_invalid(self, data):
+        self.fail('invalid')
+
+    def fail_missing(self, data):
+        self.fail('does_not_exist', slug_name=self.slug_field, value=smart_str(data))
+
+
+def affected_ids(attname, instances, previous):
+    """
+    Values of `attname` (e.g. a foreign key) of a bulk-written batch, before and after the write.
+    """
+    return {getattr(obj, attname) for obj in [*instances, *previous.values()]}
+
+
+def insert_all(model, objs):
+    """
+    INSERTs `objs` without sending model signals and sets their primary keys.
+    MySQL cannot return the keys of a multi-row INSERT, but InnoDB gives the rows of one
+    INSERT with a known row count consecutive auto-increment values: the keys are
+    computed from LAST_INSERT_ID(), the first of them. Other backends that cannot return
+    keys insert rows one by one.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    if connection.features.can_return_rows_from_bulk_insert or not objs:
+        return model.objects.using(using).bulk_create(objs)
+    if connection.vendor == 'mysql':
+        with transaction.atomic(using=using):
+            # A single statement, so that LAST_INSERT_ID() covers every row.
+            model.objects.using(using).bulk_create(objs, batch_size=len(objs))
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT LAST_INSERT_ID(), @@auto_increment_increment")
+                first, step = cursor.fetchone()
+        for i, obj in enumerate(objs):
+            obj.pk = first + i * step
+            obj._state.adding = False
+            obj._state.db = using
+        return objs
+    for obj in objs:
+        obj._save_table(cls=model, force_insert=True, using=using)
+        obj._state.adding = False
+        obj._state.db = using
+    return objs
+
+
+def upsert_all(model, objs, unique_field, update_fields):
+    """
+    INSERTs `objs`, updating `update_fields` of the rows whose `unique_field` already
+    exists, without sending model signals. Primary keys are read back by `unique_field`.
+    """
+    using = router.db_for_write(model)
+    features = connections[using].features
+    model.objects.using(using).bulk_create(
+        objs,
+        update_conflicts=True,
+        # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target.
+        unique_fields=[unique_field] if features.supports_update_conflicts_with_target else None,
+        update_fields=update_fields,
+    )
+    pks = dict(model.objects.using(using).filter(
+        **{f"{unique_field}__in": [getattr(obj, unique_field) for obj in objs]}
+    ).values_list(unique_field, 'pk'))
+    for obj in objs:
+        obj.pk = pks[getattr(obj, unique_field)]
+        obj._state.adding = False
+        obj._state.db = using
+    return objs
+
+
+class BulkWriteMixin:
+    """
+    `bulk_file_field` names the file field of multipart bulk creates: one item per
+    uploaded file, the other form fields are given once for all items or once per file.
+    """
+    bulk_file_field = None
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        items = self.get_bulk_items(request)
+        with transaction.atomic():
+            if request.method == 'POST':
+                instances, previous = self.bulk_create_items(items), {}
+            else:
+                instances, previous = self.bulk_update_items(items)
+            model = self.get_serializer_class().Meta.model
+            bulk_saved.send(sender=model, instances=instances, created=not previous, previous=previous)
+
+        pks = [instance.pk for instance in instances]
+        written = self.get_queryset().in_bulk(pks)
+        serializer = self.get_serializer([written[pk] for pk in pks], many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if not previous else status.HTTP_200_OK)
+
+    def get_bulk_items(self, request):
+        data = request.data
+        if isinstance(data, QueryDict) and self.bulk_file_field:
+            data = self.multipart_items(data, request.FILES.getlist(self.bulk_file_field))
+        if not isinstance(data, list) or not data:
+            raise ValidationError({'non_field_errors': ["Expected a non-empty list of items."]})
+        limit = getattr(settings, 'BULK_MAX_ITEMS', MAX_ITEMS)
+        if len(data) > limit:
+            raise ValidationError({'non_field_errors': [f"A batch holds at most {limit} items."]})
+        return data
+
+    def multipart_items(self, data, files):
+        items = [{self.bulk_file_field: file} for file in files]
+        for key in data:
+            if key == self.bulk_file_field:
+                continue
+            values = data.getlist(key)
+            if len(values) not in (1, len(items)):
+                raise ValidationError({key: [f"Expected 1 or {len(items)} values."]})
+            for i, item in enumerate(items):
+                item[key] = values[0] if len(values) == 1 else values[i]
+        return items
+
+    def bulk_serializer(self, items, partial):
+        """
+        One serializer validating every item, its related fields preloaded for the batch.
+        """
+        serializer = self.get_serializer_class()(context=self.get_serializer_context(), partial=partial)
+        for name, field in serializer.fields.items():
+            if isinstance(field, PreloadedRelatedMixin) and not field.read_only:
+                field.preload([item[name] for item in items if isinstance(item, dict) and name in item])
+        return serializer
+
+    def validate_items(self, serializer, items, instances=None):
+        validated, errors = [], []
+        for i, item in enumerate(items):
+            serializer.instance = instances[i] if instances else None
+            try:
+                validated.append(serializer.run_validation(item))
+                errors.append({})
+            except ValidationError as e:
+                validated.append(None)
+                errors.append(e.detail)
+        if any(errors):
+            raise ValidationError(errors)
+        return validated
+
+    def bulk_create_items(self, items):
+        serializer = self.bulk_serializer(items, partial=False)
+        model = serializer.Meta.model
+        return insert_all(model, [model(**data) for data in self.validate_items(serializer, items)])
+
+    def bulk_update_items(self, items):
+        serializer = self.bulk_serializer(items, partial=True)
+        model = serializer.Meta.model
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        try:
+            keys = [model._meta.pk.to_python(pk) if pk is not None else None for pk in ids]
+        except DjangoValidationError:
+            raise ValidationError([{'id': ["Invalid id."]} for _ in items])
+        stored = model.objects.select_for_update().in_bulk([key for key in keys if key is not None])
+
+        errors, seen = [], set()
+        for key in keys:
+            if key is None:
+                errors.append({'id': ["This field is required."]})
+            elif key not in stored:
+                errors.append({'id': ["Not found."]})
+            elif key in seen:
+                errors.append({'id': ["Duplicate id."]})
+            else:
+                errors.append({})
+            seen.add(key)
+        if any(errors):
+            raise ValidationError(errors)
+
+        instances = [stored[key] for key in keys]
+        previous = {instance.pk: copy(instance) for instance in instances}
+        fields = set()
+        for instance, data in zip(instances, self.validate_items(serializer, items, instances)):
+            for name, value in data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+        if fields:
+            model.objects.bulk_update(instances, sorted(fields))
+        return instances, previous
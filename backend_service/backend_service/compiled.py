@@ -0,0 +1,215 @@
+"""
+Compiled read-only serialization for list endpoints.
+
+A ModelSerializer is compiled once into a field plan: the columns to read with
+values_list(), and for every output key how to build it from a row tuple. Serializing
+a queryset then runs one query per level of nesting and builds plain dicts, skipping
+model instances and DRF's per-field machinery. The output matches the serializer's own.
+
+SerializerMethodFields are compiled only when the serializer maps them in
+Meta.compiled_sources to a lookup path, e.g. {'hotel_name': 'hotel__name'}, or to a
+(path, converter factory) pair; a factory takes the serializer context and returns the
+function applied to every non-null value. Any other unsupported field makes
+compile_serializer() return None and callers fall back to DRF.
+"""
+from copy import copy
+from functools import lru_cache
+from operator import itemgetter
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage, storages
+import re
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, SlugRelatedField
+from .fieldsets import CACHE_SIZE
+
+COLUMN = 'column'
+ONE = 'one'
+MANY = 'many'
+VALUES = 'values'
+
+IDENTITY_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ReadOnlyField,
+)
+
+BATCH_SIZE = 1000
+
+# File names whose URL is the storage base URL followed by the name itself.
+PLAIN_NAME = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]*(/[A-Za-z0-9_-][A-Za-z0-9_.-]*)*\Z')
+PROBE_NAME = 'probe'
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def is_to_many(model, path):
+    field = model._meta.get_field(path.split('__')[0])
+    return field.one_to_many or field.many_to_many
+
+
+def absolute_url(context):
+    """
+    Returns a function giving the URL of a stored file the way DRF's FileField does:
+    absolute when the context holds a request. For local storage the URL prefix is
+    computed once and plain names are appended to it.
+    """
+    request = context.get('request')
+    if request is None:
+        url = default_storage.url
+    else:
+        url = lambda name: request.build_absolute_uri(default_storage.url(name))
+    if not isinstance(storages['default'], FileSystemStorage):
+        return url
+
+    probe = url(PROBE_NAME)
+    if not probe.endswith(PROBE_NAME):
+        return url
+    prefix = probe[:-len(PROBE_NAME)]
+    return lambda name: prefix + name if PLAIN_NAME.match(name) else url(name)
+
+
+def file_url(context):
+    url = absolute_url(context)
+    return lambda name: url(name) if name else None
+
+
+def datetime_representation(field):
+    """
+    DateTimeField.to_representation with the current timezone resolved once.
+    """
+    def factory(context):
+        if hasattr(field, 'timezone'):
+            return field.to_representation
+        bound = copy(field)
+        bound.timezone = field.default_timezone()
+        return bound.to_representation
+    return factory
+
+
+class Plan:
+    def __init__(self, serializer_class, prefix='', columns=None):
+        self.model = serializer_class.Meta.model
+        self.prefix = prefix
+        self.columns = [] if columns is None else columns
+        self.steps = []
+        sources = getattr(serializer_class.Meta, 'compiled_sources', {})
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in sources:
+                self.add_source(name, sources[name])
+            elif isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+                relation = self.model._meta.get_field(field.source)
+                child = Plan(type(field.child), columns=[relation.field.attname])
+                self.steps.append((name, MANY, (self.column('pk'), child, relation.field.name), None))
+            elif isinstance(field, serializers.ModelSerializer):
+                nested = Plan(type(field), prefix=f"{self.prefix}{field.source}__", columns=self.columns)
+                self.steps.append((name, ONE, (self.column(f"{field.source}__pk"), nested.steps), None))
+            elif isinstance(field, SlugRelatedField):
+                self.steps.append((name, COLUMN, self.column(f"{field.source}__{field.slug_field}"), None))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                self.steps.append((name, COLUMN, self.column(field.source), None))
+            elif isinstance(field, serializers.FileField):
+                self.steps.append((name, COLUMN, self.column(field.source), file_url))
+            elif isinstance(field, serializers.SerializerMethodField) or isinstance(field, serializers.RelatedField):
+                raise NotCompilable(f"{serializer_class.__name__}.{name}")
+            elif isinstance(field, serializers.DateTimeField):
+                self.steps.append((name, COLUMN, self.column(field.source.replace('.', '__')), datetime_representation(field)))
+            elif isinstance(field, IDENTITY_FIELDS):
+                self.steps.append((name, COLUMN, self.column(field.source.replace('.', '__')), None))
+            else:
+                to_representation = field.to_representation
+                self.steps.append((name, COLUMN, self.column(field.source.replace('.', '__')), lambda context, f=to_representation: f))
+
+    def column(self, path):
+        self.columns.append(self.prefix + path)
+        return len(self.columns) - 1
+
+    def add_source(self, name, source):
+        path, conv = source if isinstance(source, tuple) else (source, None)
+        if is_to_many(self.model, path):
+            self.steps.append((name, VALUES, (self.column('pk'), self.model, path), None))
+        else:
+            self.steps.append((name, COLUMN, self.column(path), conv))
+
+
+def prepare(steps, rows, context):
+    """
+    Runs the queries of nested to-many fields for `rows` and returns (key, getter) pairs.
+    """
+    getters = []
+    for key, kind, arg, conv in steps:
+        if kind == COLUMN:
+            if conv is None:
+                getters.append((key, itemgetter(arg)))
+            else:
+                convert = conv(context)
+                getters.append((key, lambda row, i=arg, convert=convert: None if row[i] is None else convert(row[i])))
+        elif kind == ONE:
+            pk_index, nested_steps = arg
+            nested = prepare(nested_steps, rows, context)
+            getters.append((key, lambda row, i=pk_index, nested=nested: None if row[i] is None else {k: g(row) for k, g in nested}))
+        elif kind == MANY:
+            pk_index, child, fk = arg
+            groups = fetch_children(child, fk, {row[pk_index] for row in rows}, context)
+            getters.append((key, lambda row, i=pk_index, groups=groups: groups.get(row[i], [])))
+        elif kind == VALUES:
+            pk_index, model, path = arg
+            groups = fetch_values(model, path, {row[pk_index] for row in rows})
+            getters.append((key, lambda row, i=pk_index, groups=groups: groups.get(row[i], [])))
+    return getters
+
+
+def batches(ids):
+    ids = [pk for pk in ids if pk is not None]
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def fetch_children(child, fk, parent_ids, context):
+    groups = {}
+    for ids in batches(parent_ids):
+        rows = list(child.model._default_manager.filter(**{f"{fk}__in": ids}).values_list(*child.columns))
+        getters = prepare(child.steps, rows, context)
+        for row in rows:
+            groups.setdefault(row[0], []).append({k: g(row) for k, g in getters})
+    return groups
+
+
+def fetch_values(model, path, ids):
+    groups = {}
+    for batch in batches(ids):
+        for pk, value in model._default_manager.filter(pk__in=batch).values_list('pk', path):
+            groups.setdefault(pk, [])
+            if value is not None:
+                groups[pk].append(value)
+    return groups
+
+
+class CompiledSerializer:
+    def __init__(self, serializer_class):
+        self.plan = Plan(serializer_class)
+
+    def serialize(self, queryset, context=None):
+        context = context or {}
+        rows = list(queryset.prefetch_related(None).values_list(*self.plan.columns))
+        getters = prepare(self.plan.steps, rows, context)
+        return [{k: g(row) for k, g in getters} for row in rows]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_serializer(serializer_class):
+    """
+    Returns the compiled form of `serializer_class`, or None when it cannot be compiled
+    or compiled serialization is disabled by settings.COMPILED_SERIALIZERS.
+    """
+    if not getattr(settings, 'COMPILED_SERIALIZERS', True):
+        return None
+    try:
+        return CompiledSerializer(serializer_class)
+    except NotCompilable:
+        return None
@@ -0,0 +1,29 @@
+"""
+Date windows of API query parameters: dashboards, availability calendars, quotes and
+stay searches all read a [start, end) window with the same rules.
+"""
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+
+
+def window(start=None, end=None):
+    """
+    Validated [start, end) date window; defaults to the next DEFAULT_DAYS days.
+    """
+    try:
+        start = parse_date(start) if start else timezone.localdate()
+        end = parse_date(end) if end else start and start + timedelta(days=DEFAULT_DAYS)
+    except ValueError:
+        start = end = None
+    if start is None or end is None:
+        raise ValidationError("Dates must use the YYYY-MM-DD format.")
+    if end <= start:
+        raise ValidationError("end must be after start.")
+    if (end - start).days > MAX_DAYS:
+        raise ValidationError(f"The window cannot exceed {MAX_DAYS} days.")
+    return start, end
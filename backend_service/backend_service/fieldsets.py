@@ -0,0 +1,188 @@
+"""
+Sparse fieldsets and opt-in expansion of nested payloads.
+
+`?fields=id,name,rooms.name` keeps only the listed fields; a nested field named without
+a sub-path is rendered in full. `?expand=rooms` keeps every plain field and, among the
+nested ones, only those listed. Both can be combined; the primary key is always kept.
+
+A fieldset is applied by deriving a serializer subclass, cached per fieldset, whose Meta
+also lists the select_related/prefetch_related lookups and the columns (Meta.only) its
+fields read, so that plan_queryset() loads nothing else. Fieldsets come from clients, so
+this cache and the ones keyed on the derived classes (compiled serializers, relation
+plans) keep at most CACHE_SIZE entries each.
+"""
+from functools import lru_cache
+from django.core.exceptions import ValidationError
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.relations import PrimaryKeyRelatedField, SlugRelatedField
+
+ALL_PLAIN = '*'
+CACHE_SIZE = 256
+
+
+def parse_paths(value, plain):
+    tree = {ALL_PLAIN: True} if plain else {}
+    for path in filter(None, (part.strip() for part in value.split(','))):
+        node = tree
+        *parents, leaf = path.split('.')
+        for name in parents:
+            if name in node and node[name] is None:
+                break
+            node = node.setdefault(name, {ALL_PLAIN: True} if plain else {})
+        else:
+            node[leaf] = None
+    return tree
+
+
+def merge(tree, extra):
+    for name, sub in extra.items():
+        if name == ALL_PLAIN:
+            continue
+        if name not in tree or sub is None:
+            tree[name] = sub
+        elif tree[name] is not None:
+            merge(tree[name], sub)
+    return tree
+
+
+def fieldset(query_params):
+    """
+    Returns the fieldset requested by `fields`/`expand`, or None for the full payload.
+    """
+    fields = query_params.get('fields')
+    expand = query_params.get('expand')
+    if fields is None and expand is None:
+        return None
+    if fields is None:
+        return parse_paths(expand, plain=True)
+    return merge(parse_paths(fields, plain=False), parse_paths(expand or '', plain=False))
+
+
+def freeze(tree):
+    if tree is None:
+        return None
+    return tuple(sorted((name, sub if name == ALL_PLAIN else freeze(sub)) for name, sub in tree.items()))
+
+
+def sparse_serializer(serializer_class, tree):
+    """
+    Returns `serializer_class` restricted to the fieldset `tree` (unchanged for None).
+    """
+    if tree is None:
+        return serializer_class
+    return restricted(serializer_class, freeze(tree))
+
+
+def relation_needs(model, field, name, sources):
+    """
+    Returns the (select_related, prefetch_related, only) lookups a kept plain field reads,
+    with None for only() when they cannot be known.
+    """
+    if name in sources:
+        source = sources[name]
+        path = source[0] if isinstance(source, tuple) else source
+        head = model._meta.get_field(path.split('__')[0])
+        if head.one_to_many or head.many_to_many:
+            return [], [head.name], []
+        return ([path.rsplit('__', 1)[0]] if '__' in path else []), [], [path]
+    if isinstance(field, SlugRelatedField):
+        return [field.source], [], [f"{field.source}__{field.slug_field}"]
+    if isinstance(field, PrimaryKeyRelatedField):
+        return [], [], [field.source]
+    if isinstance(field, (serializers.SerializerMethodField, serializers.RelatedField)):
+        return [], [], None
+    path = field.source.replace('.', '__')
+    return ([path.rsplit('__', 1)[0]] if '__' in path else []), [], [path]
+
+
+def nested_needs(source, child_class):
+    """
+    Lookups of a nested single-object serializer, prefixed with its `source`.
+    """
+    meta = child_class.Meta
+    if getattr(meta, 'only', None) is None:
+        return [source], [], None
+    prefix = f"{source}__"
+    select = [source] + [prefix + lookup for lookup in getattr(meta, 'select_related', ())]
+    prefetch = [prefix + lookup for lookup in getattr(meta, 'prefetch_related', ())]
+    return select, prefetch, [prefix + column for column in meta.only]
+
+
+def nested_source(name, field):
+    return {} if field.source == name else {'source': field.source}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def restricted(serializer_class, frozen, parent_field=None):
+    tree = dict(frozen)
+    all_plain = tree.pop(ALL_PLAIN, False)
+    meta = serializer_class.Meta
+    model = meta.model
+    fields = serializer_class().fields
+    sources = getattr(meta, 'compiled_sources', {})
+
+    unknown = sorted(set(tree) - set(fields))
+    if unknown:
+        raise ValidationError(f"Unknown fields for {model.__name__}: {', '.join(unknown)}.")
+
+    kept = []
+    attrs = {}
+    select, prefetch, only = [], [], [model._meta.pk.name]
+    if parent_field:
+        only.append(parent_field)
+    for name, field in fields.items():
+        nested = isinstance(field, serializers.BaseSerializer)
+        if field.write_only or not (name in tree or name == model._meta.pk.name or (all_plain and not nested)):
+            if name in serializer_class._declared_fields:
+                attrs[name] = None
+            continue
+
+        kept.append(name)
+        if isinstance(field, serializers.ListSerializer):
+            if tree.get(name) is not None:
+                relation = model._meta.get_field(field.source)
+                attrs[name] = restricted(type(field.child), tree[name], relation.field.name)(
+                    many=True, read_only=True, **nested_source(name, field))
+            continue
+        if nested:
+            child_class = type(field)
+            if tree.get(name) is not None:
+                child_class = restricted(child_class, tree[name])
+                attrs[name] = child_class(read_only=True, **nested_source(name, field))
+            needs = nested_needs(field.source, child_class)
+        else:
+            needs = relation_needs(model, field, name, sources)
+
+        select.extend(needs[0])
+        prefetch.extend(needs[1])
+        only = None if only is None or needs[2] is None else only + needs[2]
+
+    meta_attrs = {'fields': tuple(kept)}
+    if only is not None:
+        meta_attrs.update(
+            select_related=tuple(dict.fromkeys(select)),
+            prefetch_related=tuple(dict.fromkeys(prefetch)),
+            only=tuple(dict.fromkeys(only)),
+        )
+    attrs['Meta'] = type('Meta', (meta,), meta_attrs)
+    return type(f"Sparse{serializer_class.__name__}", (serializer_class,), attrs)
+
+
+class SparseFieldsetMixin:
+    """
+    Applies `?fields=`/`?expand=` to the serializer of GET requests and custom list actions.
+    """
+    def sparse_serializer(self, serializer_class):
+        if self.request is None or self.request.method != 'GET':
+            return serializer_class
+        try:
+            return sparse_serializer(serializer_class, fieldset(self.request.query_params))
+        except ValidationError as e:
+            raise DRFValidationError({'fields': e.messages})
+
+    def get_serializer_class(self):
+        return self.sparse_serializer(super().get_serializer_class())
+
+    def list_response(self, queryset, serializer_class=None):
+        return super().list_response(queryset, self.sparse_serializer(serializer_class or super().get_serializer_class()))
@@ -0,0 +1,98 @@
+"""
+Default pagination of the API: keyset (cursor) pages over indexed columns.
+
+Responses have the form {"next": <url or null>, "results": [...]}; with `?count=true`
+they also hold "estimated_count", taken from MySQL table statistics for whole tables
+and from a briefly cached COUNT(*) otherwise.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from rest_framework.exceptions import NotFound, ValidationError as DRFValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from hotels.pagination import page_size, paginate_keys
+import hashlib
+
+COUNT_TIMEOUT = 60
+
+
+def table_statistics_count(queryset):
+    """
+    Row count estimate of an unfiltered queryset from MySQL's table statistics, or None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def cached_count(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = "count:" + hashlib.sha1(f"{queryset.db}:{sql}:{params}".encode()).hexdigest()
+    timeout = getattr(settings, 'PAGINATION_COUNT_TIMEOUT', COUNT_TIMEOUT)
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+def estimated_count(queryset):
+    count = table_statistics_count(queryset)
+    return cached_count(queryset) if count is None else count
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages are ordered by the view's `pagination_ordering` (default: primary key), whose
+    last column must be unique. `limit` sets the page size, `cursor` the position.
+    The page is returned as a queryset restricted to its primary keys, so that compiled
+    serializers can render it as well.
+    """
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = getattr(view, 'pagination_ordering', self.ordering)
+        queryset = queryset.order_by(*ordering)
+        try:
+            limit = page_size(request.query_params.get(self.limit_query_param))
+        except ValidationError as e:
+            raise DRFValidationError({self.limit_query_param: e.messages})
+        try:
+            pks, self.next_cursor = paginate_keys(queryset, request.query_params.get(self.cursor_query_param), limit)
+        except ValidationError as e:
+            raise NotFound(e.messages[0])
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, 'false').lower() == 'true':
+            self.count = estimated_count(queryset)
+        return queryset.filter(pk__in=pks)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link()}
+        if self.count is not None:
+            payload['estimated_count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        properties = {
+            'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            'estimated_count': {'type': 'integer'},
+            'results': schema,
+        }
+        return {'type': 'object', 'required': ['results'], 'properties': properties}
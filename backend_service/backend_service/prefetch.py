@@ -0,0 +1,68 @@
+"""
+Derives select_related/prefetch_related calls from the serializers that will render a queryset.
+
+A serializer declares the relations its own fields read in its Meta:
+
+    class Meta:
+        select_related = ('hotel__type',)
+        prefetch_related = ('groups',)
+
+Nested serializers are discovered from the serializer fields, so every level of a nested
+payload is loaded with a bounded number of queries regardless of the number of rows.
+Serializers that know exactly which columns they read may also list them in Meta.only.
+"""
+from functools import lru_cache
+from django.db.models import Prefetch
+from rest_framework.serializers import ListSerializer, ModelSerializer
+from .fieldsets import CACHE_SIZE
+
+
+def prefixed(prefix, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f"{prefix}__{lookup.prefetch_through}", queryset=lookup.queryset)
+    return f"{prefix}__{lookup}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def relation_plan(serializer_class):
+    """
+    Returns the (select_related, prefetch_related) lookups needed to render `serializer_class`.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    select = list(getattr(meta, 'select_related', ()))
+    prefetch = list(getattr(meta, 'prefetch_related', ()))
+
+    for field in serializer_class().fields.values():
+        if field.source == '*':
+            continue
+        if isinstance(field, ListSerializer) and isinstance(field.child, ModelSerializer):
+            child_class = type(field.child)
+            inner = plan_queryset(child_class.Meta.model.objects.all(), child_class)
+            prefetch.append(Prefetch(field.source, queryset=inner))
+        elif isinstance(field, ModelSerializer):
+            child_select, child_prefetch = relation_plan(type(field))
+            select.append(field.source)
+            select.extend(prefixed(field.source, lookup) for lookup in child_select)
+            prefetch.extend(prefixed(field.source, lookup) for lookup in child_prefetch)
+
+    return tuple(select), tuple(prefetch)
+
+
+def plan_queryset(queryset, serializer_class):
+    select, prefetch = relation_plan(serializer_class)
+    only = getattr(getattr(serializer_class, 'Meta', None), 'only', None)
+    if only:
+        queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class PrefetchPlanMixin:
+    """
+    Applies the relation plan of the view's serializer to its queryset.
+    """
+    def get_queryset(self):
+        return plan_queryset(super().get_queryset(), self.get_serializer_class())
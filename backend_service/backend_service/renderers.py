@@ -0,0 +1,86 @@
+"""
+Response renderers: JSON through orjson, and MessagePack for internal consumers.
+
+Both produce the same values as DRF's JSONRenderer: datetimes are ISO 8601 strings
+(UTC as 'Z'), Decimals are floats, and anything else goes through DRF's JSONEncoder.
+"""
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+import msgpack
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+encoder = JSONEncoder()
+
+
+def encode_default(value):
+    """
+    Fallback for types orjson/msgpack do not handle natively (Decimal, lazy strings, ...).
+    """
+    return encoder.default(value)
+
+
+def dumps_json(data):
+    content = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+    # Same escaping as DRF, so that the output is also a strict JavaScript subset.
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def dumps_msgpack(data):
+    return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer using orjson. Indented output (browsable API, `; indent=`) is left to DRF.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps_json(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps_msgpack(data)
+
+
+PAYLOAD_RENDERERS = [FastJSONRenderer(), MessagePackRenderer()]
+
+
+def select_renderer(request, renderers=PAYLOAD_RENDERERS):
+    """
+    Content negotiation for plain Django views: the first renderer whose media type
+    the Accept header names explicitly, in header order; otherwise the first renderer.
+    """
+    for accepted in request.accepted_types:
+        if accepted.is_all_types:
+            continue
+        for renderer in renderers:
+            if accepted.match(renderer.media_type):
+                return renderer
+    return renderers[0]
+
+
+def payload_response(request, payload, status=200):
+    """
+    HttpResponse holding `payload` in the format negotiated from the request.
+    """
+    renderer = select_renderer(request)
+    response = HttpResponse(renderer.render(payload), status=status, content_type=renderer.media_type)
+    patch_vary_headers(response, ['Accept'])
+    return response
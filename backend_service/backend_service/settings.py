@@ -79,6 +79,17 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'auth_app.CustomUser'
 
+SEARCH_FULLTEXT = os.getenv('SEARCH_FULLTEXT', 'True') == 'True'
+
+COMPILED_SERIALIZERS = os.getenv('COMPILED_SERIALIZERS', 'True') == 'True'
+
+# Use 'hotels.cache.SharedSearchCache' with OPTIONS {'alias': ...} to share entries between workers.
+SEARCH_CACHE = {
+    'BACKEND': 'hotels.cache.LocMemSearchCache',
+    'TIMEOUT': 300,
+    'OPTIONS': {'max_entries': 1000},
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,8 +109,24 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend_service.renderers.FastJSONRenderer',
+        'backend_service.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'backend_service.pagination.KeysetPagination',
 }
 
+PAGINATION_COUNT_TIMEOUT = 60
+
+BULK_MAX_ITEMS = 500
+
+# Checkout holds: lifetime in seconds and number of unexpired holds per user.
+BOOKING_HOLD_TTL = 600
+BOOKING_MAX_HOLDS = 5
+
+AVAILABILITY_MAX_ROOMS = 500
+
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS').split(',')
 
 CORS_ALLOW_CREDENTIALS = True
@@ -0,0 +1,109 @@
+"""
+Incremental JSON encoding for large list responses.
+"""
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .compiled import compile_serializer
+from .prefetch import plan_queryset
+
+CHUNK_SIZE = 500
+BUFFER_SIZE = 64 * 1024
+
+
+class StreamedList:
+    """
+    A JSON array whose items are produced lazily: `serialize` is called on each
+    element of `iterable` only when the stream reaches it.
+    """
+    def __init__(self, iterable, serialize):
+        self.iterable = iterable
+        self.serialize = serialize
+
+
+def iter_encode(value, encoder):
+    if isinstance(value, StreamedList):
+        yield '['
+        for i, item in enumerate(value.iterable):
+            if i:
+                yield ','
+            yield encoder.encode(value.serialize(item))
+        yield ']'
+    elif isinstance(value, dict):
+        yield '{'
+        for i, (key, item) in enumerate(value.items()):
+            yield (',' if i else '') + encoder.encode(key) + ':'
+            yield from iter_encode(item, encoder)
+        yield '}'
+    else:
+        yield encoder.encode(value)
+
+
+def stream_json(value):
+    """
+    Yields the JSON encoding of `value` in pieces of roughly BUFFER_SIZE characters.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    buffer = []
+    size = 0
+    for piece in iter_encode(value, encoder):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def streaming_json_response(value, status=200):
+    return StreamingHttpResponse(stream_json(value), status=status, content_type='application/json')
+
+
+def streamed_queryset(queryset, serializer, chunk_size=CHUNK_SIZE):
+    """
+    Serializes a queryset row by row, fetching (and prefetching) it in chunks.
+    `serializer` is a many=True serializer; its child is reused for every row.
+    """
+    return StreamedList(queryset.iterator(chunk_size=chunk_size), serializer.child.to_representation)
+
+
+class StreamingListMixin:
+    """
+    Lets list endpoints answer `?stream=true` with a StreamingHttpResponse instead of
+    building the whole serialized list in memory. Otherwise lists are paginated by the
+    view's paginator, and rendered through the compiled form of the serializer when it
+    has one.
+    """
+    stream_chunk_size = CHUNK_SIZE
+
+    def streaming_requested(self):
+        return self.request.query_params.get('stream', 'false').lower() == 'true'
+
+    def list(self, request, *args, **kwargs):
+        return self.serialized_list(self.filter_queryset(self.get_queryset()), self.get_serializer_class())
+
+    def list_response(self, queryset, serializer_class=None):
+        """
+        Response of a custom list action; the serializer's relation plan is applied to `queryset`.
+        """
+        serializer_class = serializer_class or self.get_serializer_class()
+        return self.serialized_list(plan_queryset(queryset, serializer_class), serializer_class)
+
+    def serialized_list(self, queryset, serializer_class):
+        context = self.get_serializer_context()
+        if self.streaming_requested():
+            serializer = serializer_class(many=True, context=context)
+            return streaming_json_response(streamed_queryset(queryset, serializer, self.stream_chunk_size))
+
+        if self.paginator is not None:
+            queryset = self.paginator.paginate_queryset(queryset, self.request, view=self)
+        compiled = compile_serializer(serializer_class)
+        if compiled is not None:
+            data = compiled.serialize(queryset, context)
+        else:
+            data = serializer_class(queryset, many=True, context=context).data
+        if self.paginator is not None:
+            return self.paginator.get_paginated_response(data)
+        return Response(data)
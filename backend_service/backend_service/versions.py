@@ -0,0 +1,114 @@
+"""
+Version counters of API resources and conditional GET.
+
+Signals bump the counters of every resource whose payload a write changes, e.g. saving
+a room bumps "room:<id>", "rooms", "hotel:<hotel id>" and "hotels". A viewset maps its
+actions to the counters its payload depends on:
+
+    version_keys = {
+        'list': ('rooms', 'catalog'),
+        'retrieve': ('room:{pk}', 'catalog'),
+    }
+
+and answers GET requests with a weak ETag derived from them, or with 304 Not Modified
+when it matches If-None-Match, before any query on the main queryset.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+from hotels.models import ResourceVersion
+import hashlib
+
+CATALOG = "catalog"
+
+
+def bump_now(keys, create=True):
+    keys = set(keys)
+    if ResourceVersion.objects.filter(key__in=keys).update(version=F('version') + 1) == len(keys) or not create:
+        return
+    missing = keys - set(ResourceVersion.objects.filter(key__in=keys).values_list('key', flat=True))
+    if missing:
+        try:
+            with transaction.atomic():
+                ResourceVersion.objects.bulk_create([ResourceVersion(key=key, version=1) for key in missing])
+        except IntegrityError:
+            # Created concurrently: the other writer's row already differs from version 0.
+            ResourceVersion.objects.filter(key__in=missing).update(version=F('version') + 1)
+
+
+def bump(*keys, create=True):
+    """
+    Bumps the counters of `keys` once the current transaction commits, so that a version
+    is never newer than the data it describes. With `create=False` missing counters stay
+    at version 0, e.g. for a resource that was just created and never served.
+    """
+    keys = [key for key in keys if key]
+    if keys:
+        transaction.on_commit(lambda: bump_now(keys, create))
+
+
+def versions(keys):
+    current = dict(ResourceVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return [(key, current.get(key, 0)) for key in keys]
+
+
+def make_etag(request, keys):
+    """
+    Weak ETag of a representation: the counters it depends on, the requested URL
+    (fields, format, ...), the negotiated media type and the user.
+    """
+    parts = [f"{key}={version}" for key, version in versions(keys)]
+    parts += [request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), str(request.user.pk)]
+    return 'W/"%s"' % hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def etag_matches(etag, header):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.removeprefix('W/') == opaque for candidate in parse_etags(header))
+
+
+class NotModified(Exception):
+    pass
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / If-None-Match handling to the actions listed in `version_keys`.
+    Key templates are formatted with the URL kwargs and `user` (the requesting user's id).
+    """
+    version_keys = {}
+
+    def resource_keys(self, request):
+        templates = self.version_keys.get(self.action)
+        if templates is None:
+            return None
+        return [template.format(user=request.user.pk, **self.kwargs) for template in templates]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        keys = self.resource_keys(request)
+        if keys is None:
+            return
+        self.etag = make_etag(request, keys)
+        if etag_matches(self.etag, request.headers.get('If-None-Match')):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return HttpResponseNotModified()
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (200, 304):
+            response.headers['ETag'] = etag
+        return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, BookingHold, HotelDailyStats, RoomDailyStats
 
 
 @admin.register(Booking)
@@ -8,3 +8,27 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ('status', 'start_date', 'end_date')
     search_fields = ('user__email', 'room__name')
     ordering = ('-created_at',)
+
+
+@admin.register(BookingHold)
+class BookingHoldAdmin(admin.ModelAdmin):
+    list_display = ('user', 'room', 'start_date', 'end_date', 'expires_at')
+    list_filter = ('expires_at',)
+    search_fields = ('user__email', 'room__name')
+    raw_id_fields = ('user', 'room')
+
+
+@admin.register(RoomDailyStats)
+class RoomDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('room', 'date', 'booked_nights', 'new_bookings', 'cancellations', 'revenue')
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+    raw_id_fields = ('room',)
+
+
+@admin.register(HotelDailyStats)
+class HotelDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('hotel', 'date', 'booked_nights', 'new_bookings', 'cancellations', 'revenue')
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+    raw_id_fields = ('hotel',)
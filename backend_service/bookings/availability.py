@@ -0,0 +1,300 @@
+"""
+Availability calendars: the taken nights of many rooms over a date window.
+
+The stays of active bookings and unexpired holds that overlap the window are read
+with one UNION query, as day offsets from the window start computed by the database
+(no date objects are built), and turned into a rooms x days boolean matrix with
+NumPy: a difference array (+1 on a stay's first night, -1 on its check-out day)
+cumulated along the days. Each room's row is then encoded either as a bitmap
+("base64": one bit per night, set when taken, the window's first night in the most
+significant bit of the first byte) or as run lengths ("rle": alternating free and
+taken nights, starting with free, so a fully free window is [days]).
+
+Nightly prices form a matrix of cents of the same shape: every night starts at the
+room's price_per_night, then the RoomRate ranges overlapping the window are expanded
+into (room, night) coordinates with repeat/arange and written with one assignment.
+Quotes reduce its rows; flexible date searches slide an N-night window over both
+matrices: cumulative sums give every window's taken nights and total price at once,
+and each room keeps its cheapest (or earliest) free window.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import DateField, F, Func, IntegerField, Value
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+from rooms.models import Room, RoomRate
+from .models import Booking, BookingHold, ACTIVE_STATUSES
+import base64
+import math
+import numpy as np
+
+MAX_ROOMS = 500
+# Rooms a flexible stay search prices at most (FLEXIBLE_SEARCH_MAX_ROOMS overrides it).
+FLEXIBLE_MAX_ROOMS = 5000
+ENCODINGS = ('base64', 'rle')
+PICKS = ('cheapest', 'earliest')
+
+
+class DayNumber(Func):
+    """
+    Integer number of a date's day; consecutive days have consecutive numbers.
+    """
+    function = 'TO_DAYS'
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='CAST(julianday(%(expressions)s) AS INTEGER)', **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="(%(expressions)s - DATE '0001-01-01')", **extra_context)
+
+
+def parse_ids(values):
+    """
+    Ids from query values, each a single id or a comma-separated list.
+    """
+    try:
+        return sorted({int(part) for value in values for part in value.split(',') if part.strip()})
+    except ValueError:
+        raise ValidationError("rooms must be a comma-separated list of ids.")
+
+
+def calendar_rooms(room_ids=None, hotel_id=None):
+    """
+    Sorted ids of the existing rooms among `room_ids`, or of the rooms of a hotel.
+    """
+    if not room_ids and hotel_id is None:
+        raise ValidationError("Give rooms or hotel.")
+    limit = getattr(settings, 'AVAILABILITY_MAX_ROOMS', MAX_ROOMS)
+    if room_ids and len(room_ids) > limit:
+        raise ValidationError(f"A calendar holds at most {limit} rooms.")
+    rooms = Room.objects.order_by('id')
+    if room_ids:
+        rooms = rooms.filter(pk__in=room_ids)
+    if hotel_id is not None:
+        try:
+            rooms = rooms.filter(hotel_id=int(hotel_id))
+        except (TypeError, ValueError):
+            raise ValidationError("hotel must be an id.")
+    ids = list(rooms.values_list('id', flat=True)[:limit + 1])
+    if len(ids) > limit:
+        raise ValidationError(f"A calendar holds at most {limit} rooms.")
+    return ids
+
+
+def day_offsets(start):
+    """
+    Annotations of the offsets from `start` of a range's start_date ('first') and
+    end_date ('last').
+    """
+    origin = DayNumber(Value(start, output_field=DateField()))
+    return {'first': DayNumber('start_date') - origin, 'last': DayNumber('end_date') - origin}
+
+
+def room_rows(room_ids, rooms):
+    """
+    Row of each of `rooms` in the sorted `room_ids`, and which of `rooms` are there.
+    """
+    ids = np.asarray(room_ids, dtype=np.int64)
+    index = np.searchsorted(ids, rooms)
+    return index, ids[np.minimum(index, len(ids) - 1)] == rooms
+
+
+def raw_rows(queryset):
+    """
+    Rows of a values_list() queryset as the database returns them: Django's per-row
+    converters would only cost time on plain integers. Columns come in SELECT order
+    (fields, then annotations).
+    """
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def stays(room_ids, start, end):
+    """
+    (room_id, first, last) of the bookings and holds taking nights of [start, end):
+    the offsets of their first night and check-out day from `start`. `room_ids` is a
+    list or a queryset of ids.
+    """
+    overlap = {'room_id__in': room_ids, 'start_date__lt': end, 'end_date__gt': start}
+    bookings = Booking.objects.filter(status__in=ACTIVE_STATUSES, **overlap)
+    holds = BookingHold.objects.filter(expires_at__gt=timezone.now(), **overlap)
+    bookings, holds = (
+        queryset.order_by().annotate(**day_offsets(start)).values_list('room_id', 'first', 'last')
+        for queryset in (bookings, holds)
+    )
+    return raw_rows(bookings.union(holds, all=True))
+
+
+def taken_nights(room_ids, start, end, rooms=None):
+    """
+    len(room_ids) x days boolean matrix of the taken nights; `room_ids` must be sorted.
+    `rooms`, a queryset selecting these ids, replaces the (long) list in the query.
+    """
+    days = (end - start).days
+    rows = stays(room_ids if rooms is None else rooms, start, end)
+    if not rows:
+        return np.zeros((len(room_ids), days), dtype=bool)
+    stay_rooms, first, last = np.array(rows, dtype=np.int64).T
+    # Rooms added to `rooms` since room_ids was read are left out.
+    index, known = room_rows(room_ids, stay_rooms)
+    index, first, last = index[known], first[known], last[known]
+    first = np.clip(first, 0, days)
+    last = np.clip(last, 0, days)
+    # One extra column receives the -1 of stays ending after the window.
+    width = days + 1
+    size = len(room_ids) * width
+    changes = np.bincount(index * width + first, minlength=size) - np.bincount(index * width + last, minlength=size)
+    return changes.reshape(len(room_ids), width).cumsum(axis=1)[:, :days] > 0
+
+
+def encode_bitmap(row):
+    return base64.b64encode(np.packbits(row).tobytes()).decode('ascii')
+
+
+def encode_runs(row):
+    changes = np.flatnonzero(row[1:] != row[:-1]) + 1
+    runs = np.diff(np.concatenate(([0], changes, [len(row)]))).tolist()
+    return [0, *runs] if row[0] else runs
+
+
+def availability_calendar(room_ids, start, end, encoding='base64'):
+    if encoding not in ENCODINGS:
+        raise ValidationError(f"encoding must be one of {', '.join(ENCODINGS)}.")
+    encode = encode_bitmap if encoding == 'base64' else encode_runs
+    taken = taken_nights(room_ids, start, end)
+    return {
+        'start': start,
+        'end': end,
+        'days': (end - start).days,
+        'encoding': encoding,
+        'rooms': {str(room_id): encode(row) for room_id, row in zip(room_ids, taken)},
+    }
+
+
+def cents(prices):
+    return np.array([int(price * 100) for price in prices], dtype=np.int64)
+
+
+def money(amount):
+    """
+    Decimal string of an amount of cents.
+    """
+    return str(Decimal(int(amount)).scaleb(-2))
+
+
+def nightly_prices(room_ids, prices, start, end, rooms=None):
+    """
+    len(room_ids) x days matrix of the nightly prices in cents of the nights of
+    [start, end): the rates of the rooms, else their base `prices`. `room_ids` must be
+    sorted; `rooms` is as for taken_nights().
+    """
+    days = (end - start).days
+    matrix = np.repeat(cents(prices)[:, np.newaxis], days, axis=1)
+    rates = RoomRate.objects.filter(
+        room_id__in=room_ids if rooms is None else rooms, start_date__lt=end, end_date__gt=start
+    ).order_by('id').annotate(
+        **day_offsets(start), cents=Cast(Round(F('price_per_night') * 100), IntegerField())
+    ).values_list('room_id', 'first', 'last', 'cents')
+    rows = raw_rows(rates)
+    if not rows or not room_ids:
+        return matrix
+    rate_rooms, first, last, rate_cents = np.array(rows, dtype=np.int64).T
+    index, known = room_rows(room_ids, rate_rooms)
+    first = np.clip(first, 0, days)[known]
+    last = np.clip(last, 0, days)[known]
+    rate_cents = rate_cents[known]
+    lengths = last - first
+    # Night k of the n-th rate is at position ends[n] - lengths[n] + k of the expansion.
+    ends = np.cumsum(lengths)
+    columns = np.arange(ends[-1] if len(ends) else 0) + np.repeat(first - ends + lengths, lengths)
+    # Rates of a room should not overlap (see RoomRateSerializer); where rates written
+    # around it do, the latest one (highest id, last in the rows) prices the night.
+    latest = np.full(matrix.shape, -1, dtype=np.int64)
+    np.maximum.at(latest, (np.repeat(index[known], lengths), columns), np.repeat(np.arange(len(lengths)), lengths))
+    rated = latest >= 0
+    matrix[rated] = rate_cents[latest[rated]]
+    return matrix
+
+
+def quote_stays(room_ids, start, end):
+    """
+    Price of the stay [start, end) in each of `room_ids` (sorted): total, cheapest and
+    dearest night and nightly breakdown, and whether the stay is free.
+    """
+    prices = dict(Room.objects.filter(pk__in=room_ids).values_list('id', 'price_per_night'))
+    room_ids = [room_id for room_id in room_ids if room_id in prices]
+    quote = {
+        'start': start,
+        'end': end,
+        'nights': (end - start).days,
+        'rooms': {},
+    }
+    if not room_ids:
+        return quote
+    matrix = nightly_prices(room_ids, [prices[room_id] for room_id in room_ids], start, end)
+    free = ~taken_nights(room_ids, start, end).any(axis=1)
+    columns = zip(
+        room_ids, free.tolist(), matrix.sum(axis=1).tolist(), matrix.min(axis=1).tolist(),
+        matrix.max(axis=1).tolist(), matrix.tolist(),
+    )
+    for room_id, available, total, lowest, highest, nightly in columns:
+        quote['rooms'][str(room_id)] = {
+            'available': available,
+            'total_price': money(total),
+            'min_price': money(lowest),
+            'max_price': money(highest),
+            'nightly_prices': [money(price) for price in nightly],
+        }
+    return quote
+
+
+def window_sums(matrix, nights):
+    """
+    Sums of `matrix` over every run of `nights` consecutive days (columns).
+    """
+    sums = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=np.int64)
+    np.cumsum(matrix, axis=1, dtype=np.int64, out=sums[:, 1:])
+    return sums[:, nights:] - sums[:, :-nights]
+
+
+def stay_windows(room_ids, prices, start, end, nights, pick='cheapest', total_min=None, total_max=None, rooms=None):
+    """
+    {room_id: stay} of the rooms with a free stay of `nights` nights within [start, end)
+    whose total price is within [total_min, total_max]; the stay is the cheapest such
+    stay of the room (the earliest among equals), or the earliest one. `prices` are the
+    rooms' base prices; `room_ids` must be sorted; `rooms` is as for taken_nights().
+    """
+    if pick not in PICKS:
+        raise ValidationError(f"flexible must be one of {', '.join(PICKS)}.")
+    if nights > (end - start).days:
+        raise ValidationError("The stay is longer than the date range.")
+    if not room_ids:
+        return {}
+    free = window_sums(taken_nights(room_ids, start, end, rooms), nights) == 0
+    totals = window_sums(nightly_prices(room_ids, prices, start, end, rooms), nights)
+    if total_min is not None:
+        free &= totals >= math.ceil(total_min * 100)
+    if total_max is not None:
+        free &= totals <= math.floor(total_max * 100)
+    if pick == 'cheapest':
+        first = np.where(free, totals, np.iinfo(np.int64).max).argmin(axis=1)
+    else:
+        first = free.argmax(axis=1)
+    rows = np.arange(len(room_ids))
+    found = np.flatnonzero(free[rows, first])
+    stays = {}
+    for row, day, total in zip(found.tolist(), first[found].tolist(), totals[found, first[found]].tolist()):
+        check_in = start + timedelta(days=day)
+        stays[room_ids[row]] = {
+            'start_date': check_in.isoformat(),
+            'end_date': (check_in + timedelta(days=nights)).isoformat(),
+            'nights': nights,
+            'total_price': money(total),
+        }
+    return stays
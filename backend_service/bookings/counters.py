@@ -0,0 +1,131 @@
+"""
+Write-behind total_bookings counters of Profile and Room.
+
+Inserting or deleting a booking appends a BookingCounterDelta row: one INSERT, and no
+lock on the profile and room rows, which are hot for popular rooms. fold_counters()
+sums the pending deltas and applies them with one F() UPDATE per distinct sum, then
+refreshes what shows the counters (room search documents, cached searches, versions);
+counters lag behind bookings until the next fold. reconcile_counters() recomputes
+them from Booking.
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, F
+from backend_service.versions import bump
+from hotels.cache import invalidate_rooms
+from profiles.models import Profile
+from rooms.models import Room, RoomSearchDocument
+from .models import Booking, BookingCounterDelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def record_booking(booking, delta):
+    BookingCounterDelta.objects.create(user_id=booking.user_id, room_id=booking.room_id, delta=delta)
+
+
+def update_totals(model, key, values, absolute=False):
+    """
+    Adds (or sets, if `absolute`) {key value: value} to total_bookings, with one UPDATE
+    per distinct value.
+    """
+    groups = defaultdict(list)
+    for pk, value in values.items():
+        if value or absolute:
+            groups[value].append(pk)
+    for value, ids in groups.items():
+        model.objects.filter(**{f"{key}__in": ids}).update(
+            total_bookings=value if absolute else F('total_bookings') + value
+        )
+
+
+def apply_totals(users, rooms, absolute=False):
+    """
+    Writes the counters of `users` and `rooms` ({id: value}) and refreshes their dependents.
+    """
+    if not absolute:
+        users = {pk: value for pk, value in users.items() if value}
+        rooms = {pk: value for pk, value in rooms.items() if value}
+    update_totals(Profile, 'user_id', users, absolute)
+    update_totals(Room, 'pk', rooms, absolute)
+    update_totals(RoomSearchDocument, 'pk', rooms, absolute)
+
+    keys = []
+    room_hotels = dict(Room.objects.filter(pk__in=rooms).values_list('pk', 'hotel_id'))
+    if room_hotels:
+        invalidate_rooms(*room_hotels)
+        keys += [f"room:{pk}" for pk in room_hotels] + ["rooms", "hotels"]
+        keys += [f"hotel:{pk}" for pk in set(room_hotels.values())]
+    for pk, user_id in Profile.objects.filter(user_id__in=users).values_list('pk', 'user_id'):
+        keys += [f"profile:{pk}", f"profile:user:{user_id}", "profiles"]
+    bump(*dict.fromkeys(keys))
+
+
+def sum_deltas(deltas):
+    users, rooms = defaultdict(int), defaultdict(int)
+    for user_id, room_id, delta in deltas:
+        users[user_id] += delta
+        rooms[room_id] += delta
+    return users, rooms
+
+
+def fold_counters(batch_size=10000):
+    """
+    Folds the pending deltas into the counters, one transaction per batch. Returns the
+    number of deltas folded.
+    """
+    folded = 0
+    while True:
+        with transaction.atomic():
+            # A concurrent fold waits for these rows, then no longer finds them.
+            rows = list(
+                BookingCounterDelta.objects.select_for_update().order_by('id')
+                .values_list('id', 'user_id', 'room_id', 'delta')[:batch_size]
+            )
+            if not rows:
+                break
+            BookingCounterDelta.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            apply_totals(*sum_deltas(row[1:] for row in rows))
+        folded += len(rows)
+        if len(rows) < batch_size:
+            break
+    if folded:
+        logger.info(f"Booking counters folded: {folded} deltas")
+    return folded
+
+
+def reconcile_counters(dry_run=False):
+    """
+    Sets every counter to its number of bookings and drops the pending deltas, in one
+    transaction. The locking read of BookingCounterDelta takes next-key locks over the
+    whole table, so no booking can commit its delta until this transaction ends: the
+    counts, read after it, cover exactly the dropped or already folded deltas, and the
+    deltas committed later are folded without double counting. That read must stay a
+    locking one; a plain read would let bookings commit in between.
+    Returns the number of pending deltas, of counters that differ from their count and
+    of those that pending deltas would not have fixed (drifted).
+    """
+    with transaction.atomic():
+        pending = list(BookingCounterDelta.objects.select_for_update().values_list('id', 'user_id', 'room_id', 'delta'))
+        pending_users, pending_rooms = sum_deltas(row[1:] for row in pending)
+        counts = Booking.objects.order_by()
+        user_counts = dict(counts.values('user_id').annotate(n=Count('id')).values_list('user_id', 'n'))
+        room_counts = dict(counts.values('room_id').annotate(n=Count('id')).values_list('room_id', 'n'))
+        tables = (
+            ('profiles', dict(Profile.objects.values_list('user_id', 'total_bookings')), pending_users, user_counts),
+            ('rooms', dict(Room.objects.values_list('pk', 'total_bookings')), pending_rooms, room_counts),
+            ('documents', dict(RoomSearchDocument.objects.values_list('pk', 'total_bookings')), pending_rooms,
+             room_counts),
+        )
+        results = {'pending': len(pending)}
+        changes = {}
+        for name, stored, deltas, expected in tables:
+            changes[name] = {pk: expected.get(pk, 0) for pk, total in stored.items() if total != expected.get(pk, 0)}
+            drifted = sum(1 for pk, total in stored.items() if total + deltas.get(pk, 0) != expected.get(pk, 0))
+            results[name] = (len(changes[name]), drifted)
+        if not dry_run:
+            BookingCounterDelta.objects.filter(pk__in=[row[0] for row in pending]).delete()
+            apply_totals(changes['profiles'], {**changes['documents'], **changes['rooms']}, absolute=True)
+    logger.info(f"Booking counters reconciled (dry run: {dry_run}): {results}")
+    return results
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Booking, RoomNight, ACTIVE_STATUSES
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def as_date(value):
+    if isinstance(value, str):
+        return parse_date(value)
+    return value
+
+
+def nights_between(start_date, end_date):
+    """
+    Yields every night of a stay, check-out day excluded.
+    """
+    day = as_date(start_date)
+    end_date = as_date(end_date)
+    while day < end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def build_nights(booking):
+    if booking.status not in ACTIVE_STATUSES:
+        return []
+    return [
+        RoomNight(room_id=booking.room_id, booking_id=booking.id, date=day)
+        for day in nights_between(booking.start_date, booking.end_date)
+    ]
+
+
+def sync_booking(booking, created=False):
+    """
+    Replaces the inventory rows of a single booking (`created`: a new booking has none
+    to replace). Raises IntegrityError when another booking holds one of its nights
+    (see bookings.reservations).
+    """
+    if created:
+        RoomNight.objects.bulk_create(build_nights(booking))
+        return
+    with transaction.atomic():
+        RoomNight.objects.filter(booking_id=booking.id).delete()
+        RoomNight.objects.bulk_create(build_nights(booking))
+
+
+def live_nights():
+    """
+    Room nights claimed by bookings and by the holds that have not expired yet.
+    """
+    return RoomNight.objects.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+
+
+def booked_room_ids(start_date, end_date):
+    """
+    Ids of rooms that have at least one booked or held night in [start_date, end_date).
+    """
+    return live_nights().filter(
+        date__gte=start_date,
+        date__lt=end_date
+    ).values('room_id')
+
+
+def rebuild_inventory(batch_size=1000):
+    """
+    Drops the booking nights and rebuilds them from Booking rows. Nights claimed by
+    two overlapping bookings, or by a hold, go to the first claim.
+    """
+    with transaction.atomic():
+        RoomNight.objects.filter(hold__isnull=True).delete()
+        batch = []
+        bookings = Booking.objects.filter(status__in=ACTIVE_STATUSES).only(
+            'id', 'room_id', 'start_date', 'end_date', 'status'
+        ).order_by('id')
+        for booking in bookings.iterator(chunk_size=batch_size):
+            batch.extend(build_nights(booking))
+            if len(batch) >= batch_size:
+                RoomNight.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        RoomNight.objects.bulk_create(batch, ignore_conflicts=True)
+        created = RoomNight.objects.filter(hold__isnull=True).count()
+    logger.info(f"Room-night inventory rebuilt: {created} nights")
+    return created
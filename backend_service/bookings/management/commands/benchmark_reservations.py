@@ -0,0 +1,136 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.db.models import Count, Max
+from django.utils import timezone
+from bookings.models import Booking, RoomNight
+from bookings.reservations import RoomUnavailable, double_bookings, reserve
+from rooms.models import Room
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests reservations: concurrent workers book random, overlapping stays of one "
+        "popular room. Reports throughput, latency and double bookings (which must be zero)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, help="Room id; defaults to the room with the most bookings.")
+        parser.add_argument('--user', help="Email of the booking user; defaults to the first user.")
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=400, help="Reservation attempts of all workers.")
+        parser.add_argument('--days', type=int, default=60, help="Days over which stays are spread.")
+        parser.add_argument('--max-nights', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Report path; the report goes to stdout otherwise.")
+        parser.add_argument('--keep', action='store_true', help="Keep the bookings made by the test.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['attempts'] < 2:
+            raise CommandError("--workers must be positive and --attempts at least 2.")
+        room = self.get_room(options['room'])
+        user = self.get_user(options['user'])
+        last = Booking.objects.filter(room=room).aggregate(last=Max('end_date'))['last']
+        first_day = max(last or timezone.localdate(), timezone.localdate()) + timedelta(days=1)
+
+        attempts = itertools.count()
+        outcomes, created, failures = [], [], []
+
+        def worker(n):
+            rng = random.Random(options['seed'] * 1000 + n)
+            try:
+                while next(attempts) < options['attempts']:
+                    start = first_day + timedelta(days=rng.randrange(options['days']))
+                    end = start + timedelta(days=rng.randint(1, options['max_nights']))
+                    started = time.perf_counter()
+                    try:
+                        created.append(reserve(user, room, start, end).pk)
+                        outcome = 'reserved'
+                    except RoomUnavailable:
+                        outcome = 'conflict'
+                    except DatabaseError as e:
+                        outcome = 'error'
+                        failures.append(str(e))
+                    outcomes.append((outcome, time.perf_counter() - started))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        doubled = double_bookings(Booking.objects.filter(pk__in=created)).count()
+        doubled_nights = RoomNight.objects.filter(room=room).values('date') \
+            .annotate(claims=Count('id')).filter(claims__gt=1).count()
+        report = self.report(options, room, outcomes, elapsed, doubled + doubled_nights)
+        if not options['keep']:
+            Booking.objects.filter(pk__in=created).delete()
+
+        content = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(content + "\n")
+        else:
+            self.stdout.write(content)
+        for failure in sorted(set(failures))[:5]:
+            self.stderr.write(f"Error: {failure}")
+        self.stderr.write(
+            f"{report['attempts']:,} attempts by {report['workers']} workers in {elapsed:.1f} s: "
+            f"{report['reserved']:,} reserved, {report['conflicts']:,} conflicts, {report['errors']:,} errors; "
+            f"{report['attempts_per_second']:,.0f} attempts/s, {report['reservations_per_second']:,.0f} reservations/s, "
+            f"p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms."
+        )
+        if report['double_bookings']:
+            raise CommandError(f"{report['double_bookings']} double bookings.")
+        self.stderr.write(self.style.SUCCESS("No double bookings."))
+
+    def get_room(self, pk):
+        if pk is not None:
+            room = Room.objects.filter(pk=pk).first()
+        else:
+            room = Room.objects.annotate(n=Count('bookings')).order_by('-n', 'id').first()
+        if room is None:
+            raise CommandError("Room not found.")
+        return room
+
+    def get_user(self, email):
+        users = get_user_model().objects.order_by('id')
+        user = users.filter(email=email).first() if email else users.first()
+        if user is None:
+            raise CommandError("User not found.")
+        return user
+
+    def report(self, options, room, outcomes, elapsed, doubled):
+        timings = [duration * 1000 for _, duration in outcomes]
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+        counts = {outcome: sum(1 for o, _ in outcomes if o == outcome) for outcome in ('reserved', 'conflict', 'error')}
+        return {
+            'database': connection.vendor,
+            'room': room.pk,
+            'workers': options['workers'],
+            'days': options['days'],
+            'max_nights': options['max_nights'],
+            'attempts': len(outcomes),
+            'reserved': counts['reserved'],
+            'conflicts': counts['conflict'],
+            'errors': counts['error'],
+            'elapsed_s': round(elapsed, 3),
+            'attempts_per_second': round(len(outcomes) / elapsed, 1),
+            'reservations_per_second': round(counts['reserved'] / elapsed, 1),
+            'p50_ms': round(cuts[49], 3),
+            'p95_ms': round(cuts[94], 3),
+            'p99_ms': round(cuts[98], 3),
+            'max_ms': round(max(timings), 3),
+            'double_bookings': doubled,
+        }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from bookings.counters import fold_counters
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Folds the pending booking counter deltas into Profile and Room total_bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--interval', type=float,
+                            help="Keep folding every INTERVAL seconds instead of once.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                folded = fold_counters(batch_size=options['batch_size'])
+            except DatabaseError:
+                if not options['interval']:
+                    raise
+                logger.exception(f"Folding booking counters failed; retrying in {options['interval']} seconds")
+                time.sleep(options['interval'])
+                continue
+            if options['verbosity'] >= 1:
+                self.stdout.write(f"Folded {folded} counter deltas.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
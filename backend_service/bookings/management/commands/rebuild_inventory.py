@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from bookings.inventory import rebuild_inventory
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the room-night availability inventory from existing bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = rebuild_inventory(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Inventory rebuilt: {created} room nights."))
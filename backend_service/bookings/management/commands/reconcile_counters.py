@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from bookings.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes the total_bookings counters of profiles and rooms from bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the counters that differ.")
+
+    def handle(self, *args, **options):
+        results = reconcile_counters(dry_run=options['dry_run'])
+        verb = "would be" if options['dry_run'] else "were"
+        self.stdout.write(f"{results.pop('pending')} pending deltas {verb} dropped.")
+        for table, (changed, drifted) in results.items():
+            self.stdout.write(f"{table}: {changed} counters {verb} corrected; {drifted} had drifted beyond their pending deltas.")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS("Booking counters reconciled."))
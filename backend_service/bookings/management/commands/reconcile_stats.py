@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from bookings.rollups import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = "Back-fills the daily room and hotel booking statistics from bookings and repairs drifted rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only report the rows that differ.")
+
+    def handle(self, *args, **options):
+        results = reconcile_stats(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        verb = "would be" if options['dry_run'] else "were"
+        for table, (created, updated, deleted) in results.items():
+            self.stdout.write(f"{table}: {created} rows {verb} created, {updated} updated, {deleted} deleted.")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS("Daily statistics reconciled."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from bookings.reservations import sweep_holds
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deletes expired checkout holds and the room nights they claimed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=float,
+                            help="Keep sweeping every INTERVAL seconds instead of once.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                swept = sweep_holds(batch_size=options['batch_size'])
+            except DatabaseError:
+                if not options['interval']:
+                    raise
+                logger.exception(f"Sweeping expired holds failed; retrying in {options['interval']} seconds")
+                time.sleep(options['interval'])
+                continue
+            if options['verbosity'] >= 1:
+                self.stdout.write(f"Swept {swept} expired holds.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
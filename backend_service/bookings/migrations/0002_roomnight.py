@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:33
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_room_nights(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    nights = []
+    for booking in Booking.objects.filter(status__in=['active', 'confirmed']).iterator():
+        day = booking.start_date
+        while day < booking.end_date:
+            nights.append(RoomNight(room_id=booking.room_id, booking_id=booking.id, date=day))
+            day += datetime.timedelta(days=1)
+    RoomNight.objects.bulk_create(nights, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('rooms', '0002_alter_room_total_bookings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='bookings.booking', verbose_name='Booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='rooms.room', verbose_name='Room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'room'], name='bookings_night_date_room_idx')],
+            },
+        ),
+        migrations.RunPython(fill_room_nights, migrations.RunPython.noop),
+    ]
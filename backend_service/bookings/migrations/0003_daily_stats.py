@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_roomnight'),
+        ('hotels', '0003_resourceversion'),
+        ('rooms', '0004_roomsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotelDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_nights', models.IntegerField(default=0)),
+                ('new_bookings', models.IntegerField(default=0)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='hotels.hotel', verbose_name='Hotel')),
+            ],
+            options={
+                'verbose_name_plural': 'hotel daily stats',
+                'indexes': [models.Index(fields=['date'], name='bookings_hotelstats_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date'), name='bookings_hotelstats_hotel_date_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_nights', models.IntegerField(default=0)),
+                ('new_bookings', models.IntegerField(default=0)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='rooms.room', verbose_name='Room')),
+            ],
+            options={
+                'verbose_name_plural': 'room daily stats',
+                'indexes': [models.Index(fields=['date'], name='bookings_roomstats_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='bookings_roomstats_room_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:26
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_double_claims(apps, schema_editor):
+    # Overlapping bookings could be created before nights were claimed: the earliest
+    # booking keeps each night.
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    duplicates = RoomNight.objects.values('room_id', 'date') \
+        .annotate(claims=Count('id'), first=Min('booking_id')).filter(claims__gt=1)
+    for night in list(duplicates):
+        RoomNight.objects.filter(room_id=night['room_id'], date=night['date']) \
+            .exclude(booking_id=night['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_daily_stats'),
+        ('rooms', '0005_room_external_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_double_claims, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='bookings_night_room_date_uniq'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_roomnight_unique_claim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingCounterDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('room_id', models.BigIntegerField()),
+                ('delta', models.SmallIntegerField()),
+            ],
+        ),
+    ]
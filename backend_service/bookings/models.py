@@ -1,7 +1,11 @@
 from django.conf import settings
 from django.db import models
+from hotels.models import Hotel
 from rooms.models import Room
 
+ACTIVE_STATUSES = ("active", "confirmed")
+CANCELLED_STATUSES = ("cancelled", "rejected")
+
 
 class Booking(models.Model):
     user = models.ForeignKey(
@@ -27,3 +31,146 @@ class Booking(models.Model):
 
     def __str__(self):
         return f"Booking by {self.user} for room {self.room} from {self.start_date} to {self.end_date}"
+
+
+class BookingHold(models.Model):
+    """
+    Short reservation of a room's nights during checkout. Its nights are claimed
+    like a booking's until it expires, is released or becomes a booking (see
+    bookings.reservations).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_holds",
+        verbose_name="User"
+    )
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name="holds",
+        verbose_name="Room"
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Hold by {self.user} for room {self.room} from {self.start_date} to {self.end_date}"
+
+
+class RoomNight(models.Model):
+    """
+    One claimed night of a room, by a booking in an active status or by a hold until
+    `expires_at`. Booking nights are kept in sync with Booking by signals (see
+    bookings.inventory). A room night is claimed once at most (see bookings.reservations).
+    """
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name="nights",
+        verbose_name="Room"
+    )
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        related_name="nights",
+        verbose_name="Booking",
+        null=True,
+        blank=True
+    )
+    hold = models.ForeignKey(
+        BookingHold,
+        on_delete=models.CASCADE,
+        related_name="nights",
+        verbose_name="Hold",
+        null=True,
+        blank=True
+    )
+    expires_at = models.DateTimeField(null=True, blank=True)
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='bookings_night_room_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'room'], name='bookings_night_date_room_idx'),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room_id} booked on {self.date}"
+
+
+class BookingCounterDelta(models.Model):
+    """
+    Pending change of the total_bookings counters of a profile and a room, appended
+    on every booking insert and delete and folded into the counters later (see
+    bookings.counters). Plain ids rather than foreign keys: deltas of deleted users
+    and rooms are simply dropped by the next fold.
+    """
+    user_id = models.BigIntegerField()
+    room_id = models.BigIntegerField()
+    delta = models.SmallIntegerField()
+
+    def __str__(self):
+        return f"{self.delta:+d} booking for user {self.user_id} and room {self.room_id}"
+
+
+class DailyStats(models.Model):
+    """
+    Booking statistics of one day: nights booked on that day and their revenue,
+    bookings created on that day, and bookings cancelled or rejected on that day.
+    Maintained by signals (see bookings.rollups).
+    """
+    date = models.DateField()
+    booked_nights = models.IntegerField(default=0)
+    new_bookings = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class RoomDailyStats(DailyStats):
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        verbose_name="Room"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='bookings_roomstats_room_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='bookings_roomstats_date_idx'),
+        ]
+        verbose_name_plural = "room daily stats"
+
+    def __str__(self):
+        return f"Room {self.room_id} on {self.date}"
+
+
+class HotelDailyStats(DailyStats):
+    hotel = models.ForeignKey(
+        Hotel,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        verbose_name="Hotel"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date'], name='bookings_hotelstats_hotel_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='bookings_hotelstats_date_idx'),
+        ]
+        verbose_name_plural = "hotel daily stats"
+
+    def __str__(self):
+        return f"Hotel {self.hotel_id} on {self.date}"
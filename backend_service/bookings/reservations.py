@@ -0,0 +1,182 @@
+"""
+Race-free booking reservations.
+
+Every night of an active booking is claimed by a RoomNight row, unique per room and
+date, so the database rejects a second claim on a night whoever the writer is.
+save_booking() runs the availability check and the write in one short transaction
+holding a lock on the room row: concurrent reservations of a room queue behind the
+lock instead of racing (and deadlocking) on the unique index, and a claim lost to a
+writer that bypassed the lock still ends as RoomUnavailable, never as a double booking.
+
+Holds claim the nights of a stay the same way for BOOKING_HOLD_TTL seconds while a
+guest checks out; the hold is then passed to save_booking(), which swaps its claims
+for the booking's in the same transaction. The nights of expired holds no longer
+count as claimed: they are freed when the room is next locked, and sweep_holds()
+deletes expired holds in bulk.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from hotels.cache import invalidate_cities, invalidate_rooms
+from rooms.models import Room
+from .inventory import live_nights, nights_between
+from .models import Booking, BookingHold, RoomNight, ACTIVE_STATUSES
+
+HOLD_TTL = 600
+MAX_HOLDS = 5
+
+
+class RoomUnavailable(Exception):
+    def __init__(self, room_id):
+        super().__init__("This room is already booked for the selected dates.")
+        self.room_id = room_id
+
+
+class HoldLimitReached(Exception):
+    def __init__(self, limit):
+        super().__init__(f"You can hold at most {limit} rooms at a time.")
+        self.limit = limit
+
+
+def claimed_nights(room_id, start_date, end_date, exclude=None, hold=None):
+    """
+    Nights of [start_date, end_date) of a room claimed by bookings other than `exclude`
+    and by unexpired holds other than `hold` (pks).
+    """
+    nights = live_nights().filter(room_id=room_id, date__gte=start_date, date__lt=end_date)
+    if exclude is not None:
+        nights = nights.exclude(booking_id=exclude)
+    if hold is not None:
+        nights = nights.exclude(hold_id=hold)
+    return nights
+
+
+def lock_room(room_id, start_date, end_date):
+    """
+    Locks the room until commit, so that reservations of a room run one at a time, and
+    frees the nights of its expired holds in [start_date, end_date), which would
+    otherwise still hold the unique index.
+    """
+    list(Room.objects.select_for_update().filter(pk=room_id).values_list('pk', flat=True))
+    RoomNight.objects.filter(
+        room_id=room_id, date__gte=start_date, date__lt=end_date, expires_at__lte=timezone.now()
+    ).delete()
+
+
+def save_booking(booking, hold=None):
+    """
+    Saves a new or changed booking, or raises RoomUnavailable if it is active and one
+    of its nights is claimed by another booking or hold. `hold` (a BookingHold) is
+    released in the same transaction.
+    """
+    adding = booking._state.adding
+    hold_id = hold.pk if hold is not None else None
+    with transaction.atomic():
+        if booking.status in ACTIVE_STATUSES:
+            lock_room(booking.room_id, booking.start_date, booking.end_date)
+            if claimed_nights(booking.room_id, booking.start_date, booking.end_date, booking.pk, hold_id).exists():
+                raise RoomUnavailable(booking.room_id)
+        if hold is not None:
+            hold.delete()
+        try:
+            with transaction.atomic():
+                booking.save()
+        except IntegrityError:
+            if adding:
+                booking.pk = None
+                booking._state.adding = True
+            if claimed_nights(booking.room_id, booking.start_date, booking.end_date, booking.pk).exists():
+                raise RoomUnavailable(booking.room_id) from None
+            raise
+    return booking
+
+
+def reserve(user, room, start_date, end_date, status="active"):
+    return save_booking(Booking(user=user, room=room, start_date=start_date, end_date=end_date, status=status))
+
+
+def change(booking, **fields):
+    for name, value in fields.items():
+        setattr(booking, name, value)
+    return save_booking(booking)
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, 'BOOKING_HOLD_TTL', HOLD_TTL))
+
+
+def place_hold(user, room, start_date, end_date):
+    """
+    Claims the nights of a stay for the hold TTL, or raises RoomUnavailable or HoldLimitReached.
+    """
+    limit = getattr(settings, 'BOOKING_MAX_HOLDS', MAX_HOLDS)
+    with transaction.atomic():
+        # Holds of a user are placed one at a time, so concurrent requests can't all pass
+        # the limit. The user row is locked rather than the holds, which may not exist yet.
+        list(get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+        now = timezone.now()
+        if BookingHold.objects.filter(user=user, expires_at__gt=now).count() >= limit:
+            raise HoldLimitReached(limit)
+        lock_room(room.pk, start_date, end_date)
+        if claimed_nights(room.pk, start_date, end_date).exists():
+            raise RoomUnavailable(room.pk)
+        hold = BookingHold.objects.create(
+            user=user, room=room, start_date=start_date, end_date=end_date, expires_at=now + hold_ttl()
+        )
+        try:
+            with transaction.atomic():
+                RoomNight.objects.bulk_create([
+                    RoomNight(room_id=room.pk, hold=hold, date=day, expires_at=hold.expires_at)
+                    for day in nights_between(start_date, end_date)
+                ])
+        except IntegrityError:
+            raise RoomUnavailable(room.pk) from None
+        invalidate_cities(room.hotel.city)
+    return hold
+
+
+def release_hold(hold):
+    with transaction.atomic():
+        if hold.expires_at > timezone.now():
+            invalidate_cities(hold.room.hotel.city)
+        hold.delete()
+
+
+def sweep_holds(batch_size=1000):
+    """
+    Deletes expired holds and their nights, one transaction per batch, and drops the
+    cached searches that left their rooms out. Returns the number of holds deleted.
+    """
+    now = timezone.now()
+    swept = 0
+    while True:
+        rows = list(BookingHold.objects.filter(expires_at__lte=now).values_list(
+            'id', 'room_id', 'room__hotel__city'
+        ).order_by('id')[:batch_size])
+        if not rows:
+            break
+        ids, rooms, cities = zip(*rows)
+        with transaction.atomic():
+            BookingHold.objects.filter(pk__in=ids).delete()
+            invalidate_rooms(*set(rooms))
+            invalidate_cities(*set(cities))
+        swept += len(ids)
+    return swept
+
+
+def double_bookings(bookings=None):
+    """
+    Active bookings overlapping another active booking of their room; always empty
+    unless bookings were written around the inventory.
+    """
+    bookings = Booking.objects.all() if bookings is None else bookings
+    others = Booking.objects.filter(
+        room_id=OuterRef('room_id'),
+        status__in=ACTIVE_STATUSES,
+        start_date__lt=OuterRef('end_date'),
+        end_date__gt=OuterRef('start_date'),
+    ).exclude(pk=OuterRef('pk'))
+    return bookings.filter(status__in=ACTIVE_STATUSES).filter(Exists(others))
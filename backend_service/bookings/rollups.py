@@ -0,0 +1,262 @@
+"""
+Per-room and per-hotel daily booking statistics (RoomDailyStats, HotelDailyStats).
+
+A booking contributes to the days of its stay (booked nights and their revenue, while
+its status is active), to the day it was created (new bookings) and, once cancelled or
+rejected, to the day of its last update (cancellations). Every write applies the
+difference between the booking's previous and current contributions with F()
+increments after the transaction commits; `reconcile_stats` rebuilds the tables from
+Booking with the same rules. Revenue prices every night through the room's rate
+calendar (RoomRate, the latest rate winning where rates overlap, else the room's
+price_per_night) when the change is recorded, so price and rate changes are only
+reflected in past days after a reconcile.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from hotels.models import Hotel
+from rooms.models import Room, RoomRate
+from .inventory import as_date, nights_between
+from .models import Booking, HotelDailyStats, RoomDailyStats, ACTIVE_STATUSES, CANCELLED_STATUSES
+import logging
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('booked_nights', 'new_bookings', 'cancellations', 'revenue')
+
+BOOKING_FIELDS = ('status', 'start_date', 'end_date', 'created_at', 'updated_at')
+ROOM_FIELDS = ('room_id', 'room__hotel_id', 'room__price_per_night')
+
+
+def zero():
+    return [0, 0, 0, Decimal('0.00')]
+
+
+def day_of(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def room_rates(room_ids=None, start_date=None, end_date=None):
+    """
+    {room_id: [(start_date, end_date, price), ...]} of the rates of `room_ids` (all rooms
+    if None) overlapping [start_date, end_date) if given, latest rate last.
+    """
+    rates = RoomRate.objects.order_by('id')
+    if room_ids is not None:
+        rates = rates.filter(room_id__in=room_ids)
+    if start_date is not None:
+        rates = rates.filter(start_date__lt=end_date, end_date__gt=start_date)
+    calendar = defaultdict(list)
+    for room_id, *rate in rates.values_list('room_id', 'start_date', 'end_date', 'price_per_night').iterator():
+        calendar[room_id].append(tuple(rate))
+    return calendar
+
+
+def night_price(rates, day, price):
+    """
+    Price of the night `day` given the room's `rates` (latest last) and base `price`.
+    """
+    for start_date, end_date, rate in rates:
+        if start_date <= day < end_date:
+            price = rate
+    return price
+
+
+def add_contribution(days, booking, price, rates=()):
+    """
+    Adds the statistics of `booking` (a Booking or a dict of BOOKING_FIELDS) to `days`,
+    a {date: [booked_nights, new_bookings, cancellations, revenue]} mapping. Nights are
+    priced with the room's `rates` (see room_rates()), else its base `price`.
+    """
+    get = booking.get if isinstance(booking, dict) else lambda name: getattr(booking, name)
+    if get('status') in ACTIVE_STATUSES:
+        for day in nights_between(get('start_date'), get('end_date')):
+            days[day][0] += 1
+            days[day][3] += night_price(rates, day, price)
+    if get('created_at'):
+        days[day_of(get('created_at'))][1] += 1
+    if get('status') in CANCELLED_STATUSES and get('updated_at'):
+        days[day_of(get('updated_at'))][2] += 1
+    return days
+
+
+class Contribution:
+    """
+    Statistics of one booking state, attributed to its room and hotel.
+    """
+    def __init__(self, room_id, hotel_id, price, booking):
+        self.room_id = room_id
+        self.hotel_id = hotel_id
+        self.price = price
+        get = booking.get if isinstance(booking, dict) else lambda name: getattr(booking, name)
+        rates = ()
+        if get('status') in ACTIVE_STATUSES:
+            rates = room_rates([room_id], as_date(get('start_date')), as_date(get('end_date')))[room_id]
+        self.days = add_contribution(defaultdict(zero), booking, price, rates)
+
+    @classmethod
+    def stored(cls, pk):
+        """
+        Contribution of the booking as it is stored in the database, or None.
+        """
+        row = Booking.objects.filter(pk=pk).values(*ROOM_FIELDS, *BOOKING_FIELDS).first()
+        if row is None:
+            return None
+        return cls(row['room_id'], row['room__hotel_id'], row['room__price_per_night'], row)
+
+    @classmethod
+    def of(cls, booking, previous=None):
+        if previous is not None and previous.room_id == booking.room_id:
+            room = {'hotel_id': previous.hotel_id, 'price_per_night': previous.price}
+        elif Booking.room.is_cached(booking):
+            room = {'hotel_id': booking.room.hotel_id, 'price_per_night': Decimal(booking.room.price_per_night)}
+        else:
+            room = Room.objects.filter(pk=booking.room_id).values('hotel_id', 'price_per_night').first()
+            if room is None:
+                return None
+        return cls(booking.room_id, room['hotel_id'], room['price_per_night'], booking)
+
+
+def difference(previous, current):
+    """
+    {(model, owner field, owner id): {date: delta}} turning `previous` into `current`.
+    """
+    deltas = defaultdict(lambda: defaultdict(zero))
+    for contribution, sign in ((previous, -1), (current, 1)):
+        if contribution is None:
+            continue
+        owners = (
+            (RoomDailyStats, 'room_id', contribution.room_id),
+            (HotelDailyStats, 'hotel_id', contribution.hotel_id),
+        )
+        for owner in owners:
+            for day, values in contribution.days.items():
+                delta = deltas[owner][day]
+                for i, value in enumerate(values):
+                    delta[i] += sign * value
+    return {
+        owner: {day: delta for day, delta in days.items() if any(delta)}
+        for owner, days in deltas.items()
+    }
+
+
+def apply_delta(model, owner_field, owner_id, days):
+    """
+    Adds `days` ({date: delta}) to the rows of one room or hotel: one INSERT IGNORE for
+    missing rows, then one UPDATE per distinct delta (all nights of a stay share one).
+    """
+    if not days:
+        return
+    model.objects.bulk_create(
+        [model(**{owner_field: owner_id}, date=day) for day in days],
+        ignore_conflicts=True,
+    )
+    groups = defaultdict(list)
+    for day, delta in days.items():
+        groups[tuple(delta)].append(day)
+    for delta, group in groups.items():
+        model.objects.filter(**{owner_field: owner_id}, date__in=group).update(**{
+            field: F(field) + value for field, value in zip(FIELDS, delta) if value
+        })
+
+
+def apply_difference(deltas):
+    try:
+        with transaction.atomic():
+            for (model, owner_field, owner_id), days in deltas.items():
+                apply_delta(model, owner_field, owner_id, days)
+        return
+    except IntegrityError:
+        pass
+    # Rooms and hotels deleted together with their bookings take their statistics along.
+    rooms = {owner_id for (model, _, owner_id) in deltas if model is RoomDailyStats}
+    hotels = {owner_id for (model, _, owner_id) in deltas if model is HotelDailyStats}
+    existing = {
+        RoomDailyStats: set(Room.objects.filter(pk__in=rooms).values_list('pk', flat=True)),
+        HotelDailyStats: set(Hotel.objects.filter(pk__in=hotels).values_list('pk', flat=True)),
+    }
+    with transaction.atomic():
+        for (model, owner_field, owner_id), days in deltas.items():
+            if owner_id in existing[model]:
+                apply_delta(model, owner_field, owner_id, days)
+
+
+def record_change(previous, current):
+    """
+    Schedules the statistics update of a booking going from `previous` to `current`
+    (Contribution or None) once the current transaction commits.
+    """
+    deltas = difference(previous, current)
+    if any(deltas.values()):
+        transaction.on_commit(lambda: apply_difference(deltas))
+
+
+def expected_stats(batch_size=1000):
+    """
+    Statistics of every room and hotel computed from Booking: ({(room_id, date): values},
+    {(hotel_id, date): values}).
+    """
+    rooms = defaultdict(zero)
+    hotels = defaultdict(zero)
+    calendar = room_rates()
+    bookings = Booking.objects.values(*ROOM_FIELDS, *BOOKING_FIELDS).order_by('id')
+    for booking in bookings.iterator(chunk_size=batch_size):
+        days = add_contribution(
+            defaultdict(zero), booking, booking['room__price_per_night'], calendar.get(booking['room_id'], ())
+        )
+        for day, values in days.items():
+            for totals in (rooms[booking['room_id'], day], hotels[booking['room__hotel_id'], day]):
+                for i, value in enumerate(values):
+                    totals[i] += value
+    return rooms, hotels
+
+
+def reconcile_table(model, owner_field, expected, dry_run=False, batch_size=1000):
+    """
+    Makes `model` hold exactly the non-zero rows of `expected`. Returns the number of
+    rows created, updated and deleted.
+    """
+    expected = {key: values for key, values in expected.items() if any(values)}
+    stored = {
+        (row[owner_field], row['date']): row
+        for row in model.objects.values('id', owner_field, 'date', *FIELDS).iterator(chunk_size=batch_size)
+    }
+    created = [key for key in expected if key not in stored]
+    # Rows that increments brought back to zero are left in place.
+    deleted = [
+        row['id'] for key, row in stored.items()
+        if key not in expected and any(row[field] for field in FIELDS)
+    ]
+    updated = [
+        (stored[key]['id'], values) for key, values in expected.items()
+        if key in stored and [stored[key][field] for field in FIELDS] != values
+    ]
+    if not dry_run:
+        with transaction.atomic():
+            model.objects.filter(pk__in=deleted).delete()
+            model.objects.bulk_update(
+                [model(pk=pk, **dict(zip(FIELDS, values))) for pk, values in updated],
+                FIELDS,
+                batch_size=batch_size,
+            )
+            model.objects.bulk_create(
+                [model(**{owner_field: owner_id}, date=day, **dict(zip(FIELDS, expected[owner_id, day])))
+                 for owner_id, day in created],
+                batch_size=batch_size,
+            )
+    return len(created), len(updated), len(deleted)
+
+
+def reconcile_stats(dry_run=False, batch_size=1000):
+    """
+    Back-fills and repairs both rollup tables from Booking.
+    """
+    rooms, hotels = expected_stats(batch_size)
+    results = {
+        'rooms': reconcile_table(RoomDailyStats, 'room_id', rooms, dry_run, batch_size),
+        'hotels': reconcile_table(HotelDailyStats, 'hotel_id', hotels, dry_run, batch_size),
+    }
+    logger.info(f"Daily statistics reconciled (dry run: {dry_run}): {results}")
+    return results
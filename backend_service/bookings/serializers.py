@@ -1,5 +1,7 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Booking
+from .models import Booking, BookingHold
+from .reservations import HoldLimitReached, RoomUnavailable, change, place_hold, save_booking
 from rooms.models import Room
 from rooms.serializers import RoomSerializer
 from auth_app.serializers import CustomUserSerializer
@@ -8,48 +10,95 @@ from auth_app.models import CustomUser
 
 class BookingSerializer(serializers.ModelSerializer):
     room_id = serializers.PrimaryKeyRelatedField(
-        queryset=Room.objects.all(),
+        queryset=Room.objects.select_related('hotel'),
         write_only=True
     )
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=CustomUser.objects.all(),
         write_only=True
     )
+    hold_id = serializers.PrimaryKeyRelatedField(
+        queryset=BookingHold.objects.all(),
+        write_only=True,
+        required=False
+    )
 
     class Meta:
         model = Booking
-        fields = ['id', 'user_id', 'room_id', 'start_date', 'end_date', 'created_at', 'updated_at', 'status']
+        fields = ['id', 'user_id', 'room_id', 'hold_id', 'start_date', 'end_date', 'created_at', 'updated_at', 'status']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def validate(self, data):
-        start_date = data.get('start_date')
-        end_date = data.get('end_date')
-        room = data.get('room')
+        instance = self.instance
+        start_date = data.get('start_date', instance and instance.start_date)
+        end_date = data.get('end_date', instance and instance.end_date)
+        room = data.get('room_id', instance and instance.room)
+        hold = data.get('hold_id')
+
+        if hold is not None:
+            if instance is not None:
+                raise serializers.ValidationError({'hold_id': ["Only new bookings take over a hold."]})
+            if hold.user_id != data['user_id'].pk or hold.room_id != room.pk:
+                raise serializers.ValidationError({'hold_id': ["This hold is for another user or room."]})
+            if hold.expires_at <= timezone.now():
+                raise serializers.ValidationError({'hold_id': ["This hold has expired."]})
+            if hold.start_date != start_date or hold.end_date != end_date:
+                raise serializers.ValidationError({'hold_id': ["This hold is for other dates."]})
 
+        # Availability is checked by reservations.save_booking(), under a room lock.
         if start_date and end_date:
             if start_date >= end_date:
                 raise serializers.ValidationError(
                     "End date must be after start date."
                 )
 
-            overlapping_bookings = Booking.objects.filter(
-                room=room,
-                start_date__lt=end_date,
-                end_date__gt=start_date,
-                status__in=["active", "confirmed"]
-            )
-            if overlapping_bookings.exists():
-                raise serializers.ValidationError(
-                    "This room is already booked for the selected dates."
-                )
+        return data
+
+    @staticmethod
+    def model_fields(validated_data):
+        fields = dict(validated_data)
+        if 'user_id' in fields:
+            fields['user'] = fields.pop('user_id')
+        if 'room_id' in fields:
+            fields['room'] = fields.pop('room_id')
+        return fields
+
+    def create(self, validated_data):
+        fields = self.model_fields(validated_data)
+        hold = fields.pop('hold_id', None)
+        try:
+            return save_booking(Booking(**fields), hold)
+        except RoomUnavailable as e:
+            raise serializers.ValidationError({'non_field_errors': [str(e)]})
+
+    def update(self, instance, validated_data):
+        try:
+            return change(instance, **self.model_fields(validated_data))
+        except RoomUnavailable as e:
+            raise serializers.ValidationError({'non_field_errors': [str(e)]})
 
+
+class BookingHoldSerializer(serializers.ModelSerializer):
+    room_id = serializers.PrimaryKeyRelatedField(
+        queryset=Room.objects.select_related('hotel'),
+        source='room'
+    )
+
+    class Meta:
+        model = BookingHold
+        fields = ['id', 'room_id', 'start_date', 'end_date', 'created_at', 'expires_at']
+        read_only_fields = ['id', 'created_at', 'expires_at']
+
+    def validate(self, data):
+        if data['start_date'] >= data['end_date']:
+            raise serializers.ValidationError("End date must be after start date.")
         return data
-    
+
     def create(self, validated_data):
-        user = validated_data.pop('user_id')
-        room = validated_data.pop('room_id')
-        booking = Booking.objects.create(user=user, room=room, **validated_data)
-        return booking
+        try:
+            return place_hold(self.context['request'].user, **validated_data)
+        except (RoomUnavailable, HoldLimitReached) as e:
+            raise serializers.ValidationError({'non_field_errors': [str(e)]})
 
 
 class MyBookingsSerializer(serializers.ModelSerializer):
@@ -1,29 +1,64 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from .models import Booking
-from profiles.models import Profile
+from .counters import record_booking
+from .inventory import sync_booking
+from .rollups import Contribution, record_change
+from hotels.models import Hotel
 from rooms.models import Room
+from hotels.cache import invalidate_cities
+from backend_service.versions import bump
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Booking)
-def update_user_profile(sender, instance, created, **kwargs):
+def count_new_booking(sender, instance, created, **kwargs):
     if created:
-        logger.info(f"Signal triggered for Booking id={instance.id}, user={instance.user}")
-        try:
-            profile = Profile.objects.get(user=instance.user)
-            profile.total_bookings += 1
-            profile.save()
-            logger.info(f"Profile updated: user={instance.user}, total_bookings={profile.total_bookings}")
-        except Profile.DoesNotExist:
-            logger.error(f"Profile not found for user={instance.user}")
-
-        try:
-            room = Room.objects.get(id=instance.room.id)
-            room.total_bookings += 1
-            room.save()
-            logger.info(f"Room updated: room_id={instance.room.id}, total_bookings={room.total_bookings}")
-        except Room.DoesNotExist:
-            logger.error(f"Room not found: room_id={instance.room.id}")
+        record_booking(instance, 1)
+
+
+@receiver(post_delete, sender=Booking)
+def count_deleted_booking(sender, instance, **kwargs):
+    record_booking(instance, -1)
+
+
+@receiver(post_save, sender=Booking)
+def update_room_nights(sender, instance, created, **kwargs):
+    sync_booking(instance, created)
+    logger.debug(f"Room nights synced for Booking id={instance.id}, status={instance.status}")
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_stats(sender, instance, **kwargs):
+    instance._stored_stats = Contribution.stored(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Booking)
+def update_daily_stats(sender, instance, **kwargs):
+    previous = getattr(instance, '_stored_stats', None)
+    record_change(previous, Contribution.of(instance, previous))
+
+
+@receiver(post_delete, sender=Booking)
+def remove_daily_stats(sender, instance, **kwargs):
+    record_change(Contribution.of(instance), None)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_searches(sender, instance, **kwargs):
+    if Booking.room.is_cached(instance) and Room.hotel.is_cached(instance.room):
+        city = instance.room.hotel.city
+    else:
+        city = Hotel.objects.filter(rooms=instance.room_id).values_list('city', flat=True).first()
+    invalidate_cities(city)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_booking_versions(sender, instance, created=False, **kwargs):
+    bump("bookings")
+    # A new booking was never served, unless a deleted booking had the same id.
+    bump(f"booking:{instance.pk}", create=not created)
@@ -1,3 +1,357 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+import base64
+import threading
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from auth_app.models import CustomUser
+from hotels.models import Hotel, HotelType
+from rooms.models import Room, RoomRate, RoomType
+from .availability import availability_calendar, quote_stays, stay_windows
+from .models import Booking, BookingHold, HotelDailyStats, RoomDailyStats, RoomNight
+from .reservations import HoldLimitReached, RoomUnavailable, change, double_bookings, place_hold, reserve, sweep_holds
+from .rollups import reconcile_stats
 
-# Create your tests here.
+
+def create_catalog():
+    owner = CustomUser.objects.create_user('owner@example.com', 'pw')
+    guest = CustomUser.objects.create_user('guest@example.com', 'pw')
+    other = CustomUser.objects.create_user('other@example.com', 'pw')
+    hotel = Hotel.objects.create(
+        owner=owner, name='Grand Barcelona', address='Rambla 1', city='Barcelona', country='Spain',
+        type=HotelType.objects.create(name='Resort'),
+    )
+    suite = RoomType.objects.create(name='Suite')
+    room = Room.objects.create(hotel=hotel, type=suite, name='Sea view', price_per_night=Decimal('100.00'))
+    second = Room.objects.create(hotel=hotel, type=suite, name='Garden', price_per_night=Decimal('80.00'))
+    return owner, guest, other, room, second
+
+
+def booking_data(user, room, start_date, end_date, **extra):
+    return {
+        'user_id': user.pk, 'room_id': room.pk, 'start_date': start_date, 'end_date': end_date,
+        'status': 'active', **extra,
+    }
+
+
+class ReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.guest, cls.other, cls.room, cls.second = create_catalog()
+
+    def nights(self, booking):
+        return list(RoomNight.objects.filter(booking=booking).order_by('date').values_list('date', flat=True))
+
+    def test_overlapping_stay_is_refused(self):
+        reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        with self.assertRaises(RoomUnavailable):
+            reserve(self.other, self.room, date(2025, 3, 3), date(2025, 3, 5))
+        # The check-out day is free, and so is the same stay in another room.
+        reserve(self.other, self.room, date(2025, 3, 4), date(2025, 3, 6))
+        reserve(self.other, self.second, date(2025, 3, 1), date(2025, 3, 4))
+        self.assertEqual(Booking.objects.count(), 3)
+        self.assertFalse(double_bookings().exists())
+
+    def test_booking_claims_its_nights(self):
+        booking = reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        self.assertEqual(self.nights(booking), [date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)])
+
+    def test_cancelled_booking_frees_its_nights(self):
+        booking = reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        change(booking, status='cancelled')
+        self.assertEqual(self.nights(booking), [])
+        reserve(self.other, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        with self.assertRaises(RoomUnavailable):
+            change(booking, status='active')
+
+    def test_moved_booking_frees_its_old_nights(self):
+        booking = reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        change(booking, start_date=date(2025, 3, 10), end_date=date(2025, 3, 12))
+        self.assertEqual(self.nights(booking), [date(2025, 3, 10), date(2025, 3, 11)])
+        reserve(self.other, self.room, date(2025, 3, 1), date(2025, 3, 4))
+
+    def test_api_refuses_taken_nights(self):
+        reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        self.client.force_login(self.other)
+        response = self.client.post(
+            '/api/bookings/', booking_data(self.other, self.room, '2025-03-02', '2025-03-03'),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ["This room is already booked for the selected dates."]})
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_one_of_concurrent_reservations_wins(self):
+        _, guest, _, room, _ = create_catalog()
+        writers = 4
+        barrier = threading.Barrier(writers)
+        outcomes = []
+
+        def book():
+            try:
+                barrier.wait()
+                reserve(guest, room, date(2025, 3, 1), date(2025, 3, 4))
+                outcomes.append('booked')
+            except RoomUnavailable:
+                outcomes.append('refused')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['booked'] + ['refused'] * (writers - 1))
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 3)
+        self.assertFalse(double_bookings().exists())
+
+
+class HoldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.guest, cls.other, cls.room, cls.second = create_catalog()
+
+    def expire(self, hold):
+        past = timezone.now() - timedelta(seconds=1)
+        BookingHold.objects.filter(pk=hold.pk).update(expires_at=past)
+        RoomNight.objects.filter(hold=hold).update(expires_at=past)
+
+    def test_booking_takes_over_its_hold(self):
+        self.client.force_login(self.guest)
+        response = self.client.post('/api/bookings/holds/', {
+            'room_id': self.room.pk, 'start_date': '2025-03-01', 'end_date': '2025-03-04',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        hold = response.json()['id']
+        with self.assertRaises(RoomUnavailable):
+            place_hold(self.other, self.room, date(2025, 3, 3), date(2025, 3, 5))
+
+        response = self.client.post(
+            '/api/bookings/', booking_data(self.guest, self.room, '2025-03-01', '2025-03-04', hold_id=hold),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(BookingHold.objects.filter(pk=hold).exists())
+        nights = RoomNight.objects.filter(room=self.room)
+        self.assertEqual(nights.count(), 3)
+        self.assertEqual(set(nights.values_list('booking_id', 'hold_id')), {(response.json()['id'], None)})
+
+    def test_hold_is_only_taken_over_as_placed(self):
+        hold = place_hold(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        cases = [
+            (self.other, self.room, '2025-03-04', "This hold is for another user or room."),
+            (self.guest, self.second, '2025-03-04', "This hold is for another user or room."),
+            (self.guest, self.room, '2025-03-03', "This hold is for other dates."),
+        ]
+        for user, room, end_date, message in cases:
+            self.client.force_login(user)
+            response = self.client.post(
+                '/api/bookings/', booking_data(user, room, '2025-03-01', end_date, hold_id=hold.pk),
+                content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'hold_id': [message]})
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_expired_hold_frees_its_nights(self):
+        hold = place_hold(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        self.expire(hold)
+        reserve(self.other, self.room, date(2025, 3, 2), date(2025, 3, 3))
+
+        self.client.force_login(self.guest)
+        response = self.client.post(
+            '/api/bookings/', booking_data(self.guest, self.room, '2025-03-01', '2025-03-04', hold_id=hold.pk),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'hold_id': ["This hold has expired."]})
+
+    def test_sweep_deletes_expired_holds_only(self):
+        expired = place_hold(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        live = place_hold(self.guest, self.second, date(2025, 3, 1), date(2025, 3, 4))
+        self.expire(expired)
+        self.assertEqual(sweep_holds(), 1)
+        self.assertEqual(list(BookingHold.objects.values_list('pk', flat=True)), [live.pk])
+        self.assertEqual(set(RoomNight.objects.values_list('hold_id', flat=True)), {live.pk})
+
+    @override_settings(BOOKING_MAX_HOLDS=1)
+    def test_hold_limit_counts_unexpired_holds(self):
+        first = place_hold(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        with self.assertRaises(HoldLimitReached):
+            place_hold(self.guest, self.second, date(2025, 3, 1), date(2025, 3, 4))
+        self.expire(first)
+        place_hold(self.guest, self.second, date(2025, 3, 1), date(2025, 3, 4))
+
+
+class AvailabilityTests(TestCase):
+    """
+    Hand-computed calendar of 2025-03-01..2025-03-11 (offsets 0 to 9):
+
+        room    taken nights
+        room    03-02 (booking), 03-08..03-10 (hold); the 03-05 booking is cancelled
+        second  03-01 (booking since 02-27)
+
+    Nightly prices are 100 for the room and 80 for the second, unless a test adds rates.
+    """
+    start = date(2025, 3, 1)
+    end = date(2025, 3, 11)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.guest, cls.other, cls.room, cls.second = create_catalog()
+        reserve(cls.guest, cls.room, date(2025, 3, 2), date(2025, 3, 3))
+        reserve(cls.guest, cls.room, date(2025, 3, 5), date(2025, 3, 6), status='cancelled')
+        place_hold(cls.other, cls.room, date(2025, 3, 8), date(2025, 3, 12))
+        reserve(cls.guest, cls.second, date(2025, 2, 27), date(2025, 3, 2))
+        cls.room_ids = sorted([cls.room.pk, cls.second.pk])
+
+    def test_run_lengths(self):
+        calendar = availability_calendar(self.room_ids, self.start, self.end, 'rle')
+        self.assertEqual(calendar['days'], 10)
+        self.assertEqual(calendar['rooms'], {
+            str(self.room.pk): [1, 1, 5, 3],
+            str(self.second.pk): [0, 1, 9],
+        })
+
+    def test_bitmaps(self):
+        calendar = availability_calendar(self.room_ids, self.start, self.end, 'base64')
+        self.assertEqual(calendar['rooms'], {
+            str(self.room.pk): base64.b64encode(bytes([0b01000001, 0b11000000])).decode(),
+            str(self.second.pk): base64.b64encode(bytes([0b10000000, 0b00000000])).decode(),
+        })
+
+    def test_calendar_endpoint(self):
+        response = self.client.get('/api/rooms/rooms/availability/', {
+            'hotel': self.room.hotel_id, 'start': '2025-03-01', 'end': '2025-03-11', 'encoding': 'rle',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rooms'], {str(self.room.pk): [1, 1, 5, 3], str(self.second.pk): [0, 1, 9]})
+
+    def test_flexible_stays(self):
+        prices = [Decimal('100.00'), Decimal('80.00')] if self.room.pk < self.second.pk else [Decimal('80.00'), Decimal('100.00')]
+        # Free 2-night stays of the room start on offsets 2 to 5, all at 200.00.
+        for pick in ('cheapest', 'earliest'):
+            stays = stay_windows(self.room_ids, prices, self.start, self.end, 2, pick=pick)
+            self.assertEqual(stays[self.room.pk], {
+                'start_date': '2025-03-03', 'end_date': '2025-03-05', 'nights': 2, 'total_price': '200.00',
+            })
+            self.assertEqual(stays[self.second.pk], {
+                'start_date': '2025-03-02', 'end_date': '2025-03-04', 'nights': 2, 'total_price': '160.00',
+            })
+        stays = stay_windows(self.room_ids, prices, self.start, self.end, 2, total_max=Decimal('199.99'))
+        self.assertEqual(list(stays), [self.second.pk])
+        stays = stay_windows(self.room_ids, prices, self.start, self.end, 6)
+        self.assertEqual(list(stays), [self.second.pk])
+
+    def add_rate(self, start_date, end_date, price):
+        RoomRate.objects.create(room=self.room, start_date=start_date, end_date=end_date, price_per_night=Decimal(price))
+
+    def test_quote(self):
+        self.add_rate(date(2025, 3, 3), date(2025, 3, 5), '150.00')
+        quote = quote_stays(self.room_ids, date(2025, 3, 3), date(2025, 3, 6))
+        self.assertEqual(quote['nights'], 3)
+        self.assertEqual(quote['rooms'][str(self.room.pk)], {
+            'available': True,
+            'total_price': '400.00',
+            'min_price': '100.00',
+            'max_price': '150.00',
+            'nightly_prices': ['150.00', '150.00', '100.00'],
+        })
+        self.assertEqual(quote['rooms'][str(self.second.pk)]['total_price'], '240.00')
+        self.assertFalse(quote_stays(self.room_ids, date(2025, 3, 1), date(2025, 3, 3))['rooms'][str(self.room.pk)]['available'])
+
+    def test_latest_overlapping_rate_wins(self):
+        self.add_rate(date(2025, 3, 3), date(2025, 3, 5), '150.00')
+        self.add_rate(date(2025, 3, 4), date(2025, 3, 6), '90.00')
+        quote = quote_stays([self.room.pk], date(2025, 3, 3), date(2025, 3, 6))
+        self.assertEqual(quote['rooms'][str(self.room.pk)]['nightly_prices'], ['150.00', '90.00', '90.00'])
+
+    def test_flexible_stays_with_rates(self):
+        self.add_rate(date(2025, 3, 3), date(2025, 3, 5), '150.00')
+        prices = [Decimal('100.00'), Decimal('80.00')] if self.room.pk < self.second.pk else [Decimal('80.00'), Decimal('100.00')]
+        # Free 2-night stays of the room start on offsets 2 (300.00), 3 (250.00), 4 and 5 (200.00).
+        cases = [
+            ({'pick': 'cheapest'}, '2025-03-05', '200.00'),
+            ({'pick': 'earliest'}, '2025-03-03', '300.00'),
+            ({'pick': 'cheapest', 'total_min': Decimal('210')}, '2025-03-04', '250.00'),
+            ({'pick': 'earliest', 'total_max': Decimal('250')}, '2025-03-04', '250.00'),
+        ]
+        for options, start_date, total in cases:
+            stays = stay_windows(self.room_ids, prices, self.start, self.end, 2, **options)
+            self.assertEqual(stays[self.room.pk]['start_date'], start_date, options)
+            self.assertEqual(stays[self.room.pk]['total_price'], total, options)
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.guest, cls.other, cls.room, cls.second = create_catalog()
+
+    def stats(self, model, owner_field, owner_id):
+        rows = model.objects.filter(**{owner_field: owner_id}).order_by('date').values_list(
+            'date', 'booked_nights', 'new_bookings', 'cancellations', 'revenue')
+        return [row for row in rows if any(row[1:])]
+
+    def test_increments_match_reconcile(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 4))
+        with self.captureOnCommitCallbacks(execute=True):
+            change(moved, start_date=date(2025, 3, 2), end_date=date(2025, 3, 4))
+        with self.captureOnCommitCallbacks(execute=True):
+            cancelled = reserve(self.other, self.second, date(2025, 3, 3), date(2025, 3, 5))
+        with self.captureOnCommitCallbacks(execute=True):
+            change(cancelled, status='cancelled')
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(self.other, self.second, date(2025, 3, 3), date(2025, 3, 4), status='confirmed').delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(self.other, self.second, date(2025, 3, 4), date(2025, 3, 5))
+
+        self.assertEqual(self.stats(RoomDailyStats, 'room_id', self.room.pk), [
+            (date(2025, 3, 2), 1, 0, 0, Decimal('100.00')),
+            (date(2025, 3, 3), 1, 0, 0, Decimal('100.00')),
+            (today, 0, 1, 0, Decimal('0.00')),
+        ])
+        self.assertEqual(self.stats(RoomDailyStats, 'room_id', self.second.pk), [
+            (date(2025, 3, 4), 1, 0, 0, Decimal('80.00')),
+            (today, 0, 2, 1, Decimal('0.00')),
+        ])
+        self.assertEqual(self.stats(HotelDailyStats, 'hotel_id', self.room.hotel_id), [
+            (date(2025, 3, 2), 1, 0, 0, Decimal('100.00')),
+            (date(2025, 3, 3), 1, 0, 0, Decimal('100.00')),
+            (date(2025, 3, 4), 1, 0, 0, Decimal('80.00')),
+            (today, 0, 3, 1, Decimal('0.00')),
+        ])
+        self.assertEqual(reconcile_stats(dry_run=True), {'rooms': (0, 0, 0), 'hotels': (0, 0, 0)})
+
+    def test_reconcile_repairs_drift(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 3))
+        RoomDailyStats.objects.filter(room=self.room, date=date(2025, 3, 1)).update(booked_nights=5)
+        RoomDailyStats.objects.filter(room=self.room, date=date(2025, 3, 2)).delete()
+        RoomDailyStats.objects.create(room=self.second, date=date(2025, 3, 1), booked_nights=1, revenue=Decimal('80.00'))
+
+        self.assertEqual(reconcile_stats(dry_run=True)['rooms'], (1, 1, 1))
+        self.assertEqual(reconcile_stats()['rooms'], (1, 1, 1))
+        self.assertEqual(reconcile_stats(dry_run=True), {'rooms': (0, 0, 0), 'hotels': (0, 0, 0)})
+        self.assertEqual(self.stats(RoomDailyStats, 'room_id', self.room.pk)[:2], [
+            (date(2025, 3, 1), 1, 0, 0, Decimal('100.00')),
+            (date(2025, 3, 2), 1, 0, 0, Decimal('100.00')),
+        ])
+        self.assertEqual(self.stats(RoomDailyStats, 'room_id', self.second.pk), [])
+
+    def test_revenue_follows_rates(self):
+        RoomRate.objects.create(room=self.room, start_date=date(2025, 3, 2), end_date=date(2025, 3, 3), price_per_night=Decimal('150.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(self.guest, self.room, date(2025, 3, 1), date(2025, 3, 3))
+        self.assertEqual(
+            [(row[0], row[4]) for row in self.stats(RoomDailyStats, 'room_id', self.room.pk)[:2]],
+            [(date(2025, 3, 1), Decimal('100.00')), (date(2025, 3, 2), Decimal('150.00'))],
+        )
+        self.assertEqual(reconcile_stats(dry_run=True), {'rooms': (0, 0, 0), 'hotels': (0, 0, 0)})
@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet
+from .views import BookingHoldViewSet, BookingViewSet
 
 router = DefaultRouter()
+# Before the bookings, whose detail route would take "holds" for a booking id.
+router.register('holds', BookingHoldViewSet, basename='booking-hold')
 router.register('', BookingViewSet, basename='booking')
 
 urlpatterns = [
@@ -1,18 +1,30 @@
+from django.utils import timezone
+from rest_framework import mixins
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.decorators import action
-from .models import Booking
-from .serializers import BookingSerializer, MyBookingsSerializer
+from .models import Booking, BookingHold
+from .reservations import release_hold
+from .serializers import BookingHoldSerializer, BookingSerializer, MyBookingsSerializer
+from backend_service.fieldsets import SparseFieldsetMixin
+from backend_service.prefetch import PrefetchPlanMixin
+from backend_service.versions import ConditionalGetMixin
+from backend_service.streaming import StreamingListMixin
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class BookingViewSet(ModelViewSet):
-    queryset = Booking.objects.select_related('room', 'user')
+class BookingViewSet(ConditionalGetMixin, SparseFieldsetMixin, PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
+    queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_ordering = ('-id',)
+    version_keys = {
+        'list': ('bookings',),
+        'retrieve': ('booking:{pk}',),
+    }
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching bookings list")
@@ -49,13 +61,30 @@ class BookingViewSet(ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
         logger.info("Fetching current user's bookings for user ID: %s", request.user.id)
-        bookings = Booking.objects.filter(user=request.user).select_related('room', 'user')
-        serializer = MyBookingsSerializer(bookings, many=True, context={"request": request})
-        return Response(serializer.data)
+        bookings = Booking.objects.filter(user=request.user)
+        return self.list_response(bookings, MyBookingsSerializer)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def owner(self, request):
         logger.info("Fetching current user's hotel's bookings for user ID: %s", request.user.id)
-        bookings = Booking.objects.filter(room__hotel__owner=request.user).select_related('room', 'user')
-        serializer = MyBookingsSerializer(bookings, many=True, context={"request": request})
-        return Response(serializer.data)
+        bookings = Booking.objects.filter(room__hotel__owner=request.user)
+        return self.list_response(bookings, MyBookingsSerializer)
+
+
+class BookingHoldViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                         mixins.DestroyModelMixin, GenericViewSet):
+    """
+    Checkout holds of the current user: POST a room and dates to hold them for a few
+    minutes, then create the booking with the hold's id, or DELETE the hold.
+    """
+    serializer_class = BookingHoldSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return BookingHold.objects.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        ).select_related('room__hotel').order_by('id')
+
+    def perform_destroy(self, instance):
+        release_hold(instance)
@@ -0,0 +1,229 @@
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+import hashlib
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+ANY_CITY = "city:*"
+
+
+class LocMemSearchCache:
+    """
+    Per-process LRU cache of search payloads with tag-based invalidation.
+    """
+    def __init__(self, max_entries=1000, timeout=300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.timeout, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def city_tags(self):
+        with self._lock:
+            return [tag for tag in self._tags if tag.startswith("city:")]
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        return {
+            "backend": "locmem",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SharedSearchCache:
+    """
+    Search cache stored in a Django cache alias shared by all workers (e.g. Redis or Memcached).
+    Entries record the version of every tag they carry; invalidating a tag bumps its version,
+    so stale entries are detected on read. Eviction is left to the cache server.
+    """
+    def __init__(self, alias='default', timeout=300, prefix='search'):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    def _count(self, name):
+        key = self._key("stats", name)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 1, timeout=None)
+
+    def get(self, key):
+        entry = self.cache.get(self._key("entry", key))
+        if entry is not None:
+            value, versions = entry
+            current = self.cache.get_many([self._key("tag", tag) for tag in versions])
+            if all(current.get(self._key("tag", tag), 0) == version for tag, version in versions.items()):
+                self._count("hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key, value, tags):
+        tag_keys = {tag: self._key("tag", tag) for tag in tags}
+        current = self.cache.get_many(tag_keys.values())
+        versions = {tag: current.get(tag_key, 0) for tag, tag_key in tag_keys.items()}
+        self.cache.set(self._key("entry", key), (value, versions), self.timeout)
+
+        city_tags = {tag for tag in tags if tag.startswith("city:")}
+        registry = self.cache.get(self._key("cities"), set())
+        if not city_tags <= registry:
+            self.cache.set(self._key("cities"), registry | city_tags, None)
+
+    def city_tags(self):
+        return list(self.cache.get(self._key("cities"), set()))
+
+    def invalidate(self, tags):
+        for tag in tags:
+            key = self._key("tag", tag)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, 1, timeout=None)
+
+    def clear(self):
+        self.invalidate(["all"])
+        self.cache.delete(self._key("cities"))
+
+    def stats(self):
+        counters = self.cache.get_many([self._key("stats", "hits"), self._key("stats", "misses")])
+        return {
+            "backend": "shared",
+            "hits": counters.get(self._key("stats", "hits"), 0),
+            "misses": counters.get(self._key("stats", "misses"), 0),
+        }
+
+
+_backend = None
+
+
+def search_cache():
+    global _backend
+    if _backend is None:
+        config = settings.SEARCH_CACHE
+        backend_class = import_string(config['BACKEND'])
+        _backend = backend_class(timeout=config.get('TIMEOUT', 300), **config.get('OPTIONS', {}))
+    return _backend
+
+
+def search_key(params, show_rooms_only):
+    """
+    Cache key of a search, independent of parameter order, letter case and blank values.
+    """
+    normalized = {key: str(value).strip().lower() for key, value in params.items() if str(value).strip()}
+    normalized["show_rooms_only"] = show_rooms_only
+    raw = json.dumps(normalized, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def search_tags(params, payload):
+    """
+    Tags of a search payload: the city filter (or any city) plus every hotel and room it contains.
+    Every entry also carries "all" so that clear() works on shared backends.
+    """
+    city = str(params.get("city", "")).strip().lower()
+    tags = {"all", f"city:{city}" if city else ANY_CITY}
+    for hotel in payload.get("hotels", []):
+        tags.add(f"hotel:{hotel['id']}")
+        tags.update(f"room:{room['id']}" for room in hotel.get("rooms", []))
+    for room in payload.get("rooms", []):
+        tags.add(f"room:{room['id']}")
+        if "hotel" in room:
+            tags.add(f"hotel:{room['hotel']}")
+    return tags
+
+
+def on_commit(func):
+    def wrapper(*args):
+        transaction.on_commit(lambda: func(*args))
+    return wrapper
+
+
+@on_commit
+def invalidate_cities(*cities):
+    """
+    Drops every search that could contain a hotel located in one of `cities`:
+    searches without a city filter and those whose city filter is a substring of the city.
+    """
+    cache = search_cache()
+    cities = [city.lower() for city in cities if city]
+    tags = [
+        tag for tag in cache.city_tags()
+        if tag == ANY_CITY or any(tag[len("city:"):] in city for city in cities)
+    ]
+    cache.invalidate(tags)
+    logger.debug(f"Search cache invalidated for cities {cities}: {len(tags)} tags")
+
+
+@on_commit
+def invalidate_hotels(*hotel_ids):
+    search_cache().invalidate([f"hotel:{hotel_id}" for hotel_id in hotel_ids])
+
+
+@on_commit
+def invalidate_rooms(*room_ids):
+    search_cache().invalidate([f"room:{room_id}" for room_id in room_ids])
+
+
+@on_commit
+def invalidate_all():
+    search_cache().clear()
@@ -0,0 +1,222 @@
+"""
+Streaming import of partner catalogues (see the import_catalog command).
+
+A catalogue is a CSV or JSON Lines stream of records, each with a `kind` ("hotel" or
+"room") and an `external_id`, the partner's key of the object:
+
+    hotel: external_id, name, address, city, country, owner (email), type (HotelType
+           name), description, rating
+    room:  external_id, hotel (external_id of its hotel), name, price_per_night,
+           type (RoomType name), is_available
+
+Records are processed in batches, one transaction each: hotels first, then rooms, so a
+room may follow its hotel in the same batch. Both are upserted by external_id with
+bulk INSERT ... ON CONFLICT statements, so re-importing a catalogue (or resuming an
+interrupted import) updates the existing rows. Types and owners are resolved through
+in-memory maps and hotels of rooms with one query per batch; memory use depends on the
+batch size only. Derived data is refreshed once per batch through `bulk_saved`.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from backend_service.bulk import bulk_saved, upsert_all
+from rooms.models import Room, RoomType
+from .models import Hotel, HotelType
+import csv
+import itertools
+import json
+
+HOTEL_FIELDS = ('name', 'address', 'city', 'country', 'description', 'rating')
+ROOM_FIELDS = ('name', 'price_per_night', 'is_available')
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y')
+FALSE_VALUES = ('0', 'false', 'f', 'no', 'n')
+
+
+class RecordError(Exception):
+    """
+    Invalid catalogue record; `number` is its line (JSONL) or row (CSV) number.
+    """
+    def __init__(self, number, message):
+        super().__init__(f"record {number}: {message}")
+        self.number = number
+
+
+def read_records(stream, format):
+    """
+    Yields (number, record) pairs; records are dicts without empty values, or
+    RecordError instances for unreadable lines.
+    """
+    if format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), 1):
+            yield number, {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, RecordError(number, f"invalid JSON ({e})")
+            continue
+        if not isinstance(record, dict):
+            yield number, RecordError(number, "expected a JSON object")
+            continue
+        yield number, {key: value for key, value in record.items() if value not in ('', None)}
+
+
+def batches(records, size):
+    records = iter(records)
+    while batch := list(itertools.islice(records, size)):
+        yield batch
+
+
+def clean_fields(model, record, names):
+    """
+    Values of `names` converted and validated by the model fields, or ValidationError.
+    """
+    values, errors = {}, {}
+    for name in names:
+        field = model._meta.get_field(name)
+        value = record.get(name)
+        if name == 'is_available' and isinstance(value, str):
+            value = parse_bool(value)
+        try:
+            values[name] = field.clean(value, None) if value is not None or not field.has_default() else field.default
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    return values
+
+
+def parse_bool(value):
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    return value
+
+
+def error_message(error):
+    if hasattr(error, 'message_dict'):
+        return "; ".join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+    return " ".join(error.messages)
+
+
+class CatalogImporter:
+    def __init__(self, default_owner=None, create_types=False, on_error=None):
+        self.default_owner = default_owner
+        self.create_types = create_types
+        self.on_error = on_error or (lambda error: None)
+        self.hotel_types = self.type_map(HotelType)
+        self.room_types = self.type_map(RoomType)
+        self.owners = {}
+        self.counts = dict.fromkeys(
+            ('records', 'hotels_created', 'hotels_updated', 'rooms_created', 'rooms_updated', 'rejected'), 0
+        )
+
+    @staticmethod
+    def type_map(model):
+        types = {}
+        for pk, name in model.objects.order_by('id').values_list('id', 'name'):
+            types.setdefault(name, pk)
+        return types
+
+    def reject(self, error):
+        self.counts['rejected'] += 1
+        self.on_error(error)
+
+    def resolve_type(self, model, types, name):
+        if name is None:
+            return None
+        if name not in types:
+            if not self.create_types:
+                raise ValidationError({'type': [f"Unknown {model._meta.verbose_name} {name!r}."]})
+            types[name] = model.objects.create(name=name).pk
+        return types[name]
+
+    def load_owners(self, emails):
+        missing = set(emails) - set(self.owners)
+        if missing:
+            users = get_user_model().objects.filter(email__in=missing).values_list('email', 'id')
+            self.owners.update(users)
+
+    def import_batch(self, batch):
+        """
+        Imports one batch of (number, record) pairs; the caller runs it in a transaction.
+        """
+        self.counts['records'] += len(batch)
+        hotels, rooms = {}, {}
+        for number, record in batch:
+            if isinstance(record, RecordError):
+                self.reject(record)
+                continue
+            kind = record.get('kind')
+            target = {'hotel': hotels, 'room': rooms}.get(kind)
+            if target is None:
+                self.reject(RecordError(number, f"unknown kind {kind!r}"))
+            elif not record.get('external_id'):
+                self.reject(RecordError(number, "external_id is required"))
+            else:
+                # The last record of an external id wins, as it would across batches.
+                target.pop(str(record['external_id']), None)
+                target[str(record['external_id'])] = (number, record)
+        if hotels:
+            self.import_hotels(hotels)
+        if rooms:
+            self.import_rooms(rooms)
+
+    def import_hotels(self, records):
+        self.load_owners({record.get('owner', self.default_owner) for _, record in records.values()} - {None})
+        hotels = []
+        for external_id, (number, record) in records.items():
+            try:
+                owner_id = self.owners.get(record.get('owner', self.default_owner))
+                if owner_id is None:
+                    raise ValidationError({'owner': [f"Unknown owner {record.get('owner')!r}."]})
+                hotels.append(Hotel(
+                    external_id=external_id,
+                    owner_id=owner_id,
+                    type_id=self.resolve_type(HotelType, self.hotel_types, record.get('type')),
+                    **clean_fields(Hotel, record, HOTEL_FIELDS),
+                ))
+            except ValidationError as e:
+                self.reject(RecordError(number, error_message(e)))
+        if not hotels:
+            return
+        previous = {
+            hotel.pk: hotel for hotel in
+            Hotel.objects.filter(external_id__in=[hotel.external_id for hotel in hotels]).only('id', 'city')
+        }
+        upsert_all(Hotel, hotels, 'external_id', ['owner', 'type', *HOTEL_FIELDS])
+        bulk_saved.send(sender=Hotel, instances=hotels, created=not previous, previous=previous)
+        self.counts['hotels_updated'] += len(previous)
+        self.counts['hotels_created'] += len(hotels) - len(previous)
+
+    def import_rooms(self, records):
+        hotel_ids = dict(Hotel.objects.filter(
+            external_id__in={str(record['hotel']) for _, record in records.values() if 'hotel' in record}
+        ).values_list('external_id', 'id'))
+        rooms = []
+        for external_id, (number, record) in records.items():
+            try:
+                hotel_id = hotel_ids.get(str(record.get('hotel')))
+                if hotel_id is None:
+                    raise ValidationError({'hotel': [f"Unknown hotel {record.get('hotel')!r}."]})
+                rooms.append(Room(
+                    external_id=external_id,
+                    hotel_id=hotel_id,
+                    type_id=self.resolve_type(RoomType, self.room_types, record.get('type')),
+                    **clean_fields(Room, record, ROOM_FIELDS),
+                ))
+            except ValidationError as e:
+                self.reject(RecordError(number, error_message(e)))
+        if not rooms:
+            return
+        previous = {
+            room.pk: room for room in
+            Room.objects.filter(external_id__in=[room.external_id for room in rooms]).only('id', 'hotel_id')
+        }
+        upsert_all(Room, rooms, 'external_id', ['hotel', 'type', *ROOM_FIELDS])
+        bulk_saved.send(sender=Room, instances=rooms, created=not previous, previous=previous)
+        self.counts['rooms_updated'] += len(previous)
+        self.counts['rooms_created'] += len(rooms) - len(previous)
@@ -0,0 +1,122 @@
+"""
+Owner dashboard: occupancy, booked nights, revenue and check-ins of an owner's hotels
+and rooms over a date window.
+
+Nights and revenue are summed by the database from the daily statistics rollups (see
+bookings.rollups) and check-ins are counted from bookings, so the payload
+holds one row per hotel and room whatever the length of the booking history.
+"""
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from bookings.models import Booking, ACTIVE_STATUSES
+from rooms.models import Room
+from .models import Hotel
+
+DEFAULT_CHECK_INS = 20
+MAX_CHECK_INS = 100
+
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=20, decimal_places=2))
+
+
+def check_in_limit(value):
+    if value is None:
+        return DEFAULT_CHECK_INS
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("check_ins must be an integer.")
+    return max(0, min(limit, MAX_CHECK_INS))
+
+
+def check_ins(owner, start, end):
+    return Booking.objects.filter(
+        room__hotel__owner=owner,
+        status__in=ACTIVE_STATUSES,
+        start_date__gte=start,
+        start_date__lt=end,
+    )
+
+
+def check_in_count(owner, start, end, outer_path):
+    counts = check_ins(owner, start, end).filter(**{outer_path: OuterRef('pk')}).values(outer_path).annotate(
+        count=Count('id')
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def occupancy(booked_nights, room_nights):
+    return round(booked_nights / room_nights, 4) if room_nights else 0.0
+
+
+def hotel_rows(owner, start, end):
+    days = Q(daily_stats__date__gte=start, daily_stats__date__lt=end)
+    return Hotel.objects.filter(owner=owner).annotate(
+        booked_nights=Coalesce(Sum('daily_stats__booked_nights', filter=days), 0),
+        revenue=Coalesce(Sum('daily_stats__revenue', filter=days), ZERO),
+        check_ins=check_in_count(owner, start, end, 'room__hotel'),
+    ).order_by('id').values('id', 'name', 'city', 'country', 'booked_nights', 'revenue', 'check_ins')
+
+
+def room_rows(owner, start, end):
+    days = Q(daily_stats__date__gte=start, daily_stats__date__lt=end)
+    return Room.objects.filter(hotel__owner=owner).annotate(
+        booked_nights=Coalesce(Sum('daily_stats__booked_nights', filter=days), 0),
+        revenue=Coalesce(Sum('daily_stats__revenue', filter=days), ZERO),
+        check_ins=check_in_count(owner, start, end, 'room'),
+    ).order_by('hotel_id', 'id').values(
+        'id', 'hotel_id', 'name', 'price_per_night', 'booked_nights', 'revenue', 'check_ins'
+    )
+
+
+def upcoming_check_ins(owner, start, end, limit):
+    if not limit:
+        return []
+    bookings = check_ins(owner, start, end).order_by('start_date', 'id').values(
+        'id', 'start_date', 'end_date', 'status', 'room_id', 'room__name', 'room__hotel_id', 'user__email'
+    )[:limit]
+    return [
+        {
+            'id': booking['id'],
+            'start_date': booking['start_date'],
+            'end_date': booking['end_date'],
+            'status': booking['status'],
+            'room': booking['room_id'],
+            'room_name': booking['room__name'],
+            'hotel': booking['room__hotel_id'],
+            'guest': booking['user__email'],
+        }
+        for booking in bookings
+    ]
+
+
+def owner_dashboard(owner, start, end, limit=DEFAULT_CHECK_INS):
+    days = (end - start).days
+    rooms_by_hotel = {}
+    for room in room_rows(owner, start, end):
+        hotel_id = room.pop('hotel_id')
+        room['occupancy'] = occupancy(room['booked_nights'], days)
+        rooms_by_hotel.setdefault(hotel_id, []).append(room)
+
+    hotels = []
+    totals = {'rooms': 0, 'booked_nights': 0, 'revenue': Decimal('0.00'), 'check_ins': 0}
+    for hotel in hotel_rows(owner, start, end):
+        hotel['rooms'] = rooms_by_hotel.get(hotel['id'], [])
+        room_count = hotel['room_count'] = len(hotel['rooms'])
+        hotel['occupancy'] = occupancy(hotel['booked_nights'], room_count * days)
+        hotels.append(hotel)
+        totals['rooms'] += room_count
+        totals['booked_nights'] += hotel['booked_nights']
+        totals['revenue'] += hotel['revenue']
+        totals['check_ins'] += hotel['check_ins']
+    totals['occupancy'] = occupancy(totals['booked_nights'], totals['rooms'] * days)
+
+    return {
+        'start': start,
+        'end': end,
+        'days': days,
+        'totals': totals,
+        'hotels': hotels,
+        'upcoming_check_ins': upcoming_check_ins(owner, start, end, limit),
+    }
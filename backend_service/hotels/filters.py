@@ -1,52 +1,209 @@
-from django.db.models import Q
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Floor
 from .models import Hotel
-from rooms.models import Room
+from .search import FIELDS, HOTEL_PATH, ROOM_PATH, matching_ids, relevance
+from rooms.models import RoomSearchDocument
+from backend_service.dates import window
+from bookings.availability import FLEXIBLE_MAX_ROOMS, stay_windows
+from bookings.inventory import booked_room_ids
 
-def search_accommodations(params):
-    query = Q()
+HOTEL_TEXT_FILTERS = {
+    "hotel": "hotel_name",
+    "hotel_type": "hotel_type",
+    "country": "country",
+    "city": "city",
+}
+
+ROOM_TEXT_FILTERS = {
+    "room": "room_name",
+    "room_type": "room_type",
+}
+
+# Allowed `sort` values -> room ordering. Every ordering ends with the primary key
+# and is covered by an index on RoomSearchDocument, so keyset pages are served from the index.
+ROOM_SORT_KEYS = {
+    "price_per_night": ("price_per_night", "id"),
+    "-price_per_night": ("-price_per_night", "-id"),
+    "name": ("name", "id"),
+    "-name": ("-name", "-id"),
+}
+
+DEFAULT_PRICE_BUCKET = Decimal(50)
+
+# Beyond this many rooms, pricing queries select them with the search's subquery: a
+# long id list costs Django more to build than the database to rerun the filters.
+ROOM_LIST_MAX = 200
+
+FACET_COLUMNS = {
+    "city": "city",
+    "hotel_type": "hotel_type",
+    "room_type": "type_name",
+}
 
-    if params.get("hotel"):
-        query &= Q(name__icontains=params["hotel"])
-    
-    if params.get("hotel_type"):
-        query &= Q(type__name__icontains=params["hotel_type"])
-    
-    if params.get("country"):
-        query &= Q(country__icontains=params["country"])
-    
-    if params.get("city"):
-        query &= Q(city__icontains=params["city"])
-    
-    hotels = Hotel.objects.filter(query).prefetch_related('rooms')
 
+def text_query(params, filters, path_at):
     query = Q()
-    
-    if params.get("room"):
-        query &= Q(name__icontains=params["room"])
+    for param, field in filters.items():
+        if params.get(param):
+            path = FIELDS[field][path_at]
+            query &= Q(**{f"{path}__in": matching_ids(field, params[param])})
+    return query
+
+
+def relevance_score(params, path_at):
+    score = None
+    for param, field in {**HOTEL_TEXT_FILTERS, **ROOM_TEXT_FILTERS}.items():
+        path = FIELDS[field][path_at]
+        if params.get(param) and path:
+            term = relevance(field, params[param], path)
+            score = term if score is None else score + term
+    return score
+
+
+def order_by_relevance(queryset, params, path_at):
+    score = relevance_score(params, path_at)
+    if score is None:
+        return queryset.order_by('id')
+    return queryset.annotate(relevance=score).order_by('-relevance', '-id')
+
+
+def search_accommodations(params):
+    query = text_query(params, HOTEL_TEXT_FILTERS, HOTEL_PATH)
 
-    if params.get("room_type"):
-        query &= Q(type__name__icontains=params["room_type"])
+    hotels = Hotel.objects.filter(query)
+
+    # Rooms are filtered on the hotel columns of their own documents, not through `hotels`.
+    query = text_query(params, HOTEL_TEXT_FILTERS, ROOM_PATH) & text_query(params, ROOM_TEXT_FILTERS, ROOM_PATH)
+
+    # Flexible searches filter prices and dates per stay, in stay_search().
+    flexible = bool(params.get("nights"))
 
     price_min = params.get("priceMin")
     price_max = params.get("priceMax")
-    if price_min:
+    if price_min and not flexible:
         query &= Q(price_per_night__gte=price_min)
-    if price_max:
+    if price_max and not flexible:
         query &= Q(price_per_night__lte=price_max)
 
     start_date = params.get("startDate")
     end_date = params.get("endDate")
-    if start_date and end_date:
-        query &= ~Q(
-            Q(bookings__start_date__lt=end_date) &
-            Q(bookings__end_date__gt=start_date)
-        )
+    if start_date and end_date and not flexible:
+        query &= ~Q(id__in=booked_room_ids(start_date, end_date))
 
-    hotel_ids = hotels.values_list('id', flat=True)
-    rooms = Room.objects.filter(query, hotel_id__in=hotel_ids).select_related('hotel')
+    rooms = RoomSearchDocument.objects.filter(query)
 
     sort_field = params.get("sort")
-    if sort_field:
-        rooms = rooms.order_by(sort_field)
-    
+    if sort_field == "relevance":
+        hotels = order_by_relevance(hotels, params, HOTEL_PATH)
+        rooms = order_by_relevance(rooms, params, ROOM_PATH)
+    elif sort_field:
+        if sort_field not in ROOM_SORT_KEYS:
+            raise ValidationError(f"Unsupported sort key: {sort_field}.")
+        hotels = hotels.order_by('id')
+        rooms = rooms.order_by(*ROOM_SORT_KEYS[sort_field])
+    else:
+        hotels = hotels.order_by('id')
+        rooms = rooms.order_by('id')
+
     return hotels, rooms
+
+
+def decimal_param(params, name):
+    if not params.get(name):
+        return None
+    try:
+        value = Decimal(params[name])
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite():
+        raise ValidationError(f"{name} must be a number.")
+    return value
+
+
+def stay_search(rooms, params):
+    """
+    For a search pricing stays, the rooms with a free stay whose total price is within
+    totalMin/totalMax, and {room id: stay} of the cheapest such stay of each room (the
+    earliest with flexible=earliest). With `nights`, the search is flexible: stays are
+    any `nights` nights between startDate and endDate (default: the next 30 days), and
+    priceMin/priceMax bound their average nightly price. Otherwise, with totalMin or
+    totalMax, the stay is startDate to endDate.
+    Other searches are returned unchanged, with None.
+    """
+    total_min, total_max = decimal_param(params, "totalMin"), decimal_param(params, "totalMax")
+    if params.get("nights"):
+        try:
+            nights = int(params["nights"])
+        except ValueError:
+            raise ValidationError("nights must be an integer.")
+        if nights < 1:
+            raise ValidationError("nights must be positive.")
+        start, end = window(params.get("startDate"), params.get("endDate"))
+        price_min, price_max = decimal_param(params, "priceMin"), decimal_param(params, "priceMax")
+        if price_min is not None:
+            total_min = price_min * nights if total_min is None else max(total_min, price_min * nights)
+        if price_max is not None:
+            total_max = price_max * nights if total_max is None else min(total_max, price_max * nights)
+    elif total_min is not None or total_max is not None:
+        if not (params.get("startDate") and params.get("endDate")):
+            raise ValidationError("totalMin and totalMax need startDate and endDate.")
+        start, end = window(params["startDate"], params["endDate"])
+        nights = (end - start).days
+    else:
+        return rooms, None
+
+    limit = getattr(settings, 'FLEXIBLE_SEARCH_MAX_ROOMS', FLEXIBLE_MAX_ROOMS)
+    candidates = list(rooms.order_by('id').values_list('id', 'price_per_night')[:limit + 1])
+    if len(candidates) > limit:
+        raise ValidationError(f"A search pricing stays covers at most {limit} rooms; add filters.")
+    room_ids = [room_id for room_id, _ in candidates]
+    prices = [price for _, price in candidates]
+    stays = stay_windows(
+        room_ids, prices, start, end, nights, params.get("flexible") or "cheapest",
+        total_min, total_max, rooms.order_by().values('id') if len(room_ids) > ROOM_LIST_MAX else None,
+    )
+    return rooms.filter(pk__in=list(stays)), stays
+
+
+def price_bucket(value):
+    if not value:
+        return DEFAULT_PRICE_BUCKET
+    try:
+        bucket = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError("price_bucket must be a number.")
+    if bucket <= 0:
+        raise ValidationError("price_bucket must be positive.")
+    return bucket
+
+
+def search_facets(rooms, bucket=DEFAULT_PRICE_BUCKET):
+    """
+    Room counts per city, hotel type, room type and price bucket for a search.
+    All facets come from one grouped query over the filtered rooms; the per-facet
+    totals are folded from its (usually small) set of distinct combinations.
+    """
+    rows = rooms.order_by().annotate(
+        bucket=Floor(F('price_per_night') / Value(bucket))
+    ).values(*FACET_COLUMNS.values(), 'bucket').annotate(count=Count('id'))
+
+    counts = {facet: Counter() for facet in FACET_COLUMNS}
+    histogram = Counter()
+    for row in rows:
+        for facet, column in FACET_COLUMNS.items():
+            counts[facet][row[column]] += row['count']
+        histogram[int(row['bucket'])] += row['count']
+
+    facets = {
+        facet: [{"value": value, "count": count} for value, count in counter.most_common()]
+        for facet, counter in counts.items()
+    }
+    facets["price"] = [
+        {"min": str(bucket * index), "max": str(bucket * (index + 1)), "count": histogram[index]}
+        for index in sorted(histogram)
+    ]
+    return facets
@@ -0,0 +1,213 @@
+from datetime import timedelta
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max, Min
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from bookings.models import Booking
+from hotels.cache import search_cache
+from hotels.models import Hotel
+from rooms.models import Room
+import django
+import itertools
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures latency percentiles, query counts and peak memory of the main API endpoints "
+        "against the configured database and writes a JSON report (see generate_fixtures)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', help="Report path; the report goes to stdout otherwise.")
+        parser.add_argument('--compare', help="Previous report to compare against.")
+        parser.add_argument('--label', default='', help="Free-form label stored in the report, e.g. a commit.")
+        parser.add_argument('--endpoint', action='append', help="Only run this endpoint (repeatable).")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 2:
+            raise CommandError("--iterations must be at least 2.")
+        endpoints = self.endpoints()
+        if options['endpoint']:
+            unknown = set(options['endpoint']) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}. Known: {', '.join(endpoints)}.")
+            endpoints = {name: endpoints[name] for name in options['endpoint']}
+        if settings.DEBUG:
+            self.stderr.write("DEBUG is on: every query is recorded, timings are pessimistic.")
+
+        counter = itertools.count()
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            try:
+                for name, (user, call) in endpoints.items():
+                    client = Client()
+                    if user is not None:
+                        client.force_login(user)
+                    results[name] = self.measure(client, call, counter, options['iterations'], options['warmup'])
+            finally:
+                Booking.objects.filter(pk__in=self.created_bookings).delete()
+
+        report = {
+            'meta': {
+                'label': options['label'],
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'dataset': {
+                    'hotels': Hotel.objects.count(),
+                    'rooms': Room.objects.count(),
+                    'bookings': Booking.objects.count(),
+                },
+            },
+            'endpoints': results,
+        }
+        content = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(content + "\n")
+        else:
+            self.stdout.write(content)
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)['endpoints']
+        self.summary(results, previous)
+
+    def endpoints(self):
+        """
+        {name: (user or None, call(client, i))} of the benchmarked requests; `i` is unique per call.
+        """
+        owner_id = Hotel.objects.values('owner').annotate(n=Count('id')).order_by('-n', 'owner') \
+            .values_list('owner', flat=True).first()
+        guest_id = Booking.objects.values('user').annotate(n=Count('id')).order_by('-n', 'user') \
+            .values_list('user', flat=True).first()
+        if owner_id is None or guest_id is None:
+            raise CommandError("Nothing to benchmark; run generate_fixtures first.")
+        User = Booking._meta.get_field('user').related_model
+        owner, guest = User.objects.get(pk=owner_id), User.objects.get(pk=guest_id)
+
+        hotel_ids = list(Hotel.objects.order_by('id').values_list('id', flat=True)[:100])
+        cities = sorted(set(Hotel.objects.order_by('id').values_list('city', flat=True)[:1000]))
+        room_ids = list(Room.objects.order_by('id').values_list('id', flat=True)[:1000])
+        dates = Booking.objects.aggregate(first=Min('start_date'), last=Max('end_date'))
+        busy_day = dates['first'] + (dates['last'] - dates['first']) / 2
+        free_day = dates['last'] + timedelta(days=30)
+        self.created_bookings = []
+
+        def search(i, **params):
+            return f"/api/hotels/search/?{urlencode({'city': cities[i % len(cities)], **params})}"
+
+        def search_dates(client, i):
+            start = busy_day + timedelta(days=i % 30)
+            return client.get(search(i, startDate=start, endDate=start + timedelta(days=3)))
+
+        def search_flexible(client, i):
+            start = busy_day + timedelta(days=i % 30)
+            return client.get(search(i, startDate=start, endDate=start + timedelta(days=30), nights=3))
+
+        def create_booking(client, i):
+            # Every call books another room, or the same room on later dates.
+            start = free_day + timedelta(days=3 * (i // len(room_ids)))
+            response = client.post('/api/bookings/', {
+                'user_id': guest.pk,
+                'room_id': room_ids[i % len(room_ids)],
+                'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=2)).isoformat(),
+                'status': 'active',
+            }, content_type='application/json')
+            if response.status_code == 201:
+                self.created_bookings.append(response.json()['id'])
+            return response
+
+        def availability(client, i):
+            start = busy_day + timedelta(days=i % 30)
+            return client.get('/api/rooms/rooms/availability/', {
+                'rooms': ','.join(map(str, room_ids[:500])),
+                'start': start.isoformat(),
+                'end': (start + timedelta(days=365)).isoformat(),
+            })
+
+        def room_quote(client, i):
+            start = busy_day + timedelta(days=i % 30)
+            return client.get('/api/rooms/rooms/quote/', {
+                'rooms': ','.join(map(str, room_ids[:500])),
+                'start': start.isoformat(),
+                'end': (start + timedelta(days=7)).isoformat(),
+            })
+
+        return {
+            'search': (None, lambda client, i: client.get(search(i))),
+            'search_dates': (None, search_dates),
+            'search_flexible': (None, search_flexible),
+            'hotel_list': (None, lambda client, i: client.get('/api/hotels/hotels/')),
+            'hotel_detail': (None, lambda client, i: client.get(f"/api/hotels/hotels/{hotel_ids[i % len(hotel_ids)]}/")),
+            'availability': (None, availability),
+            'room_quote': (None, room_quote),
+            'booking_create': (guest, create_booking),
+            'bookings_me': (guest, lambda client, i: client.get('/api/bookings/me/')),
+            'bookings_owner': (owner, lambda client, i: client.get('/api/bookings/owner/')),
+        }
+
+    def measure(self, client, call, counter, iterations, warmup):
+        statuses = []
+
+        def run():
+            # Searches are measured uncached.
+            search_cache().clear()
+            started = time.perf_counter()
+            response = call(client, next(counter))
+            elapsed = time.perf_counter() - started
+            statuses.append(response.status_code)
+            return elapsed
+
+        for _ in range(warmup):
+            run()
+        del statuses[:]
+        timings = [run() * 1000 for _ in range(iterations)]
+
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+        result = {f"p{p}_ms": round(cuts[p - 1], 3) for p in PERCENTILES}
+        result.update({
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'queries': len(queries.captured_queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'errors': sum(1 for status in statuses if status >= 400),
+        })
+        return result
+
+    def summary(self, results, previous=None):
+        columns = ('p50_ms', 'p95_ms', 'queries', 'peak_memory_kb')
+        self.stderr.write(f"{'endpoint':<16}" + "".join(f"{column:>24}" for column in columns))
+        for name, result in results.items():
+            cells = []
+            for column in columns:
+                cell = f"{result[column]:,}"
+                old = (previous or {}).get(name, {}).get(column)
+                if old:
+                    cell += f" ({(result[column] - old) / old:+.0%})"
+                cells.append(f"{cell:>24}")
+            errors = f"  {result['errors']} errors" if result['errors'] else ""
+            self.stderr.write(f"{name:<16}" + "".join(cells) + errors)
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from backend_service.benchmark import best_time, generate_catalog
+from backend_service.compiled import compile_serializer
+from backend_service.renderers import FastJSONRenderer, MessagePackRenderer
+from bookings.models import Booking
+from hotels.models import Hotel
+from hotels.serializers import HotelSerializer
+import json
+import msgpack
+
+
+def django_json(data):
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class Command(BaseCommand):
+    help = "Compares encoded size and encode time of the response renderers on hotel payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=200,
+                            help="Number of generated hotels (rolled back afterwards); 0 uses the existing data.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['synthetic']:
+                generate_catalog(options['synthetic'])
+            payloads = self.payloads()
+            transaction.set_rollback(True)
+
+        encoders = [
+            ('DRF JSONRenderer', JSONRenderer().render),
+            ('JsonResponse encoder', django_json),
+            ('FastJSONRenderer', FastJSONRenderer().render),
+            ('MessagePackRenderer', MessagePackRenderer().render),
+        ]
+        for name, data in payloads:
+            expected = json.loads(JSONRenderer().render(data))
+            if json.loads(FastJSONRenderer().render(data)) != expected:
+                raise CommandError(f"{name}: FastJSONRenderer output differs from JSONRenderer.")
+            if msgpack.unpackb(MessagePackRenderer().render(data)) != expected:
+                raise CommandError(f"{name}: MessagePackRenderer output differs from JSONRenderer.")
+
+            self.stdout.write(f"{name}:")
+            baseline = None
+            for encoder_name, encode in encoders:
+                size = len(encode(data))
+                elapsed = best_time(lambda: encode(data), options['repeat'])
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"  {encoder_name:<22} {size:>12,} bytes {elapsed * 1000:>9.2f} ms {baseline / elapsed:>6.1f}x"
+                )
+
+    def payloads(self):
+        """
+        The hotel list as the API returns it, and raw rows with Decimal and datetime values.
+        """
+        context = {'request': RequestFactory().get('/')}
+        hotels = compile_serializer(HotelSerializer).serialize(Hotel.objects.order_by('id'), context)
+        rows = list(Booking.objects.order_by('id').values(
+            'id', 'start_date', 'end_date', 'created_at', 'status',
+            'room__name', 'room__price_per_night', 'room__hotel__name', 'room__hotel__city',
+        ))
+        if not hotels:
+            raise CommandError("No hotels to encode; pass --synthetic N.")
+        return [('hotel list', hotels), ('booking rows', rows)]
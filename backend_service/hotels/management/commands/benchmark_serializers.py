@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from backend_service.benchmark import best_time, generate_catalog
+from backend_service.compiled import compile_serializer
+from backend_service.prefetch import plan_queryset
+from bookings.models import Booking
+from bookings.serializers import MyBookingsSerializer
+from hotels.models import Hotel, Image as HotelImage
+from hotels.serializers import HotelSerializer, ImageSerializer
+from rooms.models import Room
+from rooms.serializers import RoomSerializer
+
+BENCHMARKS = [
+    ('rooms', RoomSerializer, Room.objects.order_by('id')),
+    ('hotels', HotelSerializer, Hotel.objects.order_by('id')),
+    ('hotel images', ImageSerializer, HotelImage.objects.order_by('id')),
+    ('bookings', MyBookingsSerializer, Booking.objects.order_by('id')),
+]
+
+
+class Command(BaseCommand):
+    help = "Compares rows per second of DRF serializers and their compiled read-only form."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help="Benchmark N generated hotels (rolled back afterwards) instead of the existing data.")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--min-speedup', type=float, default=0,
+                            help="Fail when a compiled serializer is not at least this many times faster.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['synthetic']:
+                generate_catalog(options['synthetic'])
+            failures = [name for name, speedup in self.run(options['repeat']) if speedup < options['min_speedup']]
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(f"Speedup below {options['min_speedup']}x for: {', '.join(failures)}")
+
+    def run(self, repeat):
+        context = {'request': RequestFactory().get('/')}
+        renderer = JSONRenderer()
+        for name, serializer_class, queryset in BENCHMARKS:
+            compiled = compile_serializer(serializer_class)
+            if compiled is None:
+                self.stdout.write(f"{name}: {serializer_class.__name__} cannot be compiled, skipped.")
+                continue
+
+            def drf():
+                return serializer_class(plan_queryset(queryset.all(), serializer_class), many=True, context=context).data
+
+            def fast():
+                return compiled.serialize(plan_queryset(queryset.all(), serializer_class), context)
+
+            rows = queryset.count()
+            if not rows:
+                self.stdout.write(f"{name}: no rows, skipped.")
+                continue
+            if renderer.render(drf()) != renderer.render(fast()):
+                raise CommandError(f"{name}: compiled output differs from {serializer_class.__name__}.")
+
+            drf_rate = rows / best_time(drf, repeat)
+            fast_rate = rows / best_time(fast, repeat)
+            speedup = fast_rate / drf_rate
+            self.stdout.write(
+                f"{name}: {rows} rows, DRF {drf_rate:,.0f} rows/s, compiled {fast_rate:,.0f} rows/s, {speedup:.1f}x"
+            )
+            yield name, speedup
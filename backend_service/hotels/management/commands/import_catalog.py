@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from hotels.catalog import CatalogImporter, batches, read_records
+import json
+import os
+import sys
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a hotel catalogue from a CSV or JSON Lines file (or '-' for stdin), "
+        "upserting hotels and rooms by external_id in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help="Input format; defaults to csv for *.csv files and jsonl otherwise.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--owner', help="Email of the owner of hotels without an owner column.")
+        parser.add_argument('--create-types', action='store_true',
+                            help="Create missing hotel and room types instead of rejecting their records.")
+        parser.add_argument('--state',
+                            help="Progress file; defaults to <path>.progress (required when reading stdin).")
+        parser.add_argument('--resume', action='store_true',
+                            help="Skip the records imported by a previous, interrupted run.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        state_path = options['state'] or (None if path == '-' else f"{path}.progress")
+        if options['resume'] and not state_path:
+            raise CommandError("--resume needs --state when reading stdin.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        input_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+
+        skip = self.read_state(state_path) if options['resume'] else 0
+        importer = CatalogImporter(
+            default_owner=options['owner'],
+            create_types=options['create_types'],
+            on_error=lambda error: self.stderr.write(f"Rejected {error}"),
+        )
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        started = time.perf_counter()
+        done = skip
+        try:
+            records = read_records(stream, input_format)
+            if skip:
+                self.stdout.write(f"Resuming after {skip} records.")
+                records = (record for position, record in enumerate(records) if position >= skip)
+            for batch in batches(records, options['batch_size']):
+                with transaction.atomic():
+                    importer.import_batch(batch)
+                done += len(batch)
+                self.write_state(state_path, done)
+                if options['verbosity'] >= 1:
+                    records_done = importer.counts['records']
+                    self.stdout.write(f"{records_done:,} records, {records_done / (time.perf_counter() - started):,.0f} records/s")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if state_path and os.path.exists(state_path):
+            os.remove(state_path)
+        self.report(importer.counts, time.perf_counter() - started)
+
+    def read_state(self, state_path):
+        if not os.path.exists(state_path):
+            return 0
+        with open(state_path) as f:
+            return json.load(f)['records']
+
+    def write_state(self, state_path, records):
+        if not state_path:
+            return
+        with open(f"{state_path}.tmp", 'w') as f:
+            json.dump({'records': records}, f)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    def report(self, counts, elapsed):
+        rate = counts['records'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Hotels: {counts['hotels_created']:,} created, {counts['hotels_updated']:,} updated. "
+            f"Rooms: {counts['rooms_created']:,} created, {counts['rooms_updated']:,} updated. "
+            f"Rejected: {counts['rejected']:,}."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['records']:,} records in {elapsed:.1f} s ({rate:,.0f} records/s)."
+        ))
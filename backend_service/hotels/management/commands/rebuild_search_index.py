@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from hotels.search import rebuild_index, use_fulltext
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the n-gram search index over hotels, rooms and their types."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if use_fulltext():
+            self.stdout.write("MySQL FULLTEXT indexes are maintained by the database, nothing to rebuild.")
+            return
+        created = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {created} postings."))
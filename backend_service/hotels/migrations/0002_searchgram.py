@@ -0,0 +1,79 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+FULLTEXT_COLUMNS = [
+    ('hotels_hotel', 'name'),
+    ('hotels_hotel', 'city'),
+    ('hotels_hotel', 'country'),
+    ('hotels_hoteltype', 'name'),
+    ('rooms_room', 'name'),
+    ('rooms_roomtype', 'name'),
+]
+
+# Frozen copy of hotels.search.GRAM_SIZE and grams(): this migration builds the index as
+# it was when SearchGram was created (gram max_length=3), whatever the app code becomes.
+GRAM_SIZE = 3
+
+INDEXED_FIELDS = [
+    ('hotels', 'Hotel', 'name', 'hotel_name'),
+    ('hotels', 'Hotel', 'city', 'city'),
+    ('hotels', 'Hotel', 'country', 'country'),
+    ('hotels', 'HotelType', 'name', 'hotel_type'),
+    ('rooms', 'Room', 'name', 'room_name'),
+    ('rooms', 'RoomType', 'name', 'room_type'),
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for table, column in FULLTEXT_COLUMNS:
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD FULLTEXT INDEX {table}_{column}_ft ({column}) WITH PARSER ngram"
+            )
+
+    # Filled whatever SEARCH_FULLTEXT says: the schema a migration leaves must not depend
+    # on runtime settings. Fulltext searches leave the table unused and unmaintained, so
+    # switching the setting off still calls for rebuild_search_index.
+    SearchGram = apps.get_model('hotels', 'SearchGram')
+    postings = []
+    for app_label, model_name, column, field in INDEXED_FIELDS:
+        for pk, text in apps.get_model(app_label, model_name).objects.values_list('pk', column).iterator():
+            text = (text or '').lower()
+            doc_grams = {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+            postings.extend(
+                SearchGram(field=field, gram=gram, object_id=pk, weight=1.0 / len(doc_grams))
+                for gram in doc_grams
+            )
+    SearchGram.objects.bulk_create(postings, batch_size=1000)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        for table, column in FULLTEXT_COLUMNS:
+            schema_editor.execute(f"ALTER TABLE {table} DROP INDEX {table}_{column}_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0001_initial'),
+        ('rooms', '0002_alter_room_total_bookings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=20)),
+                ('gram', models.CharField(max_length=GRAM_SIZE)),
+                ('object_id', models.BigIntegerField()),
+                ('weight', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['field', 'gram', 'object_id'], name='hotels_gram_lookup_idx'), models.Index(fields=['field', 'object_id'], name='hotels_gram_object_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -34,6 +34,7 @@ class Hotel(models.Model):
     rating = models.SmallIntegerField(blank=True, null=True, validators=[MinValueValidator(1), MaxValueValidator(5)])
     type = models.ForeignKey(HotelType, on_delete=models.SET_NULL, null=True, related_name='hotels')
     preview_image = models.ImageField(upload_to=preview_image_upload_path, blank=True, null=True)
+    external_id = models.CharField(max_length=100, unique=True, blank=True, null=True)
 
     def __str__(self):
         return self.name
@@ -46,3 +47,35 @@ class Image(models.Model):
 
     def __str__(self):
         return f"Image for Hotel: {self.hotel}"
+
+
+class SearchGram(models.Model):
+    """
+    Posting of the n-gram inverted index used by search_accommodations.
+    `object_id` points to the row of the model that owns `field` (see hotels.search.FIELDS).
+    """
+    field = models.CharField(max_length=20)
+    gram = models.CharField(max_length=3)
+    object_id = models.BigIntegerField()
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['field', 'gram', 'object_id'], name='hotels_gram_lookup_idx'),
+            models.Index(fields=['field', 'object_id'], name='hotels_gram_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.field}:{self.gram} -> {self.object_id}"
+
+
+class ResourceVersion(models.Model):
+    """
+    Change counter of an API resource (e.g. "hotel:12" or the "rooms" collection),
+    bumped when the rows behind it change. See backend_service.versions.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
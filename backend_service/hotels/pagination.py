@@ -0,0 +1,88 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError("Invalid cursor.")
+    return values
+
+
+def page_size(value):
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValidationError("limit must be an integer.")
+    if size < 1:
+        raise ValidationError("limit must be positive.")
+    return min(size, MAX_PAGE_SIZE)
+
+
+def after(ordering, values):
+    """
+    Keyset condition selecting rows strictly after `values` in `ordering`.
+    """
+    condition = Q()
+    for i, (key, value) in enumerate(zip(ordering, values)):
+        field = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        step = Q(**{f"{field}__{lookup}": value})
+        for prev_key, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_key.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def paginate(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Returns one page of an ordered queryset and the cursor of the next page (or None).
+    The queryset ordering must end with a unique column so that keys are total.
+    """
+    ordering = queryset.query.order_by
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(cursor, len(ordering))))
+
+    items = list(queryset[:limit + 1])
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor([getattr(last, key.lstrip('-')) for key in ordering])
+
+
+def paginate_keys(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Like paginate(), but only reads the primary keys of the page (with the ordering
+    columns), so that the caller can load the rows in whatever form it needs.
+    """
+    ordering = queryset.query.order_by
+    keys = [key.lstrip('-') for key in ordering]
+    if cursor:
+        queryset = queryset.filter(after(ordering, decode_cursor(cursor, len(ordering))))
+
+    rows = list(queryset.values_list('pk', *keys)[:limit + 1])
+    if len(rows) <= limit:
+        return [row[0] for row in rows], None
+
+    rows = rows[:limit]
+    return [row[0] for row in rows], encode_cursor(list(rows[-1][1:]))
@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import FloatField, OuterRef, Subquery, Sum, Count, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from .models import Hotel, HotelType, SearchGram
+from rooms.models import Room, RoomType
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRAM_SIZE = 3
+
+# Search field -> (model, column, lookup path from Hotel, lookup path from RoomSearchDocument)
+FIELDS = {
+    'hotel_name': (Hotel, 'name', 'pk', 'hotel_id'),
+    'city': (Hotel, 'city', 'pk', 'hotel_id'),
+    'country': (Hotel, 'country', 'pk', 'hotel_id'),
+    'hotel_type': (HotelType, 'name', 'type_id', 'hotel_type_id'),
+    'room_name': (Room, 'name', None, 'pk'),
+    'room_type': (RoomType, 'name', None, 'type_id'),
+}
+
+HOTEL_PATH = 2
+ROOM_PATH = 3
+
+
+def use_fulltext():
+    return connection.vendor == 'mysql' and settings.SEARCH_FULLTEXT
+
+
+def grams(text):
+    text = (text or "").lower()
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def fields_of(model):
+    return [(field, column) for field, (owner, column, *_) in FIELDS.items() if owner is model]
+
+
+def build_postings(field, object_id, text):
+    doc_grams = grams(text)
+    if not doc_grams:
+        return []
+    weight = 1.0 / len(doc_grams)
+    return [
+        SearchGram(field=field, gram=gram, object_id=object_id, weight=weight)
+        for gram in doc_grams
+    ]
+
+
+def index_object(instance):
+    """
+    Re-indexes every search field owned by the instance's model.
+    """
+    index_objects(type(instance), [instance])
+
+
+def index_objects(model, instances):
+    """
+    Re-indexes a batch of instances of `model` with one DELETE and one INSERT.
+    """
+    if use_fulltext():
+        return
+    fields = fields_of(model)
+    with transaction.atomic():
+        SearchGram.objects.filter(
+            field__in=[f for f, _ in fields],
+            object_id__in=[instance.pk for instance in instances]
+        ).delete()
+        postings = []
+        for instance in instances:
+            for field, column in fields:
+                postings.extend(build_postings(field, instance.pk, getattr(instance, column)))
+        SearchGram.objects.bulk_create(postings)
+
+
+def unindex_object(instance):
+    if use_fulltext():
+        return
+    fields = [f for f, _ in fields_of(type(instance))]
+    SearchGram.objects.filter(field__in=fields, object_id=instance.pk).delete()
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Drops the n-gram index and rebuilds it from hotels, rooms and their types.
+    """
+    created = 0
+    with transaction.atomic():
+        SearchGram.objects.all().delete()
+        for model in (HotelType, Hotel, RoomType, Room):
+            fields = fields_of(model)
+            batch = []
+            rows = model.objects.order_by('pk').values_list('pk', *[c for _, c in fields])
+            for pk, *texts in rows.iterator(chunk_size=batch_size):
+                for (field, _), text in zip(fields, texts):
+                    batch.extend(build_postings(field, pk, text))
+                if len(batch) >= batch_size:
+                    SearchGram.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            SearchGram.objects.bulk_create(batch)
+            created += len(batch)
+    logger.info(f"Search index rebuilt: {created} postings")
+    return created
+
+
+def fulltext_condition(column, text):
+    return f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE)", ['"{}"'.format(text.replace('"', ' '))]
+
+
+def matching_ids(field, text):
+    """
+    Ids of the rows owning `field` whose text contains `text` (case-insensitive).
+    Candidates come from the index; the final icontains check runs on candidates only.
+    """
+    model, column, *_ = FIELDS[field]
+    exact = {f"{column}__icontains": text}
+    if len(text) < GRAM_SIZE:
+        return model.objects.filter(**exact).values('pk')
+
+    if use_fulltext():
+        sql, params = fulltext_condition(column, text)
+        return model.objects.alias(
+            score=RawSQL(sql, params, output_field=FloatField())
+        ).filter(score__gt=0, **exact).values('pk')
+
+    query_grams = grams(text)
+    candidates = SearchGram.objects.filter(
+        field=field,
+        gram__in=query_grams
+    ).values('object_id').annotate(
+        hits=Count('id')
+    ).filter(hits=len(query_grams)).values('object_id')
+    return model.objects.filter(pk__in=candidates, **exact).values('pk')
+
+
+def relevance(field, text, path):
+    """
+    Relevance score of `text` against `field`, as an expression evaluated through `path`.
+    """
+    model, column, *_ = FIELDS[field]
+    if use_fulltext():
+        sql, params = fulltext_condition(column, text)
+        score = model.objects.filter(pk=OuterRef(path)).annotate(
+            score=RawSQL(sql, params, output_field=FloatField())
+        ).values('score')
+    else:
+        score = SearchGram.objects.filter(
+            field=field,
+            gram__in=grams(text),
+            object_id=OuterRef(path)
+        ).values('object_id').annotate(score=Sum('weight')).values('score')
+    return Coalesce(Subquery(score, output_field=FloatField()), Value(0.0))
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from .models import Hotel, HotelType, Image
 from rooms.serializers import RoomSerializer
+from backend_service.bulk import PreloadedPrimaryKeyRelatedField
 
 
 class ImageSerializer(serializers.ModelSerializer):
+    hotel = PreloadedPrimaryKeyRelatedField(queryset=Hotel.objects.all())
+
     class Meta:
         model = Image
         fields = ('id', 'image', 'uploaded_at', 'hotel')
@@ -29,3 +32,4 @@ class HotelSerializer(serializers.ModelSerializer):
         model = Hotel
         fields = ('id', 'name', 'owner', 'address', 'city', 'country', 'description', 'type', 'rooms', 'images', 'preview_image')
         read_only_fields = ['id', 'owner', 'rooms', 'images']
+        select_related = ('type',)
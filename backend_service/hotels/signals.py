@@ -0,0 +1,111 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Hotel, HotelType, Image
+from .search import index_object, index_objects, unindex_object
+from .cache import invalidate_cities, invalidate_hotels, invalidate_all
+from rooms.documents import refresh_hotel, refresh_hotel_type, refresh_rooms
+from rooms.models import Room
+from backend_service.bulk import affected_ids, bulk_saved
+from backend_service.versions import CATALOG, bump
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=HotelType)
+def update_search_index(sender, instance, **kwargs):
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Hotel)
+@receiver(post_delete, sender=HotelType)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+@receiver(pre_save, sender=Hotel)
+def remember_hotel_city(sender, instance, **kwargs):
+    instance._previous_city = Hotel.objects.filter(pk=instance.pk).values_list('city', flat=True).first()
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def invalidate_hotel_searches(sender, instance, **kwargs):
+    invalidate_cities(instance.city, getattr(instance, '_previous_city', None))
+
+
+@receiver(post_save, sender=HotelType)
+@receiver(post_delete, sender=HotelType)
+def invalidate_hotel_type_searches(sender, instance, **kwargs):
+    invalidate_all()
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_hotel_image_searches(sender, instance, **kwargs):
+    invalidate_hotels(instance.hotel_id)
+
+
+@receiver(post_save, sender=Hotel)
+def update_room_documents(sender, instance, **kwargs):
+    refresh_hotel(instance)
+
+
+@receiver(post_save, sender=HotelType)
+def update_hotel_type_documents(sender, instance, **kwargs):
+    refresh_hotel_type(instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=HotelType)
+def clear_hotel_type_documents(sender, instance, **kwargs):
+    refresh_hotel_type(instance.pk, None)
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def bump_hotel_versions(sender, instance, **kwargs):
+    room_keys = [f"room:{pk}" for pk in Room.objects.filter(hotel_id=instance.pk).values_list('pk', flat=True)]
+    bump(f"hotel:{instance.pk}", "hotels", "rooms", *room_keys)
+
+
+@receiver(post_save, sender=HotelType)
+@receiver(post_delete, sender=HotelType)
+def bump_hotel_type_versions(sender, instance, **kwargs):
+    bump(CATALOG)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def bump_hotel_image_versions(sender, instance, **kwargs):
+    bump(f"hotel_image:{instance.pk}", "hotel_images", f"hotel:{instance.hotel_id}", "hotels")
+
+
+@receiver(bulk_saved, sender=Image)
+def invalidate_bulk_hotel_image_searches(sender, instances, previous, **kwargs):
+    invalidate_hotels(*affected_ids('hotel_id', instances, previous))
+
+
+@receiver(bulk_saved, sender=Image)
+def bump_bulk_hotel_image_versions(sender, instances, previous, **kwargs):
+    hotel_keys = [f"hotel:{pk}" for pk in affected_ids('hotel_id', instances, previous)]
+    bump(*[f"hotel_image:{image.pk}" for image in instances], "hotel_images", *hotel_keys, "hotels")
+
+
+@receiver(bulk_saved, sender=Hotel)
+def update_bulk_search_index(sender, instances, **kwargs):
+    index_objects(Hotel, instances)
+
+
+@receiver(bulk_saved, sender=Hotel)
+def invalidate_bulk_hotel_searches(sender, instances, previous, **kwargs):
+    invalidate_cities(*[hotel.city for hotel in [*instances, *previous.values()]])
+
+
+@receiver(bulk_saved, sender=Hotel)
+def update_bulk_room_documents(sender, instances, previous, **kwargs):
+    if previous:
+        refresh_rooms(Room.objects.filter(hotel_id__in=list(previous)).values('pk'))
+
+
+@receiver(bulk_saved, sender=Hotel)
+def bump_bulk_hotel_versions(sender, instances, previous, **kwargs):
+    room_keys = [f"room:{pk}" for pk in Room.objects.filter(hotel_id__in=list(previous)).values_list('pk', flat=True)]
+    bump(*[f"hotel:{hotel.pk}" for hotel in instances], "hotels", "rooms", *room_keys)
@@ -1,3 +1,318 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
 from django.test import TestCase
+from auth_app.models import CustomUser
+from bookings.reservations import reserve
+from rooms.models import Room, RoomRate, RoomSearchDocument, RoomType
+from .cache import search_cache
+from .catalog import CatalogImporter
+from .models import Hotel, HotelType
+import json
+import os
+import tempfile
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = CustomUser.objects.create_user('owner@example.com', 'pw')
+        cls.guest = CustomUser.objects.create_user('guest@example.com', 'pw')
+        resort = HotelType.objects.create(name='Resort')
+        suite = RoomType.objects.create(name='Suite')
+        cls.hotels = [
+            Hotel.objects.create(owner=owner, name='Grand Barcelona', address='Rambla 1', city='Barcelona', country='Spain', type=resort),
+            Hotel.objects.create(owner=owner, name='Paris Inn', address='Rue 2', city='Paris', country='France', type=resort),
+        ]
+        # Prices repeat, so that pages break inside runs of equal prices.
+        cls.rooms = [
+            Room.objects.create(hotel=cls.hotels[i % 2], type=suite, name=f"Room {i}", price_per_night=Decimal(80 + 10 * (i % 3)))
+            for i in range(11)
+        ]
+
+    def setUp(self):
+        search_cache().clear()
+
+    def walk(self, params, key='rooms'):
+        """
+        Follows the search's `next` cursors and returns the ids of every page.
+        """
+        ids = []
+        cursor = None
+        while True:
+            page_params = {**params, 'limit': 4, 'show_rooms_only': 'true'}
+            if cursor:
+                page_params[f'{key}_cursor'] = cursor
+            response = self.client.get('/api/hotels/search/', page_params)
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            self.assertLessEqual(len(payload[key]), 4)
+            ids += [item['id'] for item in payload[key]]
+            cursor = payload['next'][key]
+            if not cursor:
+                return ids
+
+    def test_keyset_walk_is_complete_and_ordered(self):
+        rooms = Room.objects.all()
+        cases = {
+            '': rooms.order_by('id'),
+            'price_per_night': rooms.order_by('price_per_night', 'id'),
+            '-price_per_night': rooms.order_by('-price_per_night', '-id'),
+            'name': rooms.order_by('name', 'id'),
+        }
+        for sort, expected in cases.items():
+            params = {'sort': sort} if sort else {}
+            self.assertEqual(self.walk(params), list(expected.values_list('id', flat=True)), sort)
+
+    def test_keyset_walk_with_filters(self):
+        expected = Room.objects.filter(hotel__city='Paris', price_per_night__gte=90).order_by('price_per_night', 'id')
+        self.assertEqual(
+            self.walk({'city': 'paris', 'priceMin': '90', 'sort': 'price_per_night'}),
+            list(expected.values_list('id', flat=True)),
+        )
+
+    def search_rooms(self, city):
+        response = self.client.get('/api/hotels/search/', {'city': city, 'show_rooms_only': 'true', 'limit': 20})
+        self.assertEqual(response.status_code, 200)
+        return {room['id']: room['price_per_night'] for room in response.json()['rooms']}
+
+    def test_cached_search_is_invalidated_by_changes(self):
+        cache = search_cache()
+        paris, barcelona = self.search_rooms('Paris'), self.search_rooms('Barcelona')
+        hits = cache.stats()['hits']
+        self.assertEqual(self.search_rooms('paris'), paris)
+        self.assertEqual(cache.stats()['hits'], hits + 1)
+
+        room = self.rooms[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            room.price_per_night = Decimal('95.00')
+            room.save()
+        self.assertEqual(self.search_rooms('Paris'), {**paris, room.pk: '95.00'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added = Room.objects.create(hotel=self.hotels[1], name='Added', price_per_night=Decimal('70.00'))
+        self.assertEqual(self.search_rooms('Paris'), {**paris, room.pk: '95.00', added.pk: '70.00'})
+
+        # Searches of other cities stay cached.
+        hits = cache.stats()['hits']
+        self.assertEqual(self.search_rooms('Barcelona'), barcelona)
+        self.assertEqual(cache.stats()['hits'], hits + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotels[0].city = 'Madrid'
+            self.hotels[0].save()
+        self.assertEqual(self.search_rooms('Barcelona'), {})
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/hotels/search/', {'rooms_cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_flexible_search(self):
+        # Room 0 (80.00) is booked on 03-02; its free 2-night stays in 03-01..03-07 start
+        # on 03-03, 03-04 and 03-05, all at 160.00.
+        room = self.rooms[0]
+        reserve(self.guest, room, date(2025, 3, 2), date(2025, 3, 3))
+        params = {'nights': 2, 'startDate': '2025-03-01', 'endDate': '2025-03-07', 'show_rooms_only': 'true', 'limit': 20}
+        for extra in ({}, {'flexible': 'earliest'}):
+            response = self.client.get('/api/hotels/search/', {**params, **extra})
+            self.assertEqual(response.status_code, 200)
+            stays = {item['id']: item['stay'] for item in response.json()['rooms']}
+            self.assertEqual(len(stays), len(self.rooms))
+            self.assertEqual(stays[room.pk], {
+                'start_date': '2025-03-03', 'end_date': '2025-03-05', 'nights': 2, 'total_price': '160.00',
+            })
+
+        for extra in ({'priceMax': '79'}, {'totalMax': '159'}):
+            response = self.client.get('/api/hotels/search/', {**params, **extra})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['rooms'], [], extra)
+
+        response = self.client.get('/api/hotels/search/', {**params, 'nights': 6})
+        self.assertEqual(response.status_code, 200)
+        ids = [item['id'] for item in response.json()['rooms']]
+        self.assertEqual(sorted(ids), sorted(other.pk for other in self.rooms[1:]))
+
+    def test_flexible_search_with_rates(self):
+        # Room 0 (80.00) is booked on 03-02 and costs 150.00 on 03-03 and 03-04; its free
+        # 2-night stays in 03-01..03-07 start on 03-03 (300.00), 03-04 (230.00) and 03-05 (160.00).
+        room = self.rooms[0]
+        reserve(self.guest, room, date(2025, 3, 2), date(2025, 3, 3))
+        RoomRate.objects.create(room=room, start_date=date(2025, 3, 3), end_date=date(2025, 3, 5), price_per_night=Decimal('150.00'))
+        params = {'nights': 2, 'startDate': '2025-03-01', 'endDate': '2025-03-07', 'show_rooms_only': 'true', 'limit': 20}
+        cases = [
+            ({}, '2025-03-05', '160.00'),
+            ({'flexible': 'earliest'}, '2025-03-03', '300.00'),
+            ({'totalMin': '200'}, '2025-03-04', '230.00'),
+            # priceMin/priceMax bound the average nightly price of the stay.
+            ({'priceMin': '100'}, '2025-03-04', '230.00'),
+        ]
+        for extra, start_date, total in cases:
+            response = self.client.get('/api/hotels/search/', {**params, **extra})
+            self.assertEqual(response.status_code, 200)
+            stays = {item['id']: item['stay'] for item in response.json()['rooms']}
+            self.assertEqual(stays[room.pk]['start_date'], start_date, extra)
+            self.assertEqual(stays[room.pk]['total_price'], total, extra)
+
+        response = self.client.get('/api/hotels/search/', {**params, 'priceMax': '79'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rooms'], [])
+
+
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user('owner@example.com', 'pw')
+        other = CustomUser.objects.create_user('other@example.com', 'pw')
+        guest = CustomUser.objects.create_user('guest@example.com', 'pw')
+        inn = Hotel.objects.create(owner=cls.owner, name='Inn', address='Rue 2', city='Paris', country='France')
+        lodge = Hotel.objects.create(owner=cls.owner, name='Lodge', address='Rambla 1', city='Barcelona', country='Spain')
+        elsewhere = Hotel.objects.create(owner=other, name='Elsewhere', address='Main St', city='Rome', country='Italy')
+        cls.rooms = [
+            Room.objects.create(hotel=inn, name='Double', price_per_night=Decimal('100.00')),
+            Room.objects.create(hotel=inn, name='Single', price_per_night=Decimal('80.00')),
+            Room.objects.create(hotel=lodge, name='Bunk', price_per_night=Decimal('50.00')),
+        ]
+        foreign = Room.objects.create(hotel=elsewhere, name='Suite', price_per_night=Decimal('500.00'))
+        cls.hotels = [inn, lodge]
+        bookings = [
+            (cls.rooms[0], date(2025, 2, 27), date(2025, 3, 2), 'active'),
+            (cls.rooms[0], date(2025, 3, 2), date(2025, 3, 5), 'active'),
+            (cls.rooms[1], date(2025, 3, 4), date(2025, 3, 6), 'cancelled'),
+            (cls.rooms[1], date(2025, 3, 9), date(2025, 3, 13), 'active'),
+            (cls.rooms[2], date(2025, 3, 5), date(2025, 3, 6), 'confirmed'),
+            (foreign, date(2025, 3, 3), date(2025, 3, 4), 'active'),
+        ]
+        for room, start_date, end_date, status in bookings:
+            with cls.captureOnCommitCallbacks(execute=True):
+                reserve(guest, room, start_date, end_date, status=status)
+
+    def dashboard(self, **params):
+        self.client.force_login(self.owner)
+        return self.client.get('/api/hotels/hotels/dashboard/', {'start': '2025-03-01', 'end': '2025-03-11', **params})
+
+    def test_aggregates(self):
+        # Room nights in the window: Double 03-01 and 03-02..03-04, Single 03-09 and 03-10,
+        # Bunk 03-05; the cancelled booking and the other owner's hotel do not count.
+        response = self.dashboard()
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['days'], 10)
+        self.assertEqual(payload['totals'], {
+            'rooms': 3, 'booked_nights': 7, 'revenue': 610.0, 'check_ins': 3, 'occupancy': round(7 / 30, 4),
+        })
+        hotels = {hotel['id']: hotel for hotel in payload['hotels']}
+        self.assertEqual(list(hotels), [hotel.pk for hotel in self.hotels])
+        inn, lodge = hotels[self.hotels[0].pk], hotels[self.hotels[1].pk]
+        self.assertEqual(
+            (inn['room_count'], inn['booked_nights'], inn['revenue'], inn['check_ins'], inn['occupancy']),
+            (2, 6, 560.0, 2, 0.3),
+        )
+        self.assertEqual(
+            [(room['id'], room['booked_nights'], room['revenue'], room['check_ins'], room['occupancy']) for room in inn['rooms']],
+            [(self.rooms[0].pk, 4, 400.0, 1, 0.4), (self.rooms[1].pk, 2, 160.0, 1, 0.2)],
+        )
+        self.assertEqual(
+            (lodge['room_count'], lodge['booked_nights'], lodge['revenue'], lodge['check_ins'], lodge['occupancy']),
+            (1, 1, 50.0, 1, 0.1),
+        )
+
+    def test_check_ins(self):
+        response = self.dashboard(check_ins=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(booking['room'], booking['start_date']) for booking in response.json()['upcoming_check_ins']],
+            [(self.rooms[0].pk, '2025-03-02'), (self.rooms[2].pk, '2025-03-05')],
+        )
+
+    def test_requires_login_and_valid_window(self):
+        response = self.client.get('/api/hotels/hotels/dashboard/')
+        self.assertIn(response.status_code, (401, 403))
+        self.assertEqual(self.dashboard(end='2025-02-01').status_code, 400)
+
+
+class CatalogImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CustomUser.objects.create_user('owner@example.com', 'pw')
+        HotelType.objects.create(name='Resort')
+        RoomType.objects.create(name='Suite')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'catalog.jsonl')
+
+    def write(self, records):
+        with open(self.path, 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+
+    def records(self, price='100.00'):
+        return [
+            {'kind': 'hotel', 'external_id': 'h1', 'name': 'Inn', 'address': 'Rue 2', 'city': 'Paris',
+             'country': 'France', 'owner': 'owner@example.com', 'type': 'Resort'},
+            {'kind': 'room', 'external_id': 'r1', 'hotel': 'h1', 'name': 'Double', 'price_per_night': price, 'type': 'Suite'},
+            {'kind': 'room', 'external_id': 'r2', 'hotel': 'h1', 'name': 'Single', 'price_per_night': '80.00'},
+            {'kind': 'hotel', 'external_id': 'h2', 'name': 'Lodge', 'address': 'Rambla 1', 'city': 'Barcelona',
+             'country': 'Spain', 'owner': 'owner@example.com'},
+            {'kind': 'room', 'external_id': 'r3', 'hotel': 'h2', 'name': 'Bunk', 'price_per_night': '50.00', 'is_available': 'no'},
+            {'kind': 'room', 'external_id': 'r4', 'hotel': 'missing', 'name': 'Lost', 'price_per_night': '10.00'},
+        ]
+
+    def import_catalog(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_catalog', self.path, '--batch-size', '2', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def rooms(self):
+        return list(Room.objects.order_by('external_id').values_list(
+            'external_id', 'hotel__external_id', 'name', 'price_per_night', 'is_available', 'type__name'))
+
+    def test_import_and_reimport(self):
+        self.write(self.records())
+        stdout, stderr = self.import_catalog()
+        self.assertIn("Hotels: 2 created, 0 updated. Rooms: 3 created, 0 updated. Rejected: 1.", stdout)
+        self.assertIn("record 6: hotel: Unknown hotel 'missing'.", stderr)
+        self.assertFalse(os.path.exists(f"{self.path}.progress"))
+        self.assertEqual(self.rooms(), [
+            ('r1', 'h1', 'Double', Decimal('100.00'), True, 'Suite'),
+            ('r2', 'h1', 'Single', Decimal('80.00'), True, None),
+            ('r3', 'h2', 'Bunk', Decimal('50.00'), False, None),
+        ])
+
+        self.write(self.records(price='120.00'))
+        stdout, _ = self.import_catalog()
+        self.assertIn("Hotels: 0 created, 2 updated. Rooms: 0 created, 3 updated. Rejected: 1.", stdout)
+        self.assertEqual(Hotel.objects.count(), 2)
+        self.assertEqual(self.rooms()[0], ('r1', 'h1', 'Double', Decimal('120.00'), True, 'Suite'))
+        self.assertEqual(RoomSearchDocument.objects.get(pk=Room.objects.get(external_id='r1').pk).price_per_night, Decimal('120.00'))
+
+    def test_resume_after_interruption(self):
+        self.write(self.records())
+        import_batch = CatalogImporter.import_batch
+        calls = []
+
+        def interrupted(importer, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            import_batch(importer, batch)
+
+        with mock.patch.object(CatalogImporter, 'import_batch', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.import_catalog()
+        with open(f"{self.path}.progress") as f:
+            self.assertEqual(json.load(f), {'records': 2})
+        self.assertEqual([room[0] for room in self.rooms()], ['r1'])
+
+        # Records already imported are skipped: changes to them are not applied.
+        records = self.records()
+        records[1]['name'] = 'Renamed'
+        self.write(records)
+        stdout, _ = self.import_catalog('--resume')
+        self.assertIn("Resuming after 2 records.", stdout)
+        self.assertIn("Hotels: 1 created, 0 updated. Rooms: 2 created, 0 updated. Rejected: 1.", stdout)
+        self.assertEqual([room[:3] for room in self.rooms()], [('r1', 'h1', 'Double'), ('r2', 'h1', 'Single'), ('r3', 'h2', 'Bunk')])
+        self.assertFalse(os.path.exists(f"{self.path}.progress"))
 
-# Create your tests here.
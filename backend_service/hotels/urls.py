@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import HotelViewSet, HotelTypeViewSet, ImageViewSet, search_view
+from .views import HotelViewSet, HotelTypeViewSet, ImageViewSet, search_view, async_search_view, search_cache_stats_view
 
 router = DefaultRouter()
 router.register('types', HotelTypeViewSet, basename='hotel-type')
@@ -9,5 +9,7 @@ router.register('images', ImageViewSet, basename='image')
 
 urlpatterns = [
     path('search/', search_view, name='search'),
+    path('search/async/', async_search_view, name='search-async'),
+    path('search/cache/', search_cache_stats_view, name='search-cache-stats'),
     path('', include(router.urls)),
 ]
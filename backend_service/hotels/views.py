@@ -2,68 +2,272 @@ from rest_framework.response import Response
 from django.http import JsonResponse
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db import DatabaseError
+from django.db import DatabaseError, close_old_connections
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ValidationError
 from .models import Hotel, HotelType, Image
 from .serializers import HotelSerializer, HotelTypeSerializer, ImageSerializer
-from rooms.serializers import RoomSerializer
-from .filters import search_accommodations
+from rooms.serializers import RoomDocumentSerializer, RoomStaySerializer
+from .filters import search_accommodations, stay_search, search_facets, price_bucket
+from .pagination import page_size, paginate, paginate_keys
+from .cache import search_cache, search_key, search_tags
+from .dashboard import check_in_limit, owner_dashboard
+from backend_service.bulk import BulkWriteMixin
+from backend_service.compiled import compile_serializer
+from backend_service.dates import window
+from backend_service.fieldsets import ALL_PLAIN, SparseFieldsetMixin, fieldset, freeze, sparse_serializer
+from backend_service.prefetch import PrefetchPlanMixin, plan_queryset
+from backend_service.renderers import payload_response
+from backend_service.versions import CATALOG, ConditionalGetMixin
+from backend_service.streaming import StreamingListMixin, StreamedList, streaming_json_response
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def search_options(request):
+    """
+    Splits the query string into search filters and response options.
+    """
+    params = request.GET.dict()
+    logger.debug(f"Received search parameters: {params}")
+    payload_fields = search_fieldset({key: params.pop(key) for key in ("fields", "expand") if key in params})
+    options = {
+        "show_rooms_only": params.pop("show_rooms_only", "false").lower() == "true",
+        "limit": page_size(params.pop("limit", None)),
+        "hotels_cursor": params.pop("hotels_cursor", None),
+        "rooms_cursor": params.pop("rooms_cursor", None),
+        "facets": params.pop("facets", "false").lower() == "true",
+        "price_bucket": price_bucket(params.pop("price_bucket", None)),
+        "stream": params.pop("stream", "false").lower() == "true",
+        "fields": payload_fields,
+    }
+    logger.debug(f"Search options: {options}")
+    return params, options
+
+
+def search_fieldset(query_params):
+    """
+    Fieldset of a search payload: paths start with `hotels.` or `rooms.`, and a list
+    that is not mentioned by `fields` is returned in full.
+    """
+    tree = fieldset(query_params)
+    if tree is None:
+        return None
+    unknown = sorted(set(tree) - {ALL_PLAIN, "hotels", "rooms"})
+    if unknown:
+        raise ValidationError(f"Unknown fields: {', '.join(unknown)}.")
+    plain = {ALL_PLAIN: True} if tree.get(ALL_PLAIN) else None
+    return {key: tree.get(key, plain) for key in ("hotels", "rooms")}
+
+
+def search_serializer(serializer_class, options, key):
+    if options["fields"] is None:
+        return serializer_class
+    return sparse_serializer(serializer_class, options["fields"][key])
+
+
+def search_cache_key(request, params, options):
+    return search_key({
+        **params,
+        "limit": options["limit"],
+        "hotels_cursor": options["hotels_cursor"],
+        "rooms_cursor": options["rooms_cursor"],
+        "facets": options["facets"],
+        "price_bucket": options["price_bucket"] if options["facets"] else None,
+        "fields": freeze(options["fields"]),
+        "host": request.get_host(),
+    }, options["show_rooms_only"])
+
+
+def serialized_page(queryset, serializer_class, cursor, options, context):
+    """
+    Fetches one keyset page of `queryset` and serializes it, through the compiled form of
+    the serializer when it has one (otherwise lazily when streaming).
+    """
+    compiled = compile_serializer(serializer_class)
+    if compiled is not None:
+        pks, next_cursor = paginate_keys(queryset, cursor, options["limit"])
+        return compiled.serialize(queryset.filter(pk__in=pks), context), next_cursor
+
+    items, next_cursor = paginate(plan_queryset(queryset, serializer_class), cursor, options["limit"])
+    if options["stream"]:
+        return StreamedList(items, serializer_class(many=True, context=context).child.to_representation), next_cursor
+    return serializer_class(items, many=True, context=context).data, next_cursor
+
+
+def hotels_page(hotels, options, context):
+    serializer_class = search_serializer(HotelSerializer, options, "hotels")
+    return serialized_page(hotels, serializer_class, options["hotels_cursor"], options, context)
+
+
+def rooms_page(rooms, options, context):
+    base_class = RoomDocumentSerializer if context.get("stays") is None else RoomStaySerializer
+    serializer_class = search_serializer(base_class, options, "rooms")
+    return serialized_page(rooms, serializer_class, options["rooms_cursor"], options, context)
+
+
+def search_payload(hotels, rooms, facets, options):
+    if options["show_rooms_only"]:
+        payload = {
+            "rooms": rooms[0],
+            "next": {"rooms": rooms[1]},
+        }
+    else:
+        payload = {
+            "hotels": hotels[0],
+            "rooms": rooms[0],
+            "next": {"hotels": hotels[1], "rooms": rooms[1]},
+        }
+    if options["facets"]:
+        payload["facets"] = facets
+    return payload
+
+
+def search_error_response(error):
+    if isinstance(error, ValidationError):
+        logger.error(f"Validation error in search parameters: {error}")
+        return JsonResponse({"error": "Invalid input parameters", "details": error.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+    if isinstance(error, DatabaseError):
+        logger.critical(f"Database error occurred: {error}")
+        return JsonResponse({"error": "Internal server error. Please try again later."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    logger.exception(f"Unexpected error occurred: {error}")
+    return JsonResponse({"error": "An unexpected error occurred. Please try again later."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 def search_view(request):
     """
     Handles search for hotels and rooms with optional filters.
+    Results are paginated by keyset: pass `limit` and the `hotels_cursor`/`rooms_cursor`
+    values returned under `next` to fetch the following page.
+    With `facets=true` the response also holds room counts per city, hotel type,
+    room type and `price_bucket`-wide price range for the whole result set.
+    With `stream=true` results are serialized row by row into a streaming response.
+    With `nights=N` the search is flexible: rooms are those with a free N-night stay
+    between startDate and endDate whose average nightly price is within priceMin/priceMax,
+    each with its cheapest such `stay` (the earliest with `flexible=earliest`).
+    Stays are priced night by night from the room rates; `totalMin`/`totalMax` filter on
+    the total price of the stay, which is startDate to endDate in non-flexible searches.
+    `fields`/`expand` select parts of the payload, e.g. `fields=hotels.id,hotels.name`.
+    The payload is JSON, or MessagePack when the Accept header asks for application/msgpack.
     """
     logger.debug("Search request received.")
     try:
-        params = request.GET.dict()
-        logger.debug(f"Received search parameters: {params}")
+        params, options = search_options(request)
 
-        show_rooms_only = params.pop("show_rooms_only", "false").lower() == "true"
-        logger.debug(f"Show rooms only: {show_rooms_only}")
+        cache = search_cache()
+        key = search_cache_key(request, params, options)
+        payload = cache.get(key)
+        if payload is not None:
+            logger.info("Returning cached search results.")
+            return payload_response(request, payload, status=status.HTTP_200_OK)
 
         hotels, rooms = search_accommodations(params)
+        rooms, stays = stay_search(rooms, params)
 
         context = {
             "request": request,
             "params": params,
+            "stays": stays,
         }
 
-        if show_rooms_only:
-            room_serializer = RoomSerializer(rooms, many=True, context=context)
-            logger.info("Returning serialized rooms.")
-            return JsonResponse({"rooms": room_serializer.data}, status=status.HTTP_200_OK)
+        facets = search_facets(rooms, options["price_bucket"]) if options["facets"] else None
+        rooms = rooms_page(rooms, options, context)
+        hotels = None if options["show_rooms_only"] else hotels_page(hotels, options, context)
+        payload = search_payload(hotels, rooms, facets, options)
 
-        hotel_serializer = HotelSerializer(hotels, many=True, context=context)
-        room_serializer = RoomSerializer(rooms, many=True, context=context)
+        if options["stream"]:
+            logger.info("Streaming serialized search results.")
+            return streaming_json_response(payload, status=status.HTTP_200_OK)
 
-        logger.info("Returning serialized hotels and rooms.")
-        return JsonResponse({
-            "hotels": hotel_serializer.data,
-            "rooms": room_serializer.data
-        }, status=status.HTTP_200_OK)
+        cache.set(key, payload, search_tags(params, payload))
+        logger.info("Returning serialized search results.")
+        return payload_response(request, payload, status=status.HTTP_200_OK)
 
-    except ValidationError as ve:
-        logger.error(f"Validation error in serializers: {ve}")
-        return JsonResponse({"error": "Invalid input parameters", "details": ve.detail}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return search_error_response(e)
 
-    except DatabaseError as db_err:
-        logger.critical(f"Database error occurred: {db_err}")
-        return JsonResponse({"error": "Internal server error. Please try again later."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def in_own_thread(func):
+    """
+    Runs `func` in a worker thread with its own database connection, so that several
+    ORM calls can be awaited concurrently (thread-sensitive calls would be serialized).
+    """
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def async_search_view(request):
+    """
+    Same contract as search_view, for the ASGI entry point: the hotel page, the room page
+    and the facets are fetched concurrently, so latency is that of the slowest query.
+    Results are always returned as a single JSON document (`stream` is ignored).
+    """
+    logger.debug("Async search request received.")
+    try:
+        params, options = search_options(request)
+        options["stream"] = False
+
+        cache = search_cache()
+        key = search_cache_key(request, params, options)
+        payload = await sync_to_async(cache.get)(key)
+        if payload is not None:
+            logger.info("Returning cached search results.")
+            return payload_response(request, payload, status=status.HTTP_200_OK)
+
+        hotels, rooms = search_accommodations(params)
+        rooms, stays = await in_own_thread(stay_search)(rooms, params)
+
+        context = {
+            "request": request,
+            "params": params,
+            "stays": stays,
+        }
+
+        tasks = [in_own_thread(rooms_page)(rooms, options, context)]
+        if not options["show_rooms_only"]:
+            tasks.append(in_own_thread(hotels_page)(hotels, options, context))
+        if options["facets"]:
+            tasks.append(in_own_thread(search_facets)(rooms, options["price_bucket"]))
+        results = iter(await asyncio.gather(*tasks))
+
+        rooms = next(results)
+        hotels = None if options["show_rooms_only"] else next(results)
+        facets = next(results) if options["facets"] else None
+        payload = search_payload(hotels, rooms, facets, options)
+
+        await sync_to_async(cache.set)(key, payload, search_tags(params, payload))
+        logger.info("Returning serialized search results.")
+        return payload_response(request, payload, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.exception(f"Unexpected error occurred: {e}")
-        return JsonResponse({"error": "An unexpected error occurred. Please try again later."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return search_error_response(e)
+
+
+def search_cache_stats_view(request):
+    """
+    Exposes search cache hit/miss counters for monitoring. Staff only.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+    return JsonResponse(search_cache().stats(), status=status.HTTP_200_OK)
 
 
-class HotelTypeViewSet(ModelViewSet):
+class HotelTypeViewSet(PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
     queryset = HotelType.objects.all()
     serializer_class = HotelTypeSerializer
     permission_classes = []
+    pagination_class = None
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching all hotel types")
@@ -98,10 +302,16 @@ class HotelTypeViewSet(ModelViewSet):
         return response
 
 
-class HotelViewSet(ModelViewSet):
-    queryset = Hotel.objects.prefetch_related('rooms').prefetch_related('images')
+class HotelViewSet(ConditionalGetMixin, SparseFieldsetMixin, PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
+    queryset = Hotel.objects.all()
     serializer_class = HotelSerializer
     permission_classes = []
+    version_keys = {
+        'list': ('hotels', CATALOG),
+        'retrieve': ('hotel:{pk}', CATALOG),
+        'me': ('hotels', CATALOG),
+        'bookings': ('hotels', CATALOG),
+    }
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching hotels list")
@@ -143,23 +353,35 @@ class HotelViewSet(ModelViewSet):
     def me(self, request):
         logger.info("Fetching current user's hotels for user ID: %s", request.user.id)
         hotels = Hotel.objects.filter(owner=request.user)
-        serializer = self.get_serializer(hotels, many=True)
-        return Response(serializer.data)
+        return self.list_response(hotels)
 
     @action(detail=False, methods=['get'], permission_classes=[])
     def bookings(self, request):
         logger.info("Fetching current user's hotel's bookings for user ID: %s", request.user.id)
-        hotels = Hotel.objects.filter(owner=request.user).prefetch_related(
-            'rooms__bookings', 'rooms__type'
-        )
-        serializer = self.get_serializer(hotels, many=True)
-        return Response(serializer.data)
+        hotels = Hotel.objects.filter(owner=request.user)
+        return self.list_response(hotels)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def dashboard(self, request):
+        logger.info("Building dashboard of user ID: %s", request.user.id)
+        params = request.query_params
+        try:
+            start, end = window(params.get('start'), params.get('end'))
+            limit = check_in_limit(params.get('check_ins'))
+        except ValidationError as e:
+            raise DRFValidationError({'detail': e.messages})
+        return Response(owner_dashboard(request.user, start, end, limit))
 
 
-class ImageViewSet(ModelViewSet):
+class ImageViewSet(BulkWriteMixin, ConditionalGetMixin, PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
     permission_classes = []
+    bulk_file_field = 'image'
+    version_keys = {
+        'list': ('hotel_images',),
+        'retrieve': ('hotel_image:{pk}',),
+    }
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching images list")
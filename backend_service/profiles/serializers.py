@@ -18,3 +18,4 @@ class ProfileSerializer(serializers.ModelSerializer):
             "profile_picture",
         ]
         read_only_fields = ["id", "user_id", "total_bookings"]
+        select_related = ["user"]
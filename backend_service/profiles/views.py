@@ -3,15 +3,23 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from .models import Profile
 from .serializers import ProfileSerializer
+from backend_service.prefetch import PrefetchPlanMixin
+from backend_service.versions import ConditionalGetMixin
+from backend_service.streaming import StreamingListMixin
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class ProfileViewSet(ModelViewSet):
+class ProfileViewSet(ConditionalGetMixin, PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
     permission_classes = []
+    version_keys = {
+        'list': ('profiles',),
+        'retrieve': ('profile:{pk}',),
+        'me': ('profile:user:{user}',),
+    }
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching profiles list")
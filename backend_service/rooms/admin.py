@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import RoomType, Room, Image
+from .models import RoomType, Room, RoomRate, Image
 
 
 @admin.register(RoomType)
@@ -8,6 +8,12 @@ class RoomTypeAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
+class RoomRateInline(admin.TabularInline):
+    model = RoomRate
+    extra = 0
+    ordering = ('start_date',)
+
+
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     list_display = ('name', 'hotel', 'type', 'price_per_night', 'is_available', 'total_bookings')
@@ -18,6 +24,7 @@ class RoomAdmin(admin.ModelAdmin):
         ('Stats', {'fields': ('total_bookings',)}),
         ('Images', {'fields': ('preview_image',)}),
     )
+    inlines = (RoomRateInline,)
 
 
 @admin.register(Image)
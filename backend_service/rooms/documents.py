@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework import serializers
+from .models import Room, RoomSearchDocument, Image
+import logging
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_FIELDS = [
+    'hotel_id', 'type_id', 'hotel_type_id', 'name', 'price_per_night', 'is_available',
+    'preview_image', 'total_bookings', 'type_name', 'hotel_name', 'hotel_type',
+    'address', 'city', 'country', 'images',
+]
+
+uploaded_at_field = serializers.DateTimeField()
+
+
+def image_entry(image):
+    return {
+        'id': image.id,
+        'image': image.image.name,
+        'uploaded_at': uploaded_at_field.to_representation(image.uploaded_at),
+        'room': image.room_id,
+    }
+
+
+def hotel_fields(hotel):
+    return {
+        'hotel_type_id': hotel.type_id,
+        'hotel_name': hotel.name,
+        'hotel_type': hotel.type.name if hotel.type else None,
+        'address': hotel.address,
+        'city': hotel.city,
+        'country': hotel.country,
+    }
+
+
+def build_document(room):
+    """
+    Expects `room` loaded through document_rooms().
+    """
+    return RoomSearchDocument(
+        id=room.id,
+        hotel_id=room.hotel_id,
+        type_id=room.type_id,
+        name=room.name,
+        price_per_night=room.price_per_night,
+        is_available=room.is_available,
+        preview_image=room.preview_image.name or None,
+        total_bookings=room.total_bookings,
+        type_name=room.type.name if room.type else None,
+        images=[image_entry(image) for image in room.images.all()],
+        **hotel_fields(room.hotel),
+    )
+
+
+def document_rooms():
+    return Room.objects.select_related('hotel__type', 'type').prefetch_related(
+        Prefetch('images', queryset=Image.objects.order_by('id'))
+    )
+
+
+def save_documents(rooms):
+    RoomSearchDocument.objects.bulk_create(
+        [build_document(room) for room in rooms],
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=DOCUMENT_FIELDS,
+    )
+
+
+def refresh_rooms(room_ids):
+    save_documents(document_rooms().filter(id__in=room_ids))
+
+
+def remove_rooms(room_ids):
+    RoomSearchDocument.objects.filter(id__in=room_ids).delete()
+
+
+def refresh_hotel(hotel):
+    """
+    Copies the hotel columns onto the documents of all its rooms with a single UPDATE.
+    """
+    RoomSearchDocument.objects.filter(hotel_id=hotel.id).update(**hotel_fields(hotel))
+
+
+def refresh_hotel_type(hotel_type_id, name):
+    RoomSearchDocument.objects.filter(hotel_type_id=hotel_type_id).update(
+        hotel_type_id=hotel_type_id if name is not None else None,
+        hotel_type=name,
+    )
+
+
+def refresh_room_type(room_type_id, name):
+    RoomSearchDocument.objects.filter(type_id=room_type_id).update(
+        type_id=room_type_id if name is not None else None,
+        type_name=name,
+    )
+
+
+def rebuild_documents(batch_size=500):
+    """
+    Rebuilds every room document from Room, Hotel, their types and room images.
+    """
+    created = 0
+    last_id = 0
+    with transaction.atomic():
+        RoomSearchDocument.objects.all().delete()
+        while True:
+            batch = list(document_rooms().filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            save_documents(batch)
+            created += len(batch)
+            last_id = batch[-1].id
+    logger.info(f"Room search documents rebuilt: {created} rooms")
+    return created
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from rooms.documents import rebuild_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized room search documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        created = rebuild_documents(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Room documents rebuilt: {created} rooms."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='total_bookings',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0002_searchgram'),
+        ('rooms', '0002_alter_room_total_bookings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['price_per_night', 'id'], name='rooms_room_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['name', 'id'], name='rooms_room_name_idx'),
+        ),
+    ]
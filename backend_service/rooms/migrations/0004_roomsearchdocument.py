@@ -0,0 +1,75 @@
+# Generated by Django 5.1.3 on 2026-10-18 11:39
+
+from django.db import migrations, models
+from rest_framework import serializers
+
+
+def fill_room_documents(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomSearchDocument = apps.get_model('rooms', 'RoomSearchDocument')
+    uploaded_at = serializers.DateTimeField()
+    documents = []
+    for room in Room.objects.select_related('hotel__type', 'type').prefetch_related('images').iterator(chunk_size=500):
+        hotel = room.hotel
+        documents.append(RoomSearchDocument(
+            id=room.id,
+            hotel_id=room.hotel_id,
+            type_id=room.type_id,
+            hotel_type_id=hotel.type_id,
+            name=room.name,
+            price_per_night=room.price_per_night,
+            is_available=room.is_available,
+            preview_image=room.preview_image.name or None,
+            total_bookings=room.total_bookings,
+            type_name=room.type.name if room.type else None,
+            hotel_name=hotel.name,
+            hotel_type=hotel.type.name if hotel.type else None,
+            address=hotel.address,
+            city=hotel.city,
+            country=hotel.country,
+            images=[
+                {
+                    'id': image.id,
+                    'image': image.image.name,
+                    'uploaded_at': uploaded_at.to_representation(image.uploaded_at),
+                    'room': image.room_id,
+                }
+                for image in sorted(room.images.all(), key=lambda image: image.id)
+            ],
+        ))
+    RoomSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0003_room_rooms_room_price_idx_room_rooms_room_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSearchDocument',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hotel_id', models.BigIntegerField()),
+                ('type_id', models.BigIntegerField(blank=True, null=True)),
+                ('hotel_type_id', models.BigIntegerField(blank=True, null=True)),
+                ('name', models.CharField(max_length=100)),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_available', models.BooleanField(default=True)),
+                ('preview_image', models.ImageField(blank=True, null=True, upload_to='')),
+                ('total_bookings', models.BigIntegerField(default=0)),
+                ('type_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('hotel_name', models.CharField(max_length=255)),
+                ('hotel_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('address', models.TextField()),
+                ('city', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=100)),
+                ('images', models.JSONField(default=list)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['price_per_night', 'id'], name='rooms_doc_price_idx'), models.Index(fields=['name', 'id'], name='rooms_doc_name_idx'), models.Index(fields=['hotel_id'], name='rooms_doc_hotel_idx'), models.Index(fields=['type_id'], name='rooms_doc_type_idx'), models.Index(fields=['hotel_type_id'], name='rooms_doc_hotel_type_idx')],
+            },
+        ),
+        migrations.RunPython(fill_room_documents, migrations.RunPython.noop),
+    ]
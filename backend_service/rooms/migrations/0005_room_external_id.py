@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_roomsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
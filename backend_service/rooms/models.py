@@ -26,11 +26,40 @@ class Room(models.Model):
     is_available = models.BooleanField(default=True)
     preview_image = models.ImageField(upload_to=preview_image_upload_path, blank=True, null=True)
     total_bookings = models.BigIntegerField(default=0)
+    external_id = models.CharField(max_length=100, unique=True, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['price_per_night', 'id'], name='rooms_room_price_idx'),
+            models.Index(fields=['name', 'id'], name='rooms_room_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.hotel.name} - {self.name}"
 
 
+class RoomRate(models.Model):
+    """
+    Nightly price of a room for the nights of [start_date, end_date). Rates of a room
+    do not overlap; nights without a rate cost the room's price_per_night.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='rates')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'start_date'], name='rooms_rate_room_start_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end_date__gt=models.F('start_date')), name='rooms_rate_dates_check'),
+        ]
+
+    def __str__(self):
+        return f"{self.room} - {self.start_date} to {self.end_date}: {self.price_per_night}"
+
+
 class Image(models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to=images_upload_path)
@@ -38,3 +67,38 @@ class Image(models.Model):
 
     def __str__(self):
         return f"Image for Room: {self.room}"
+
+
+class RoomSearchDocument(models.Model):
+    """
+    Flat, read-only copy of a room with its hotel, types and images.
+    `id` is the room id. Rows are maintained by signals (see rooms.documents).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    hotel_id = models.BigIntegerField()
+    type_id = models.BigIntegerField(blank=True, null=True)
+    hotel_type_id = models.BigIntegerField(blank=True, null=True)
+    name = models.CharField(max_length=100)
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    is_available = models.BooleanField(default=True)
+    preview_image = models.ImageField(blank=True, null=True)
+    total_bookings = models.BigIntegerField(default=0)
+    type_name = models.CharField(max_length=100, blank=True, null=True)
+    hotel_name = models.CharField(max_length=255)
+    hotel_type = models.CharField(max_length=100, blank=True, null=True)
+    address = models.TextField()
+    city = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    images = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['price_per_night', 'id'], name='rooms_doc_price_idx'),
+            models.Index(fields=['name', 'id'], name='rooms_doc_name_idx'),
+            models.Index(fields=['hotel_id'], name='rooms_doc_hotel_idx'),
+            models.Index(fields=['type_id'], name='rooms_doc_type_idx'),
+            models.Index(fields=['hotel_type_id'], name='rooms_doc_hotel_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel_name} - {self.name}"
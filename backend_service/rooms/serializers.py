@@ -1,15 +1,62 @@
+from decimal import Decimal
+from django.db import transaction
 from rest_framework import serializers
-from .models import Room, RoomType, Image
+from backend_service.bulk import PreloadedPrimaryKeyRelatedField, PreloadedSlugRelatedField
+from backend_service.compiled import absolute_url
+from .models import Room, RoomType, Image, RoomRate, RoomSearchDocument
 from hotels.models import Hotel
 
 
 class ImageSerializer(serializers.ModelSerializer):
+    room = PreloadedPrimaryKeyRelatedField(queryset=Room.objects.all())
+
     class Meta:
         model = Image
         fields = ('id', 'image', 'uploaded_at', 'room')
         read_only_fields = ('id', 'uploaded_at')
 
 
+class RoomRateSerializer(serializers.ModelSerializer):
+    room = PreloadedPrimaryKeyRelatedField(queryset=Room.objects.all())
+
+    class Meta:
+        model = RoomRate
+        fields = ('id', 'room', 'start_date', 'end_date', 'price_per_night')
+        read_only_fields = ('id',)
+        extra_kwargs = {'price_per_night': {'min_value': Decimal(0)}}
+
+    def stored(self, attrs, name):
+        return attrs.get(name, getattr(self.instance, name, None))
+
+    def validate(self, attrs):
+        if self.stored(attrs, 'end_date') <= self.stored(attrs, 'start_date'):
+            raise serializers.ValidationError({'end_date': "end_date must be after start_date."})
+        return attrs
+
+    def check_overlap(self, attrs):
+        """
+        Rejects a rate overlapping another rate of its room. Runs under a lock on the room
+        row, so that concurrent writes of a room's rates can't both pass the check.
+        """
+        room, start_date, end_date = (self.stored(attrs, name) for name in ('room', 'start_date', 'end_date'))
+        list(Room.objects.select_for_update().filter(pk=room.pk).values_list('pk', flat=True))
+        overlapping = RoomRate.objects.filter(room=room, start_date__lt=end_date, end_date__gt=start_date)
+        if self.instance is not None:
+            overlapping = overlapping.exclude(pk=self.instance.pk)
+        if overlapping.exists():
+            raise serializers.ValidationError({'non_field_errors': ["This rate overlaps another rate of the room."]})
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            self.check_overlap(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            self.check_overlap(validated_data)
+            return super().update(instance, validated_data)
+
+
 class RoomTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = RoomType
@@ -17,11 +64,11 @@ class RoomTypeSerializer(serializers.ModelSerializer):
 
 
 class RoomSerializer(serializers.ModelSerializer):
-    type = serializers.SlugRelatedField(
+    type = PreloadedSlugRelatedField(
         queryset=RoomType.objects.all(),
         slug_field='name'
     )
-    hotel = serializers.PrimaryKeyRelatedField(queryset=Hotel.objects.all())
+    hotel = PreloadedPrimaryKeyRelatedField(queryset=Hotel.objects.all())
     hotel_name = serializers.SerializerMethodField()
     hotel_type = serializers.SerializerMethodField()
     address = serializers.SerializerMethodField()
@@ -33,12 +80,20 @@ class RoomSerializer(serializers.ModelSerializer):
         model = Room
         fields = ('id', 'name', 'price_per_night', 'is_available', 'type', 'hotel', 'hotel_name', 'hotel_type', 'address', 'city', 'country', 'images', 'preview_image', 'total_bookings')
         read_only_fields = ('id', 'images', 'total_bookings')
+        select_related = ('hotel__type', 'type')
+        compiled_sources = {
+            'hotel_name': 'hotel__name',
+            'hotel_type': 'hotel__type__name',
+            'address': 'hotel__address',
+            'city': 'hotel__city',
+            'country': 'hotel__country',
+        }
 
     def get_hotel_name(self, obj):
         return obj.hotel.name
 
     def get_hotel_type(self, obj):
-        return obj.hotel.type.name
+        return obj.hotel.type.name if obj.hotel.type else None
 
     def get_address(self, obj):
         return obj.hotel.address
@@ -48,3 +103,51 @@ class RoomSerializer(serializers.ModelSerializer):
 
     def get_country(self, obj):
         return obj.hotel.country
+
+
+def image_urls(context):
+    """
+    Returns a function turning stored image entries into entries with absolute image URLs.
+    """
+    url = absolute_url(context)
+
+    def convert(images):
+        return [{**image, 'image': url(image['image'])} for image in images]
+    return convert
+
+
+class RoomDocumentSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer producing RoomSerializer's output from a RoomSearchDocument.
+    """
+    type = serializers.CharField(source='type_name')
+    hotel = serializers.IntegerField(source='hotel_id')
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RoomSearchDocument
+        fields = ('id', 'name', 'price_per_night', 'is_available', 'type', 'hotel', 'hotel_name', 'hotel_type', 'address', 'city', 'country', 'images', 'preview_image', 'total_bookings')
+        read_only_fields = fields
+        compiled_sources = {'images': ('images', image_urls)}
+
+    def get_images(self, obj):
+        return image_urls(self.context)(obj.images)
+
+
+def room_stays(context):
+    return context.get('stays', {}).get
+
+
+class RoomStaySerializer(RoomDocumentSerializer):
+    """
+    RoomDocumentSerializer with the stay found for the room by a flexible date search.
+    """
+    stay = serializers.SerializerMethodField()
+
+    class Meta(RoomDocumentSerializer.Meta):
+        fields = RoomDocumentSerializer.Meta.fields + ('stay',)
+        read_only_fields = fields
+        compiled_sources = {**RoomDocumentSerializer.Meta.compiled_sources, 'stay': ('id', room_stays)}
+
+    def get_stay(self, obj):
+        return room_stays(self.context)(obj.pk)
@@ -0,0 +1,134 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Room, RoomType, Image, RoomRate
+from hotels.models import Hotel
+from hotels.search import index_object, index_objects, unindex_object
+from hotels.cache import invalidate_cities, invalidate_rooms, invalidate_all
+from .documents import refresh_rooms, remove_rooms, refresh_room_type
+from backend_service.bulk import affected_ids, bulk_saved
+from backend_service.versions import CATALOG, bump
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=RoomType)
+def update_search_index(sender, instance, **kwargs):
+    index_object(instance)
+
+
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=RoomType)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room_searches(sender, instance, **kwargs):
+    invalidate_rooms(instance.pk)
+    invalidate_cities(Hotel.objects.filter(pk=instance.hotel_id).values_list('city', flat=True).first())
+
+
+@receiver(post_save, sender=RoomRate)
+@receiver(post_delete, sender=RoomRate)
+def invalidate_room_rate_searches(sender, instance, **kwargs):
+    invalidate_rooms(instance.room_id)
+    invalidate_cities(Hotel.objects.filter(rooms__pk=instance.room_id).values_list('city', flat=True).first())
+
+
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+def invalidate_room_type_searches(sender, instance, **kwargs):
+    invalidate_all()
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_room_image_searches(sender, instance, **kwargs):
+    invalidate_rooms(instance.room_id)
+
+
+@receiver(post_save, sender=Room)
+def update_room_document(sender, instance, **kwargs):
+    refresh_rooms([instance.pk])
+
+
+@receiver(post_delete, sender=Room)
+def remove_room_document(sender, instance, **kwargs):
+    remove_rooms([instance.pk])
+
+
+@receiver(post_save, sender=RoomType)
+def update_room_type_documents(sender, instance, **kwargs):
+    refresh_room_type(instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=RoomType)
+def clear_room_type_documents(sender, instance, **kwargs):
+    refresh_room_type(instance.pk, None)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def update_room_image_document(sender, instance, **kwargs):
+    refresh_rooms([instance.room_id])
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def bump_room_versions(sender, instance, **kwargs):
+    bump(f"room:{instance.pk}", "rooms", f"hotel:{instance.hotel_id}", "hotels")
+
+
+@receiver(post_save, sender=RoomType)
+@receiver(post_delete, sender=RoomType)
+def bump_room_type_versions(sender, instance, **kwargs):
+    bump(CATALOG)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def bump_room_image_versions(sender, instance, **kwargs):
+    hotel_id = Room.objects.filter(pk=instance.room_id).values_list('hotel_id', flat=True).first()
+    bump(f"room_image:{instance.pk}", "room_images", f"room:{instance.room_id}", "rooms",
+         f"hotel:{hotel_id}" if hotel_id else None, "hotels")
+
+
+@receiver(bulk_saved, sender=Room)
+def update_bulk_search_index(sender, instances, **kwargs):
+    index_objects(Room, instances)
+
+
+@receiver(bulk_saved, sender=Room)
+def invalidate_bulk_room_searches(sender, instances, previous, **kwargs):
+    invalidate_rooms(*[room.pk for room in instances])
+    hotel_ids = affected_ids('hotel_id', instances, previous)
+    invalidate_cities(*Hotel.objects.filter(pk__in=hotel_ids).values_list('city', flat=True))
+
+
+@receiver(bulk_saved, sender=Room)
+def update_bulk_room_documents(sender, instances, **kwargs):
+    refresh_rooms([room.pk for room in instances])
+
+
+@receiver(bulk_saved, sender=Room)
+def bump_bulk_room_versions(sender, instances, previous, **kwargs):
+    hotel_keys = [f"hotel:{pk}" for pk in affected_ids('hotel_id', instances, previous)]
+    bump(*[f"room:{room.pk}" for room in instances], "rooms", *hotel_keys, "hotels")
+
+
+@receiver(bulk_saved, sender=Image)
+def invalidate_bulk_room_image_searches(sender, instances, previous, **kwargs):
+    invalidate_rooms(*affected_ids('room_id', instances, previous))
+
+
+@receiver(bulk_saved, sender=Image)
+def update_bulk_room_image_documents(sender, instances, previous, **kwargs):
+    refresh_rooms(affected_ids('room_id', instances, previous))
+
+
+@receiver(bulk_saved, sender=Image)
+def bump_bulk_room_image_versions(sender, instances, previous, **kwargs):
+    room_ids = affected_ids('room_id', instances, previous)
+    hotel_ids = Room.objects.filter(pk__in=room_ids).values_list('hotel_id', flat=True).distinct()
+    bump(*[f"room_image:{image.pk}" for image in instances], "room_images",
+         *[f"room:{pk}" for pk in room_ids], "rooms", *[f"hotel:{pk}" for pk in hotel_ids], "hotels")
@@ -1,3 +1,198 @@
-from django.test import TestCase
+from decimal import Decimal
+from itertools import combinations
+from unittest import mock
+from django.db import connection
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+from auth_app.models import CustomUser
+from backend_service.bulk import insert_all
+from backend_service.compiled import compile_serializer
+from backend_service.fieldsets import CACHE_SIZE, fieldset, restricted, sparse_serializer
+from backend_service.prefetch import relation_plan
+from backend_service.renderers import FastJSONRenderer
+from hotels.models import Hotel, HotelType
+from .models import Image, Room, RoomSearchDocument, RoomType
+from .serializers import ImageSerializer, RoomDocumentSerializer, RoomSerializer, RoomStaySerializer
+
+
+def create_rooms():
+    owner = CustomUser.objects.create_user('owner@example.com', 'pw')
+    resort = HotelType.objects.create(name='Resort')
+    suite = RoomType.objects.create(name='Suite', description='Two rooms')
+    hotels = [
+        Hotel.objects.create(owner=owner, name='Grand Barcelona', address='Rambla 1', city='Barcelona', country='Spain', type=resort),
+        Hotel.objects.create(owner=owner, name='Paris Inn', address='Rue 2', city='Paris', country='France'),
+    ]
+    rooms = [
+        Room.objects.create(hotel=hotels[0], type=suite, name='Sea view', price_per_night=Decimal('100.00')),
+        Room.objects.create(hotel=hotels[0], name='Garden', price_per_night=Decimal('80.50')),
+        Room.objects.create(hotel=hotels[1], type=suite, name='Attic', price_per_night=Decimal('100.00')),
+    ]
+    Image.objects.create(room=rooms[0], image='pictures/rooms/Sea view/images/a.png')
+    Image.objects.create(room=rooms[0], image='pictures/rooms/Sea view/images/b c.png')
+    return owner, hotels, rooms
+
+
+class CompiledSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.hotels, cls.rooms = create_rooms()
+
+    def context(self, **extra):
+        return {'request': Request(RequestFactory().get('/api/rooms/rooms/')), **extra}
+
+    def assertSameOutput(self, serializer_class, queryset, context):
+        compiled = compile_serializer(serializer_class)
+        self.assertIsNotNone(compiled)
+        renderer = FastJSONRenderer()
+        self.assertEqual(
+            renderer.render(compiled.serialize(queryset, context)),
+            renderer.render(serializer_class(queryset, many=True, context=context).data),
+        )
+
+    def test_room_serializer(self):
+        self.assertSameOutput(RoomSerializer, Room.objects.order_by('id'), self.context())
+
+    def test_room_documents(self):
+        self.assertSameOutput(RoomDocumentSerializer, RoomSearchDocument.objects.order_by('id'), self.context())
+
+    def test_room_stays(self):
+        stays = {self.rooms[0].pk: {'start_date': '2025-03-01', 'end_date': '2025-03-03', 'nights': 2, 'total_price': '200.00'}}
+        self.assertSameOutput(RoomStaySerializer, RoomSearchDocument.objects.order_by('id'), self.context(stays=stays))
+
+    def test_images(self):
+        self.assertSameOutput(ImageSerializer, Image.objects.order_by('id'), self.context())
+
+
+class FieldsetCacheTests(TestCase):
+    def test_distinct_fieldsets_stay_within_bound(self):
+        names = [name for name in RoomDocumentSerializer.Meta.fields if name != 'id']
+        fieldsets = list(combinations(names, 3))
+        self.assertGreater(len(fieldsets), CACHE_SIZE)
+        for fields in fieldsets:
+            serializer_class = sparse_serializer(RoomDocumentSerializer, fieldset(QueryDict(f"fields={','.join(fields)}")))
+            self.assertEqual(serializer_class.Meta.fields, ('id',) + fields)
+            compile_serializer(serializer_class)
+            relation_plan(serializer_class)
+        for cache in (restricted, compile_serializer, relation_plan):
+            self.assertLessEqual(cache.cache_info().currsize, CACHE_SIZE)
+
+
+class RoomListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.hotels, cls.rooms = create_rooms()
+        for i in range(7):
+            Room.objects.create(hotel=cls.hotels[i % 2], name=f"Room {i}", price_per_night=Decimal(50 + i))
+
+    def test_keyset_walk_is_complete_and_ordered(self):
+        ids = []
+        url, params = '/api/rooms/rooms/', {'limit': 3}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page['results']), 3)
+            ids += [room['id'] for room in page['results']]
+            url, params = page['next'], None
+        self.assertEqual(ids, list(Room.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_unchanged_room_is_not_modified(self):
+        room = self.rooms[0]
+        url = f'/api/rooms/rooms/{room.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.price_per_night = Decimal('120.00')
+            room.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['price_per_night'], '120.00')
+
+
+class BulkWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner, cls.hotels, cls.rooms = create_rooms()
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def bulk(self, method, items):
+        return getattr(self.client, method)('/api/rooms/rooms/bulk/', items, content_type='application/json')
+
+    def test_bulk_create_returns_stored_rooms(self):
+        # Leave a gap in the ids, so that computed keys cannot match by chance.
+        Room.objects.filter(pk=self.rooms[-1].pk).delete()
+        items = [
+            {'name': f"Bulk {i}", 'price_per_night': f"{60 + i}.00", 'type': 'Suite', 'hotel': self.hotels[i % 2].pk}
+            for i in range(5)
+        ]
+        response = self.bulk('post', items)
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        stored = Room.objects.in_bulk([room['id'] for room in created])
+        self.assertEqual(
+            [(room['name'], room['price_per_night'], room['hotel']) for room in created],
+            [(item['name'], item['price_per_night'], item['hotel']) for item in items],
+        )
+        self.assertEqual(
+            [(stored[room['id']].name, stored[room['id']].hotel_id) for room in created],
+            [(item['name'], item['hotel']) for item in items],
+        )
+        self.assertEqual(RoomSearchDocument.objects.filter(pk__in=stored).count(), 5)
+
+    def test_insert_all_keys_match_rows(self):
+        # Backends that cannot return the keys of a multi-row INSERT compute them from
+        # LAST_INSERT_ID() (MySQL) or insert row by row.
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            rooms = insert_all(Room, [
+                Room(hotel=self.hotels[0], name=f"Insert {i}", price_per_night=Decimal(i)) for i in range(4)
+            ])
+        self.assertTrue(all(room.pk is not None and not room._state.adding for room in rooms))
+        self.assertEqual(
+            {room.pk: room.name for room in rooms},
+            dict(Room.objects.filter(name__startswith='Insert ').values_list('pk', 'name')),
+        )
+
+    def test_bulk_update(self):
+        items = [
+            {'id': self.rooms[0].pk, 'price_per_night': '110.00'},
+            {'id': self.rooms[2].pk, 'name': 'Loft', 'hotel': self.hotels[0].pk},
+        ]
+        response = self.bulk('patch', items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['id'] for room in response.json()], [item['id'] for item in items])
+        self.assertEqual(
+            list(Room.objects.order_by('id').values_list('name', 'price_per_night', 'hotel_id')),
+            [
+                ('Sea view', Decimal('110.00'), self.hotels[0].pk),
+                ('Garden', Decimal('80.50'), self.hotels[0].pk),
+                ('Loft', Decimal('100.00'), self.hotels[0].pk),
+            ],
+        )
+
+    def test_invalid_batch_writes_nothing(self):
+        response = self.bulk('post', [
+            {'name': 'Valid', 'price_per_night': '60.00', 'type': 'Suite', 'hotel': self.hotels[0].pk},
+            {'name': 'Invalid', 'price_per_night': '60.00', 'type': 'Suite', 'hotel': 0},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('hotel', errors[1])
+        self.assertFalse(Room.objects.filter(name__in=['Valid', 'Invalid']).exists())
+
+        response = self.bulk('patch', [{'id': self.rooms[0].pk, 'name': 'Renamed'}, {'id': 0, 'name': 'Missing'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{}, {'id': ['Not found.']}])
+        self.assertEqual(Room.objects.get(pk=self.rooms[0].pk).name, 'Sea view')
 
-# Create your tests here.
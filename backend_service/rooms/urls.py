@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RoomViewSet, RoomTypeViewSet, ImageViewSet
+from .views import RoomViewSet, RoomTypeViewSet, ImageViewSet, RoomRateViewSet
 
 router = DefaultRouter()
 router.register('types', RoomTypeViewSet, basename='hotel-type')
 router.register('rooms', RoomViewSet, basename='hotel')
 router.register('images', ImageViewSet, basename='image')
+router.register('rates', RoomRateViewSet, basename='room-rate')
 
 urlpatterns = [
     path('', include(router.urls)),
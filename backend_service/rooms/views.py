@@ -1,25 +1,51 @@
+from django.core.exceptions import ValidationError
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError as DRFValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from .models import Room, RoomType, Image
-from .serializers import RoomSerializer, RoomTypeSerializer, ImageSerializer
+from .models import Room, RoomType, Image, RoomRate, RoomSearchDocument
+from .serializers import RoomSerializer, RoomTypeSerializer, ImageSerializer, RoomDocumentSerializer, RoomRateSerializer
+from backend_service.bulk import BulkWriteMixin
+from backend_service.fieldsets import SparseFieldsetMixin
+from backend_service.prefetch import PrefetchPlanMixin
+from backend_service.versions import CATALOG, ConditionalGetMixin
+from backend_service.streaming import StreamingListMixin
+from bookings.availability import availability_calendar, calendar_rooms, parse_ids, quote_stays
+from backend_service.dates import window
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class RoomTypeViewSet(ModelViewSet):
+class RoomTypeViewSet(PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
     queryset = RoomType.objects.all()
     serializer_class = RoomTypeSerializer
     permission_classes = []
+    pagination_class = None
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching all room types")
         return super().list(request, *args, **kwargs)
 
 
-class RoomViewSet(ModelViewSet):
-    queryset = Room.objects.select_related('hotel')
+class RoomViewSet(BulkWriteMixin, ConditionalGetMixin, SparseFieldsetMixin, PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
+    queryset = Room.objects.all()
     serializer_class = RoomSerializer
+    version_keys = {
+        'list': ('rooms', CATALOG),
+        'retrieve': ('room:{pk}', CATALOG),
+    }
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return RoomSearchDocument.objects.order_by('id')
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return self.sparse_serializer(RoomDocumentSerializer)
+        return super().get_serializer_class()
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching rooms list")
@@ -53,11 +79,93 @@ class RoomViewSet(ModelViewSet):
         logger.info("Room deleted successfully for ID: %s", kwargs['pk'])
         return response
 
+    @action(detail=False, methods=['get'], permission_classes=[])
+    def availability(self, request):
+        params = request.query_params
+        try:
+            start, end = window(params.get('start'), params.get('end'))
+            room_ids = calendar_rooms(parse_ids(params.getlist('rooms')), params.get('hotel'))
+            payload = availability_calendar(room_ids, start, end, params.get('encoding', 'base64'))
+        except ValidationError as e:
+            raise DRFValidationError({'detail': e.messages})
+        return Response(payload)
+
+    @action(detail=False, methods=['get'], permission_classes=[])
+    def quote(self, request):
+        params = request.query_params
+        try:
+            start, end = window(params.get('start'), params.get('end'))
+            room_ids = calendar_rooms(parse_ids(params.getlist('rooms')), params.get('hotel'))
+        except ValidationError as e:
+            raise DRFValidationError({'detail': e.messages})
+        return Response(quote_stays(room_ids, start, end))
+
+
+class RoomRateViewSet(ModelViewSet):
+    """
+    Nightly rate calendar of rooms; list the rates of one room with ?room=<id>. Only the
+    owner of a room's hotel writes its rates.
+    """
+    serializer_class = RoomRateSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        rates = RoomRate.objects.all()
+        if self.request.method not in SAFE_METHODS:
+            return rates.filter(room__hotel__owner=self.request.user)
+        room = self.request.query_params.get('room')
+        if self.action == 'list' and room:
+            try:
+                rates = rates.filter(room_id=int(room))
+            except ValueError:
+                raise DRFValidationError({'room': ["room must be an id."]})
+        return rates
+
+    def check_room_owner(self, serializer):
+        room = serializer.validated_data.get('room')
+        if room is not None and room.hotel.owner_id != self.request.user.id:
+            raise PermissionDenied("Only the owner of the room's hotel can set its rates.")
+
+    def create(self, request, *args, **kwargs):
+        logger.info("Attempting to create a new room rate with data: %s", request.data)
+        response = super().create(request, *args, **kwargs)
+        logger.info("Room rate created successfully: %s", response.data)
+        return response
+
+    def perform_create(self, serializer):
+        self.check_room_owner(serializer)
+        serializer.save()
+
+    def update(self, request, *args, **kwargs):
+        logger.info("Updating room rate ID: %s with data: %s", kwargs['pk'], request.data)
+        partial = kwargs.pop('partial', True)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        logger.info("Room rate updated successfully for ID: %s", kwargs['pk'])
+        return Response(serializer.data)
+
+    def perform_update(self, serializer):
+        self.check_room_owner(serializer)
+        serializer.save()
+
+    def destroy(self, request, *args, **kwargs):
+        logger.info("Deleting room rate ID: %s", kwargs['pk'])
+        response = super().destroy(request, *args, **kwargs)
+        logger.info("Room rate deleted successfully for ID: %s", kwargs['pk'])
+        return response
+
 
-class ImageViewSet(ModelViewSet):
+class ImageViewSet(BulkWriteMixin, ConditionalGetMixin, PrefetchPlanMixin, StreamingListMixin, ModelViewSet):
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
     permission_classes = []
+    bulk_file_field = 'image'
+    version_keys = {
+        'list': ('room_images',),
+        'retrieve': ('room_image:{pk}',),
+    }
 
     def list(self, request, *args, **kwargs):
         logger.info("Fetching images list")
@@ -37,6 +37,16 @@ const createAPI = (baseURL) => {
 
 export const BackendAPI = createAPI('http://localhost/api/');
 
+export const fetchAllPages = async (path, params = {}) => {
+    let response = await BackendAPI.get(path, { params: { limit: 100, ...params } });
+    const results = [...response.data.results];
+    while (response.data.next) {
+        response = await BackendAPI.get(response.data.next);
+        results.push(...response.data.results);
+    }
+    return results;
+};
+
 export const getCSRFToken = async () => {
     try {
         const response = await axios.get('http://localhost/api/auth/csrf/', {
@@ -1,22 +1,25 @@
-import React, { useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { BackendAPI } from '../api';
 
 const HotelList = () => {
     const [hotels, setHotels] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
 
-    useEffect(() => {
-        const fetchHotels = async () => {
-            try {
-                const response = await BackendAPI.get('/hotels/hotels/');
-                setHotels(response.data);
-            } catch (error) {
-                console.error('Failed to fetch hotels:', error);
-            }
-        };
+    const fetchHotels = useCallback(async (url = null) => {
+        try {
+            const response = await BackendAPI.get(url || '/hotels/hotels/');
+            const { results } = response.data;
+            setHotels((previous) => (url ? [...previous, ...results] : results));
+            setNextPage(response.data.next);
+        } catch (error) {
+            console.error('Failed to fetch hotels:', error);
+        }
+    }, []);
 
+    useEffect(() => {
         fetchHotels();
-    }, []);
+    }, [fetchHotels]);
 
     return (
         <div className="container mt-5">
@@ -48,6 +51,13 @@ const HotelList = () => {
                     </div>
                 ))}
             </div>
+            {nextPage && (
+                <div className="text-center mb-4">
+                    <button className="btn btn-outline-primary" onClick={() => fetchHotels(nextPage)}>
+                        Load more
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useLocation, Link } from 'react-router-dom';
 import { Spinner, Button, Alert, Table } from 'react-bootstrap';
-import { BackendAPI } from '../api';
+import { BackendAPI, fetchAllPages } from '../api';
 import { useAuth } from '../context/AuthContext';
 
 const ProfilePage = () => {
@@ -21,12 +21,10 @@ const ProfilePage = () => {
                 const profileResponse = await BackendAPI.get('/profiles/me/');
                 setProfile(profileResponse.data);
     
-                const userBookingsResponse = await BackendAPI.get('/bookings/me/');
-                setBookings(userBookingsResponse.data);
+                setBookings(await fetchAllPages('/bookings/me/'));
     
                 if (user?.groups?.includes('Tenant')) {
-                    const ownerBookingsResponse = await BackendAPI.get('/bookings/owner/');
-                    setUserHotelsBookings(ownerBookingsResponse.data);
+                    setUserHotelsBookings(await fetchAllPages('/bookings/owner/'));
                 }
             } catch (error) {
                 setError('Failed to load data');
@@ -5,6 +5,10 @@ import { useAuth } from '../context/AuthContext';
 import DatePicker from 'react-datepicker';
 import 'react-datepicker/dist/react-datepicker.css';
 
+const toDate = (date) => date.toISOString().split('T')[0];
+
+const releaseHold = (hold) => BackendAPI.delete(`bookings/holds/${hold.id}/`).catch(() => {});
+
 const RoomDetails = () => {
     const { hotel_id, room_id } = useParams();
     const [room, setRoom] = useState(null);
@@ -12,6 +16,8 @@ const RoomDetails = () => {
     const [endDate, setEndDate] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState('');
+    const [hold, setHold] = useState(null);
+    const [quote, setQuote] = useState(null);
     const { user, isLoadingUser } = useAuth();
     const navigate = useNavigate();
 
@@ -28,6 +34,57 @@ const RoomDetails = () => {
         fetchRoomDetails();
     }, [room_id]);
 
+    // Holds the selected nights during checkout; the hold is released when the dates change.
+    useEffect(() => {
+        if (!user || !room || !startDate || !endDate || startDate >= endDate) return undefined;
+        let current = null;
+        let cancelled = false;
+        BackendAPI.post('bookings/holds/', {
+            room_id: room.id,
+            start_date: toDate(startDate),
+            end_date: toDate(endDate),
+        })
+            .then((response) => {
+                current = response.data;
+                if (cancelled) {
+                    releaseHold(current);
+                } else {
+                    setHold(current);
+                    setError('');
+                }
+            })
+            .catch((err) => {
+                if (!cancelled) {
+                    setHold(null);
+                    setError(err.response?.data?.non_field_errors?.[0] || 'The room is not available for these dates.');
+                }
+            });
+        return () => {
+            cancelled = true;
+            if (current) releaseHold(current);
+            setHold(null);
+        };
+    }, [user, room, startDate, endDate]);
+
+    // Prices the selected stay night by night from the room's rates.
+    useEffect(() => {
+        if (!room || !startDate || !endDate || startDate >= endDate) return undefined;
+        let cancelled = false;
+        BackendAPI.get('rooms/rooms/quote/', {
+            params: { rooms: room.id, start: toDate(startDate), end: toDate(endDate) },
+        })
+            .then((response) => {
+                if (!cancelled) setQuote(response.data.rooms[room.id] || null);
+            })
+            .catch(() => {
+                if (!cancelled) setQuote(null);
+            });
+        return () => {
+            cancelled = true;
+            setQuote(null);
+        };
+    }, [room, startDate, endDate]);
+
     const handleBooking = async () => {
         if (!startDate || !endDate) {
             setError('Please select both start and end dates.');
@@ -38,11 +95,12 @@ const RoomDetails = () => {
         setError('');
         try {
             const user_id = user.id;
-            BackendAPI.post('bookings/', {
+            await BackendAPI.post('bookings/', {
                 user_id: user_id,
                 room_id: room.id,
-                start_date: startDate.toISOString().split('T')[0],
-                end_date: endDate.toISOString().split('T')[0],
+                hold_id: hold?.id,
+                start_date: toDate(startDate),
+                end_date: toDate(endDate),
                 status: "active",
             });
             navigate('/profile');
@@ -109,6 +167,17 @@ const RoomDetails = () => {
                         minDate={startDate}
                     />
                 </div>
+                {hold && (
+                    <p className="text-muted mt-2">
+                        Held for you until {new Date(hold.expires_at).toLocaleTimeString()}.
+                    </p>
+                )}
+                {quote && (
+                    <p className="mt-2">
+                        Total for {quote.nightly_prices.length} nights: ${quote.total_price}
+                        {quote.min_price !== quote.max_price && ` ($${quote.min_price} to $${quote.max_price} per night)`}
+                    </p>
+                )}
                 {error && <p className="text-danger mt-2">{error}</p>}
                 <button
                     className="btn btn-primary mt-3"
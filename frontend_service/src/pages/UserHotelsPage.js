@@ -1,24 +1,34 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { BackendAPI } from '../api';
+import { BackendAPI, fetchAllPages } from '../api';
 import { useAuth } from '../context/AuthContext';
 
 const UserHotelsPage = () => {
     const { user } = useAuth();
     const navigate = useNavigate();
     const [hotels, setHotels] = useState([]);
+    const [dashboard, setDashboard] = useState(null);
 
     useEffect(() => {
         const fetchHotels = async () => {
             try {
-                const response = await BackendAPI.get('/hotels/hotels/me/');
-                setHotels(response.data);
+                setHotels(await fetchAllPages('/hotels/hotels/me/'));
             } catch (error) {
                 console.error('Failed to fetch user hotels:', error);
             }
         };
 
+        const fetchDashboard = async () => {
+            try {
+                const response = await BackendAPI.get('/hotels/hotels/dashboard/');
+                setDashboard(response.data);
+            } catch (error) {
+                console.error('Failed to fetch dashboard:', error);
+            }
+        };
+
         fetchHotels();
+        fetchDashboard();
     }, [user, navigate]);
 
     const handleCreateHotel = () => {
@@ -48,6 +58,55 @@ const UserHotelsPage = () => {
             <button onClick={handleCreateHotel} className="btn btn-primary mb-4">
                 Add New Hotel
             </button>
+            {dashboard && (
+                <div className="card mb-4">
+                    <div className="card-body">
+                        <h5 className="card-title">
+                            Next {dashboard.days} days ({dashboard.start} - {dashboard.end})
+                        </h5>
+                        <p className="card-text">
+                            <strong>Occupancy:</strong> {(dashboard.totals.occupancy * 100).toFixed(1)}%{' '}
+                            <strong>Booked nights:</strong> {dashboard.totals.booked_nights}{' '}
+                            <strong>Revenue:</strong> ${dashboard.totals.revenue}{' '}
+                            <strong>Check-ins:</strong> {dashboard.totals.check_ins}
+                        </p>
+                        <table className="table table-sm">
+                            <thead>
+                                <tr>
+                                    <th>Hotel</th>
+                                    <th>Occupancy</th>
+                                    <th>Booked nights</th>
+                                    <th>Revenue</th>
+                                    <th>Check-ins</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                                {dashboard.hotels.map((hotel) => (
+                                    <tr key={hotel.id}>
+                                        <td>{hotel.name}</td>
+                                        <td>{(hotel.occupancy * 100).toFixed(1)}%</td>
+                                        <td>{hotel.booked_nights}</td>
+                                        <td>${hotel.revenue}</td>
+                                        <td>{hotel.check_ins}</td>
+                                    </tr>
+                                ))}
+                            </tbody>
+                        </table>
+                        {dashboard.upcoming_check_ins.length > 0 && (
+                            <>
+                                <h6>Upcoming check-ins</h6>
+                                <ul className="list-unstyled">
+                                    {dashboard.upcoming_check_ins.map((booking) => (
+                                        <li key={booking.id}>
+                                            {booking.start_date}: {booking.room_name} - {booking.guest} ({booking.status})
+                                        </li>
+                                    ))}
+                                </ul>
+                            </>
+                        )}
+                    </div>
+                </div>
+            )}
             <div className="row">
                 {hotels.map((hotel) => (
                     <div className="col-md-4 mb-4" key={hotel.id}>